@@ -12,7 +12,10 @@ M.buffer_status = setmetatable({
         function(self, args, _input)
             args = args or {}
 
-            local status = buffers.get_buffer_status()
+            local status = {
+                buffers = buffers.get_buffer_status(),
+                hidden_buffer_pool = buffers.get_hidden_pool_stats()
+            }
             return self:success("llm", status, "Buffer Status")
         end,
     },
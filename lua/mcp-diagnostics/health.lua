@@ -227,6 +227,19 @@ function M.check()
     health.warn("No buffers have LSP attached")
   end
 
+  health.start("LSP Response Cache")
+
+  local cache_config = require("mcp-diagnostics.shared.config").get_lsp_cache_config()
+  if cache_config.enabled then
+    local stats = require("mcp-diagnostics.shared.lsp").get_cache_stats()
+    health.ok(string.format("Hits: %d, misses: %d (%.0f%% hit rate)", stats.hits, stats.misses, stats.hit_rate * 100))
+    health.info(string.format("Entries: %d/%d, ~%d/%d KB, evictions: %d, invalidations: %d",
+      stats.entries, cache_config.max_entries, math.floor(stats.bytes / 1024),
+      math.floor(cache_config.max_bytes / 1024), stats.evictions, stats.invalidations))
+  else
+    health.info("Disabled (lsp_cache.enabled = false)")
+  end
+
   -- Server mode specific checks
   if server_config then
     health.start("Server Mode")
@@ -9,16 +9,16 @@ local buffers = require("mcp-diagnostics.shared.buffers")
 local file_watcher = require("mcp-diagnostics.shared.file_watcher")
 
 -- Diagnostic functions - delegate to shared
-function M.get_all_diagnostics(files, severity, source)
-  return diagnostics.get_all_diagnostics(files, severity, source)
+function M.get_all_diagnostics(files, severity, source, opts)
+  return diagnostics.get_all_diagnostics(files, severity, source, opts)
 end
 
 function M.get_diagnostic_summary()
   return diagnostics.get_diagnostic_summary()
 end
 
-function M.filter_diagnostics(diag_list, severity, source)
-  return diagnostics.filter_diagnostics(diag_list, severity, source)
+function M.filter_diagnostics(diag_list, severity, source, code)
+  return diagnostics.filter_diagnostics(diag_list, severity, source, code)
 end
 
 function M.get_diagnostics_by_severity(severity_text)
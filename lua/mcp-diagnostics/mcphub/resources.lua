@@ -16,6 +16,17 @@ function M.register_all(mcphub, server_name, server_config)
     end
   })
 
+  -- Current diagnostics in the compact columnar layout
+  mcphub.add_resource(server_name, {
+    name = "current_diagnostics_columnar",
+    uri = "diagnostics://current/columnar",
+    description = "All current diagnostics as parallel column arrays with shared filename, source and code tables",
+    handler = function(_req, res)
+      local diag_results = diagnostics.get_all_diagnostics(nil, nil, nil, { format = "columnar" })
+      return res:text(vim.json.encode(diag_results), "application/json"):send()
+    end
+  })
+
   -- Diagnostic summary resource
   mcphub.add_resource(server_name, {
     name = "diagnostic_summary",
@@ -214,7 +214,10 @@ function M.register_buffer_tools(mcphub, server_name, server_config)
     name = "buffer_status",
     description = "Get status of all loaded buffers",
     handler = function(_req, res)
-      local status = buffers.get_buffer_status()
+      local status = {
+        buffers = buffers.get_buffer_status(),
+        hidden_buffer_pool = buffers.get_hidden_pool_stats()
+      }
       return res:text(vim.json.encode(status), "application/json"):send()
     end
   })
@@ -47,15 +47,60 @@ function M.register_diagnostic_tools(mcphub, server_name, server_config)
         source = {
           type = "string",
           description = "Filter by LSP source (e.g. 'pylsp', 'eslint', 'typescript'). Use to focus on specific toolchain feedback, but don't ignore any source."
+        },
+        severities = {
+          type = "array",
+          items = { type = "string", enum = { "error", "warn", "info", "hint" } },
+          description = "Match any of several severities (e.g. ['error', 'warn']). Takes precedence over severity and min_severity."
+        },
+        min_severity = {
+          type = "string",
+          enum = { "error", "warn", "info", "hint" },
+          description = "Match this severity and anything more severe (e.g. 'warn' returns errors and warnings). Takes precedence over severity."
+        },
+        sources = {
+          type = "array",
+          items = { type = "string" },
+          description = "Match any of several LSP sources (e.g. ['pyright', 'ruff']). Takes precedence over source."
+        },
+        codes = {
+          type = "array",
+          items = { type = "string" },
+          description = "Match any of several diagnostic codes (e.g. ['E501', 'reportMissingImports'])."
+        },
+        group_by = {
+          type = "string",
+          enum = { "file" },
+          description = "Set to 'file' to return [{ filename, bufnr, diagnostics }] groups, so each filename appears once instead of on every diagnostic."
+        },
+        format = {
+          type = "string",
+          enum = { "objects", "columnar" },
+          description = "'objects' (default) returns one object per diagnostic. 'columnar' returns parallel arrays under 'columns' with filenames, sources and codes stored once in string tables (file/source/code columns are 0-based indexes into them); much smaller for large result sets."
+        },
+        limit = {
+          type = "number",
+          description = "Page size. When limit or cursor is given, results are sorted by file, line and column and returned as { diagnostics, total, next_cursor }."
+        },
+        cursor = {
+          type = "string",
+          description = "Pass the next_cursor from the previous page to continue. Omit for the first page."
         }
       }
     },
     handler = function(_req, res)
       local files = _req.params.files
-      local severity = _req.params.severity
-      local source = _req.params.source
+      local severity, source, opts = diagnostics.filters_from_params(_req.params)
+
+      if opts.limit or opts.cursor then
+        local page, err = diagnostics.get_diagnostics_page(files, severity, source, opts)
+        if not page then
+          return res:error(err):send()
+        end
+        return res:text(vim.json.encode(page), "application/json"):send()
+      end
 
-      local diag_results = diagnostics.get_all_diagnostics(files, severity, source)
+      local diag_results = diagnostics.get_all_diagnostics(files, severity, source, opts)
       return res:text(vim.json.encode(diag_results), "application/json"):send()
     end
   })
@@ -70,6 +115,26 @@ function M.register_diagnostic_tools(mcphub, server_name, server_config)
     end
   })
 
+  -- diagnostics_delta tool - only what changed since a generation
+  mcphub.add_tool(server_name, {
+    name = "diagnostics_delta",
+    description = "⚡ EDIT-CHECK LOOP TOOL: Get only the diagnostics added, removed or changed since a generation. Call diagnostics_summary (or a previous delta) to get the current generation, make your fix, then call this with that generation to see exactly what your edit resolved or introduced. If reset is true, 'added' contains the full current set.",
+    inputSchema = {
+      type = "object",
+      properties = {
+        since = {
+          type = "number",
+          description = "Generation returned by a previous diagnostics_summary or diagnostics_delta call (0 for everything)"
+        }
+      }
+    },
+    handler = function(_req, res)
+      local since = _req.params.since or 0
+      local delta = diagnostics.get_diagnostics_delta(since)
+      return res:text(vim.json.encode(delta), "application/json"):send()
+    end
+  })
+
   -- diagnostic_hotspots tool - find most problematic files
   mcphub.add_tool(server_name, {
     name = "diagnostic_hotspots",
@@ -140,8 +205,12 @@ function M.register_lsp_tools(mcphub, server_name, server_config)
       required = { "file", "line", "column" }
     },
     handler = function(_req, res)
-      local hover_info = lsp.get_hover_info(_req.params.file, _req.params.line, _req.params.column)
-      return res:text(vim.json.encode(hover_info), "application/json"):send()
+      lsp.get_hover_info_async(_req.params.file, _req.params.line, _req.params.column, function(hover_info, err)
+        if err then
+          return res:error(err):send()
+        end
+        res:text(vim.json.encode(hover_info), "application/json"):send()
+      end)
     end
   })
 
@@ -159,8 +228,12 @@ function M.register_lsp_tools(mcphub, server_name, server_config)
       required = { "file", "line", "column" }
     },
     handler = function(_req, res)
-      local definitions = lsp.get_definitions(_req.params.file, _req.params.line, _req.params.column)
-      return res:text(vim.json.encode(definitions), "application/json"):send()
+      lsp.get_definitions_async(_req.params.file, _req.params.line, _req.params.column, function(definitions, err)
+        if err then
+          return res:error(err):send()
+        end
+        res:text(vim.json.encode(definitions), "application/json"):send()
+      end)
     end
   })
 
@@ -178,8 +251,12 @@ function M.register_lsp_tools(mcphub, server_name, server_config)
       required = { "file", "line", "column" }
     },
     handler = function(_req, res)
-      local references = lsp.get_references(_req.params.file, _req.params.line, _req.params.column)
-      return res:text(vim.json.encode(references), "application/json"):send()
+      lsp.get_references_async(_req.params.file, _req.params.line, _req.params.column, function(references, err)
+        if err then
+          return res:error(err):send()
+        end
+        res:text(vim.json.encode(references), "application/json"):send()
+      end)
     end
   })
 
@@ -195,8 +272,12 @@ function M.register_lsp_tools(mcphub, server_name, server_config)
       required = { "file" }
     },
     handler = function(_req, res)
-      local symbols = lsp.get_document_symbols(_req.params.file)
-      return res:text(vim.json.encode(symbols), "application/json"):send()
+      lsp.get_document_symbols_async(_req.params.file, function(symbols, err)
+        if err then
+          return res:error(err):send()
+        end
+        res:text(vim.json.encode(symbols), "application/json"):send()
+      end)
     end
   })
 
@@ -211,8 +292,9 @@ function M.register_lsp_tools(mcphub, server_name, server_config)
       }
     },
     handler = function(_req, res)
-      local symbols = lsp.get_workspace_symbols(_req.params.query)
-      return res:text(vim.json.encode(symbols), "application/json"):send()
+      lsp.get_workspace_symbols_async(_req.params.query, function(symbols)
+        res:text(vim.json.encode(symbols), "application/json"):send()
+      end)
     end
   })
 
@@ -239,28 +321,28 @@ function M.register_lsp_tools(mcphub, server_name, server_config)
       required = { "symbol_name" }
     },
     handler = function(_req, res)
-      local symbols = lsp.get_workspace_symbols(_req.params.symbol_name)
-
-      -- Apply context filtering if provided
-      if _req.params.context_file and symbols then
-        local filtered = {}
-        for _, symbol in ipairs(symbols) do
-          if symbol.location and symbol.location.uri then
-            local file_path = vim.uri_to_fname(symbol.location.uri)
-            if file_path:match(_req.params.context_file) then
-              table.insert(filtered, symbol)
+      lsp.get_workspace_symbols_async(_req.params.symbol_name, function(symbols)
+        -- Apply context filtering if provided
+        if _req.params.context_file and symbols then
+          local filtered = {}
+          for _, symbol in ipairs(symbols) do
+            if symbol.location and symbol.location.uri then
+              local file_path = vim.uri_to_fname(symbol.location.uri)
+              if file_path:match(_req.params.context_file) then
+                table.insert(filtered, symbol)
+              end
             end
           end
+          symbols = filtered
         end
-        symbols = filtered
-      end
 
-      -- Apply result limit
-      if _req.params.max_results and symbols and #symbols > _req.params.max_results then
-        symbols = vim.list_slice(symbols, 1, _req.params.max_results)
-      end
+        -- Apply result limit
+        if _req.params.max_results and symbols and #symbols > _req.params.max_results then
+          symbols = vim.list_slice(symbols, 1, _req.params.max_results)
+        end
 
-      return res:text(vim.json.encode(symbols), "application/json"):send()
+        res:text(vim.json.encode(symbols), "application/json"):send()
+      end)
     end
   })
 
@@ -280,8 +362,12 @@ function M.register_lsp_tools(mcphub, server_name, server_config)
       required = { "file", "line", "column" }
     },
     handler = function(_req, res)
-      local actions = lsp.get_code_actions(_req.params.file, _req.params.line, _req.params.column, _req.params.end_line, _req.params.end_column)
-      return res:text(vim.json.encode(actions), "application/json"):send()
+      lsp.get_code_actions_async(_req.params.file, _req.params.line, _req.params.column, _req.params.end_line, _req.params.end_column, function(actions, err)
+        if err then
+          return res:error(err):send()
+        end
+        res:text(vim.json.encode(actions), "application/json"):send()
+      end)
     end
   })
 
@@ -301,18 +387,17 @@ function M.register_lsp_tools(mcphub, server_name, server_config)
       required = { "files" }
     },
     handler = function(_req, res)
-      local files = _req.params.files
-      local results = {}
-
-      for _, file in ipairs(files) do
-        local success = lsp.ensure_file_loaded(file)
-        table.insert(results, {file = file, loaded = success})
-      end
+      lsp_extra.ensure_files_loaded_async(_req.params.files, nil, function(result)
+        local results = {}
+        for _, entry in ipairs(result.results) do
+          table.insert(results, { file = entry.filepath, loaded = entry.loaded })
+        end
 
-      return res:text(vim.json.encode({
-        loaded_files = results,
-        message = string.format("Loaded %d files for LSP analysis", #results)
-      }), "application/json"):send()
+        res:text(vim.json.encode({
+          loaded_files = results,
+          message = string.format("Loaded %d files for LSP analysis", result.successfully_loaded)
+        }), "application/json"):send()
+      end)
     end
   })
 end
@@ -325,7 +410,10 @@ function M.register_buffer_tools(mcphub, server_name, server_config)
     name = "buffer_status",
     description = "📊 WORKSPACE OVERVIEW: Get status of all loaded buffers including LSP client information. Use to understand which files are available for LSP operations and identify files that need loading. Critical for planning comprehensive diagnostic investigations.",
     handler = function(_req, res)
-      local status = buffers.get_buffer_status()
+      local status = {
+        buffers = buffers.get_buffer_status(),
+        hidden_buffer_pool = buffers.get_hidden_pool_stats()
+      }
       return res:text(vim.json.encode(status), "application/json"):send()
     end
   })
@@ -358,8 +446,9 @@ function M.register_enhanced_tools(mcphub, server_name, server_config)
       local files = _req.params.files
       local reload_mode = _req.params.reload_mode
 
-      local results = lsp_extra.ensure_files_loaded(files, { reload_mode = reload_mode })
-      return res:text(vim.json.encode(results), "application/json"):send()
+      lsp_extra.ensure_files_loaded_async(files, { reload_mode = reload_mode }, function(results)
+        res:text(vim.json.encode(results), "application/json"):send()
+      end)
     end
   })
 
@@ -377,8 +466,9 @@ function M.register_enhanced_tools(mcphub, server_name, server_config)
       required = { "file", "line", "column" }
     },
     handler = function(_req, res)
-      local analysis = lsp_extra.analyze_symbol(_req.params.file, _req.params.line, _req.params.column)
-      return res:text(vim.json.encode(analysis), "application/json"):send()
+      lsp_extra.analyze_symbol_async(_req.params.file, _req.params.line, _req.params.column, function(analysis)
+        res:text(vim.json.encode(analysis), "application/json"):send()
+      end)
     end
   })
 
@@ -402,8 +492,9 @@ function M.register_enhanced_tools(mcphub, server_name, server_config)
         return res:text(vim.json.encode({ error = "Diagnostic not found at specified index" }), "application/json"):send()
       end
 
-      local analysis = lsp_extra.analyze_diagnostics(_req.params.file, diagnostic)
-      return res:text(vim.json.encode(analysis), "application/json"):send()
+      lsp_extra.analyze_diagnostics_async(_req.params.file, diagnostic, function(analysis)
+        res:text(vim.json.encode(analysis), "application/json"):send()
+      end)
     end
   })
 
@@ -412,8 +503,9 @@ function M.register_enhanced_tools(mcphub, server_name, server_config)
     name = "correlate_diagnostics",
     description = "🧠 PATTERN RECOGNITION: Analyze relationships between diagnostics across files. Identifies symbols appearing in multiple errors, common error patterns, and potential cascading fixes. Critical for systematic error resolution and finding root causes.",
     handler = function(_req, res)
-      local correlations = lsp_extra.correlate_diagnostics()
-      return res:text(vim.json.encode(correlations), "application/json"):send()
+      lsp_extra.correlate_diagnostics_async(function(correlations)
+        res:text(vim.json.encode(correlations), "application/json"):send()
+      end)
     end
   })
 
@@ -445,9 +537,10 @@ function M.register_file_refresh_tools(mcphub, server_name, server_config)
       }
     },
     handler = function(_req, res)
-      local files = _req.files or {}
-      local deleted_files = _req.deleted_files or {}
-      local max_wait_ms = _req.max_wait_ms or 5000
+      local params = _req.params or {}
+      local files = params.files or {}
+      local deleted_files = params.deleted_files or {}
+      local max_wait_ms = params.max_wait_ms or 5000
 
       -- Handle file deletions first if specified
       local deletion_results = {}
@@ -459,15 +552,15 @@ function M.register_file_refresh_tools(mcphub, server_name, server_config)
       end
       -- Use the improved unified refresh system
       local unified_refresh = require("mcp-diagnostics.shared.unified_refresh")
-      local result = unified_refresh.refresh_after_external_changes(files, max_wait_ms)
-
-return res:text(vim.json.encode({
-        message = result.message or "External refresh completed",
-        success = result.success,
-        details = result,
-        deletions = deletion_results,
-        deleted_count = #deleted_files
-      }), "application/json"):send()
+      unified_refresh.refresh_after_external_changes_async(files, max_wait_ms, function(result)
+        res:text(vim.json.encode({
+          message = result.message or "External refresh completed",
+          success = result.success,
+          details = result,
+          deletions = deletion_results,
+          deleted_count = #deleted_files
+        }), "application/json"):send()
+      end)
     end
   })
 end
@@ -0,0 +1,84 @@
+-- RPC entry points for the Node MCP server
+-- The server calls these through one constant chunk,
+--   require("mcp-diagnostics.rpc").call(name, ...)
+-- with its arguments passed as typed msgpack values, so no Lua source is
+-- built from request data and nothing is recompiled per request.
+
+local diagnostics = require("mcp-diagnostics.shared.diagnostics")
+local buffers = require("mcp-diagnostics.shared.buffers")
+
+local M = {}
+
+-- Load a file into a buffer (with watcher and didOpen, as the Lua tools do)
+function M.ensure_file_loaded(filepath)
+  local bufnr, loaded, err = require("mcp-diagnostics.shared.lsp_interact").ensure_file_loaded(filepath)
+  return {
+    success = loaded == true,
+    bufnr = bufnr,
+    loaded = loaded == true,
+    error = err
+  }
+end
+
+function M.get_buffer_status()
+  return {
+    buffers = buffers.get_buffer_status(),
+    hidden_buffer_pool = buffers.get_hidden_pool_stats()
+  }
+end
+
+-- params: the diagnostics tool parameters (files, severity, source, filters, output options)
+function M.get_diagnostics(params)
+  params = params or {}
+  local severity, source, opts = diagnostics.filters_from_params(params)
+  return diagnostics.get_all_diagnostics(params.files, severity, source, opts)
+end
+
+-- params: as get_diagnostics, plus limit and cursor
+function M.get_diagnostics_page(params)
+  params = params or {}
+  local severity, source, opts = diagnostics.filters_from_params(params)
+  local page, err = diagnostics.get_diagnostics_page(params.files, severity, source, opts)
+  if not page then
+    return { error = err }
+  end
+  return page
+end
+
+-- Aggregate counts only, served from the incremental index
+function M.get_diagnostic_summary()
+  return diagnostics.get_diagnostic_summary()
+end
+
+function M.get_diagnostics_delta(since)
+  return diagnostics.get_diagnostics_delta(since)
+end
+
+-- Start an async LSP operation, answered by an "mcp_diagnostics_response" notification
+function M.lsp_call_async(channel, request_id, operation, args)
+  local ok, err = require("mcp-diagnostics.shared.lsp").call_async(channel, request_id, operation, args)
+  if not ok then
+    return { error = err }
+  end
+  return { started = true }
+end
+
+-- Dispatch name(...) and return its result (errors surface as RPC errors)
+function M.call(name, ...)
+  local fn = name ~= "call" and M[name]
+  if type(fn) ~= "function" then
+    error("Unknown RPC function: " .. tostring(name))
+  end
+
+  -- Omitted optional arguments arrive as vim.NIL
+  local args = { n = select("#", ...), ... }
+  for i = 1, args.n do
+    if args[i] == vim.NIL then
+      args[i] = nil
+    end
+  end
+
+  return fn(unpack(args, 1, args.n))
+end
+
+return M
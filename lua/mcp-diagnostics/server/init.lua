@@ -16,6 +16,7 @@ M.config = {
   server_port = 6666,
   auto_start_server = false,  -- Set to true to auto-start server
   export_path = '/tmp/nvim_diagnostics.json',
+  export_format = 'objects',  -- "objects" or "columnar" (parallel arrays, much smaller)
   -- Node.js MCP server auto-build and launch
   auto_build = false,         -- Auto-build Node.js server
   auto_launch = false,        -- Auto-launch Node.js MCP server
@@ -200,8 +201,11 @@ end
 
 -- Buffer Management Functions for server parity
 function M.buffer_status()
-  local status = buffers.get_buffer_status()
-  config.log_info(string.format('Retrieved status for %d buffers', #status), "[MCP Diagnostics Server]")
+  local status = {
+    buffers = buffers.get_buffer_status(),
+    hidden_buffer_pool = buffers.get_hidden_pool_stats()
+  }
+  config.log_info(string.format('Retrieved status for %d buffers', vim.tbl_count(status.buffers)), "[MCP Diagnostics Server]")
   return status
 end
 
@@ -222,9 +226,10 @@ function M.refresh_after_external_changes(files)
   return result
 end
 
-function M.export_diagnostics(filename)
+function M.export_diagnostics(filename, format)
   filename = filename or M.config.export_path
-  local data = diagnostics.get_all_diagnostics()
+  format = format or M.config.export_format
+  local data = diagnostics.get_all_diagnostics(nil, nil, nil, { format = format })
 
   local json = vim.json.encode(data)
   local file = io.open(filename, 'w')
@@ -447,8 +452,13 @@ local function create_commands()
     elseif subcmd == 'summary' then
       M.diagnostic_summary()
     elseif subcmd == 'export' then
+      local format = nil
+      if subcmd_args[2] == '--columnar' then
+        format = 'columnar'
+        remaining_args = table.concat(vim.list_slice(subcmd_args, 3), ' ')
+      end
       local filename = remaining_args ~= '' and remaining_args or nil
-      M.export_diagnostics(filename)
+      M.export_diagnostics(filename, format)
     elseif subcmd == 'server' then
       local server_subcmd = subcmd_args[2]
       local server_args = table.concat(vim.list_slice(subcmd_args, 3), ' ')
@@ -486,7 +496,7 @@ local function create_commands()
       vim.notify('[MCP Diagnostics] Available commands:\n' ..
         '  McpDiagnostics status - Show server status\n' ..
         '  McpDiagnostics summary - Show diagnostic summary\n' ..
-        '  McpDiagnostics export [file] - Export diagnostics to JSON\n' ..
+        '  McpDiagnostics export [--columnar] [file] - Export diagnostics to JSON\n' ..
         '  McpDiagnostics server start [address] - Start Neovim server\n' ..
         '  McpDiagnostics server start-socket [path] - Start socket server\n' ..
         '  McpDiagnostics server start-tcp [host:port] - Start TCP server\n' ..
@@ -16,6 +16,165 @@ local function set_buffer_option(bufnr, option, value)
     vim.api.nvim_set_option_value(option, value, { buf = bufnr })
 end
 
+-- Buffer options reported by get_buffer_info
+local INFO_OPTIONS = { 'filetype', 'buftype', 'modified', 'readonly', 'buflisted', 'bufhidden' }
+
+local function read_options(bufnr, info)
+    for _, option in ipairs(INFO_OPTIONS) do
+        info[option] = get_buffer_option(bufnr, option)
+    end
+end
+
+-- detaching_id: client in the middle of detaching (still listed by get_clients)
+local function read_lsp_clients(bufnr, info, detaching_id)
+    info.lsp_clients = {}
+    for _, client in ipairs(vim.lsp.get_clients({ bufnr = bufnr })) do
+        if client.id ~= detaching_id then
+            table.insert(info.lsp_clients, client.name)
+        end
+    end
+    info.has_lsp = #info.lsp_clients > 0
+end
+
+-- Get file stats if it's a real file
+local function read_file_stats(info)
+    if info.buftype == '' and info.name ~= '[No Name]' then
+        local file_exists = vim.fn.filereadable(info.name) == 1
+        info.file_exists = file_exists
+        info.file_size = file_exists and vim.fn.getfsize(info.name) or 0
+        info.is_real_file = true
+    else
+        info.file_exists = false
+        info.file_size = 0
+        info.is_real_file = false
+    end
+end
+
+-- ============================================================================
+-- Hidden Buffer Pool
+-- ============================================================================
+
+-- Hidden buffers created for agents, evicted least recently used first once the
+-- pool exceeds hidden_buffer_pool.max_buffers or max_bytes
+-- bufnr -> { filepath, bytes, last_used }
+local hidden_pool = {}
+local use_counter = 0
+local pool_stats = { evictions = 0, evicted_bytes = 0 }
+
+local function buffer_bytes(bufnr)
+    if not vim.api.nvim_buf_is_loaded(bufnr) then
+        return 0
+    end
+    return vim.api.nvim_buf_get_offset(bufnr, vim.api.nvim_buf_line_count(bufnr))
+end
+
+-- Buffers the user can see or has edited are never evicted
+local function is_user_visible(bufnr)
+    return get_buffer_option(bufnr, 'buflisted')
+        or get_buffer_option(bufnr, 'bufhidden') ~= 'hide'
+        or get_buffer_option(bufnr, 'modified')
+        -- win_findbuf covers windows in every tab page, bufwinid only the current one
+        or #vim.fn.win_findbuf(bufnr) > 0
+end
+
+local function pool_totals()
+    local count, bytes = 0, 0
+    for _, entry in pairs(hidden_pool) do
+        count = count + 1
+        bytes = bytes + entry.bytes
+    end
+    return count, bytes
+end
+
+-- Mark a pooled buffer as just used and refresh its size
+local function touch_pooled_buffer(bufnr)
+    local entry = hidden_pool[bufnr]
+    if entry then
+        use_counter = use_counter + 1
+        entry.last_used = use_counter
+        entry.bytes = buffer_bytes(bufnr)
+    end
+end
+
+-- Wipe the buffer, then close its documents on the servers the plugin opened them on
+-- and stop watching it. Servers attached through vim.lsp get didClose from Neovim
+-- when the wipe detaches them. Returns false (buffer kept in the pool) if the wipe failed.
+local function evict_pooled_buffer(bufnr, entry)
+    local ok, err = pcall(vim.api.nvim_buf_delete, bufnr, { force = false })
+    if not ok or vim.api.nvim_buf_is_valid(bufnr) then
+        config.log_debug(
+            string.format("Could not evict hidden buffer %d (%s): %s", bufnr, entry.filepath, tostring(err)),
+            "[Shared Buffers]"
+        )
+        return false
+    end
+
+    hidden_pool[bufnr] = nil
+    pool_stats.evictions = pool_stats.evictions + 1
+    pool_stats.evicted_bytes = pool_stats.evicted_bytes + entry.bytes
+
+    require("mcp-diagnostics.shared.lsp_interact").notify_lsp_file_closed(entry.filepath, bufnr)
+    require("mcp-diagnostics.shared.file_watcher").cleanup_watcher(entry.filepath)
+
+    config.log_debug(
+        string.format("Evicted hidden buffer %d (%s, %d bytes)", bufnr, entry.filepath, entry.bytes),
+        "[Shared Buffers]"
+    )
+    return true
+end
+
+-- Evict least recently used pooled buffers until within the configured limits
+-- keep_bufnr (the buffer being loaded right now) is never evicted
+local function enforce_pool_limits(keep_bufnr)
+    local limits = config.get_hidden_buffer_pool_config()
+    local count, bytes = pool_totals()
+    if count <= limits.max_buffers and bytes <= limits.max_bytes then
+        return
+    end
+
+    local candidates = {}
+    for bufnr, entry in pairs(hidden_pool) do
+        if not vim.api.nvim_buf_is_valid(bufnr) then
+            hidden_pool[bufnr] = nil
+            count, bytes = count - 1, bytes - entry.bytes
+        elseif bufnr ~= keep_bufnr then
+            table.insert(candidates, bufnr)
+        end
+    end
+    table.sort(candidates, function(a, b)
+        return hidden_pool[a].last_used < hidden_pool[b].last_used
+    end)
+
+    for _, bufnr in ipairs(candidates) do
+        if count <= limits.max_buffers and bytes <= limits.max_bytes then
+            break
+        end
+        local entry = hidden_pool[bufnr]
+        if not is_user_visible(bufnr) and evict_pooled_buffer(bufnr, entry) then
+            count, bytes = count - 1, bytes - entry.bytes
+        end
+    end
+end
+
+-- Stop managing a buffer (the user took it over, or it was wiped)
+function M.release_from_pool(bufnr)
+    hidden_pool[bufnr] = nil
+end
+
+-- Get the size, limits and eviction counters of the hidden buffer pool
+function M.get_hidden_pool_stats()
+    local limits = config.get_hidden_buffer_pool_config()
+    local count, bytes = pool_totals()
+    return {
+        buffers = count,
+        bytes = bytes,
+        max_buffers = limits.max_buffers,
+        max_bytes = limits.max_bytes,
+        evictions = pool_stats.evictions,
+        evicted_bytes = pool_stats.evicted_bytes
+    }
+end
+
 -- Centralized user edit detection setup
 -- Previously duplicated in buffers.lua and lsp_interact.lua
 function M.setup_user_edit_detection(bufnr, filepath, source_name)
@@ -33,6 +192,7 @@ function M.setup_user_edit_detection(bufnr, filepath, source_name)
             if is_listed and is_hidden == 'hide' then
                 -- User has made buffer listed (via :edit or similar), make it fully visible
                 set_buffer_option(bufnr, 'bufhidden', '')
+                M.release_from_pool(bufnr)
                 config.log_debug(
                     string.format("Buffer %d (%s) made fully visible by user action", bufnr, filepath),
                     source_name
@@ -54,6 +214,7 @@ function M.create_hidden_buffer(filepath, source_name)
     -- Configure as hidden buffer
     set_buffer_option(bufnr, 'buflisted', false)
     set_buffer_option(bufnr, 'bufhidden', 'hide')
+    hidden_pool[bufnr] = { filepath = filepath, bytes = 0, last_used = 0 }
 
     -- Set up user edit detection
     vim.schedule(function()
@@ -101,50 +262,68 @@ end
         }
     end
 
-    -- Get buffer metadata using modern API
     local info = {
         bufnr = bufnr,
         name = name,
         loaded = true,
-        filetype = get_buffer_option(bufnr, 'filetype'),
-        buftype = get_buffer_option(bufnr, 'buftype'),
-        modified = get_buffer_option(bufnr, 'modified'),
-        readonly = get_buffer_option(bufnr, 'readonly'),
-        buflisted = get_buffer_option(bufnr, 'buflisted'),
-        bufhidden = get_buffer_option(bufnr, 'bufhidden'),
         line_count = vim.api.nvim_buf_line_count(bufnr)
     }
+    read_options(bufnr, info)
+    read_lsp_clients(bufnr, info)
+    read_file_stats(info)
 
-    -- Get LSP client info
-    info.lsp_clients = {}
-    local clients = vim.lsp.get_clients({ bufnr = bufnr })
-    for _, client in ipairs(clients) do
-        table.insert(info.lsp_clients, client.name)
-    end
-    info.has_lsp = #info.lsp_clients > 0
+    return info
+end
 
-    -- Get file stats if it's a real file
-    if info.buftype == '' and info.name ~= '[No Name]' then
-        local file_exists = vim.fn.filereadable(info.name) == 1
-        info.file_exists = file_exists
-        info.file_size = file_exists and vim.fn.getfsize(info.name) or 0
-        info.is_real_file = true
-    else
-        info.file_exists = false
-        info.file_size = 0
-        info.is_real_file = false
+-- ============================================================================
+-- Buffer Metadata Cache
+-- ============================================================================
+
+-- bufnr -> info as built by get_buffer_info, kept current by autocmds so status
+-- queries are lookups; line counts are read live and file sizes are re-read
+-- only after a write or a watcher event
+local buffer_meta = {}
+
+local function get_cached_info(bufnr)
+    if not vim.api.nvim_buf_is_valid(bufnr) then
+        buffer_meta[bufnr] = nil
+        return nil
     end
 
+    local info = buffer_meta[bufnr]
+    if not info then
+        info = M.get_buffer_info(bufnr)
+        buffer_meta[bufnr] = info
+    elseif info.loaded then
+        info.line_count = vim.api.nvim_buf_line_count(bufnr)
+        if info.file_stats_stale then
+            info.file_stats_stale = nil
+            read_file_stats(info)
+        end
+    end
     return info
 end
 
+-- Callers get their own copy to annotate
+local function copy_info(info)
+    return info and vim.tbl_extend("force", {}, info)
+end
+
+-- Re-read a buffer's file size and existence on next access (after a write or watcher event)
+function M.invalidate_file_stats(bufnr)
+    local info = buffer_meta[bufnr]
+    if info then
+        info.file_stats_stale = true
+    end
+end
+
 -- Find buffer for specific criteria
 -- Centralized logic for buffer discovery
 function M.find_file_buffer(criteria)
     criteria = criteria or {}
 
     for _, bufnr in ipairs(vim.api.nvim_list_bufs()) do
-        local info = M.get_buffer_info(bufnr)
+        local info = get_cached_info(bufnr)
         if info and info.loaded then
             -- Apply criteria filters
             local match = true
@@ -176,7 +355,7 @@ function M.find_file_buffer(criteria)
             end
 
             if match then
-                return bufnr, info
+                return bufnr, copy_info(info)
             end
         end
     end
@@ -229,6 +408,12 @@ end
         vim.fn.bufload(bufnr)
     end
 
+    -- Keep the pool within its limits, evicting other agent-loaded buffers if needed
+    if hidden_pool[bufnr] then
+        touch_pooled_buffer(bufnr)
+        enforce_pool_limits(bufnr)
+    end
+
     -- Set up file watcher if requested
     if enable_file_watcher and vim.fn.filereadable(filepath) == 1 then
         local file_watcher = require("mcp-diagnostics.shared.file_watcher")
@@ -254,8 +439,10 @@ function M.get_all_buffer_status()
     local buffers = vim.api.nvim_list_bufs()
 
     for _, bufnr in ipairs(buffers) do
-        local info = M.get_buffer_info(bufnr)
+        local info = get_cached_info(bufnr)
         if info and info.loaded and info.is_real_file then
+            info = copy_info(info)
+            info.hidden_pool = hidden_pool[bufnr] ~= nil
             status[info.name] = info
         end
     end
@@ -393,5 +580,63 @@ function M.is_file_loaded(filepath)
     return bufnr ~= -1 and vim.api.nvim_buf_is_loaded(bufnr)
 end
 
+-- Forget pooled buffers wiped by anyone
+vim.api.nvim_create_autocmd("BufWipeout", {
+    group = vim.api.nvim_create_augroup("MCPDiagnosticsHiddenPool", { clear = true }),
+    callback = function(args)
+        M.release_from_pool(args.buf)
+    end
+})
+
+-- Keep the metadata cache current
+local meta_group = vim.api.nvim_create_augroup("MCPDiagnosticsBufferMeta", { clear = true })
+
+vim.api.nvim_create_autocmd({ "BufAdd", "BufReadPost", "BufFilePost", "BufUnload", "BufDelete", "BufWipeout" }, {
+    group = meta_group,
+    callback = function(args)
+        buffer_meta[args.buf] = nil
+    end
+})
+
+vim.api.nvim_create_autocmd("OptionSet", {
+    group = meta_group,
+    pattern = INFO_OPTIONS,
+    callback = function(args)
+        local bufnr = vim.api.nvim_get_current_buf()
+        local info = buffer_meta[bufnr]
+        if info and info.loaded then
+            read_options(bufnr, info)
+            info.file_stats_stale = info.file_stats_stale or args.match == 'buftype'
+        end
+    end
+})
+
+vim.api.nvim_create_autocmd({ "FileType", "BufModifiedSet" }, {
+    group = meta_group,
+    callback = function(args)
+        local info = buffer_meta[args.buf]
+        if info and info.loaded then
+            read_options(args.buf, info)
+        end
+    end
+})
+
+vim.api.nvim_create_autocmd({ "LspAttach", "LspDetach" }, {
+    group = meta_group,
+    callback = function(args)
+        local info = buffer_meta[args.buf]
+        if info and info.loaded then
+            read_lsp_clients(args.buf, info, args.event == "LspDetach" and args.data.client_id or nil)
+        end
+    end
+})
+
+vim.api.nvim_create_autocmd("BufWritePost", {
+    group = meta_group,
+    callback = function(args)
+        M.invalidate_file_stats(args.buf)
+    end
+})
+
 
 return M
@@ -11,12 +11,22 @@ M.defaults = {
     debug = false,
     auto_approve = false,
     lsp_timeout = 1000,
+    lsp_client_timeouts = {}, -- per-client overrides, e.g. { rust_analyzer = 5000 }
+    lsp_cache = { enabled = true, max_entries = 1000, max_bytes = 8 * 1024 * 1024 },
+    correlation = { max_concurrency = 4, time_budget_ms = 3000, max_probes_per_symbol = 3 },
+    diagnostics_page_size = 200,
+    diagnostics_delta_history = 10000,
+    hotspot_weights = { errors = 3, warnings = 2, info = 1, hints = 0.5 },
     enable_diagnostics = true,
     enable_lsp = true,
     enable_prompts = true,
     auto_register = true,
     auto_reload_files = true,
     auto_reload_mode = "auto", -- "auto", "prompt", "off"
+    file_watch_debounce_ms = 100, -- window for coalescing file change events
+    file_watch_content_hash = false, -- also compare content hashes before reloading
+    hidden_buffer_pool = { max_buffers = 200, max_bytes = 64 * 1024 * 1024 }, -- agent-loaded buffers kept in memory
+    file_preload = { max_parallel_stats = 32, load_batch_size = 20, load_interval_ms = 50 }, -- bulk file loading
     lsp_notify_mode = "auto", -- "auto", "manual", "disabled"
     file_deletion_mode = "prompt", -- "ignore", "prompt", "auto"
   },
@@ -26,6 +36,7 @@ M.defaults = {
     server_port = 6666,
     auto_start_server = false,
     export_path = '/tmp/nvim_diagnostics.json',
+    export_format = 'objects', -- "objects", "columnar"
     auto_build = false,
     auto_launch = false,
     node_server_path = nil,
@@ -35,8 +46,15 @@ M.defaults = {
     node_env = {},
     restart_on_crash = true,
     health_check_interval = 5000,
+    diagnostics_page_size = 200,
+    diagnostics_delta_history = 10000,
+    hotspot_weights = { errors = 3, warnings = 2, info = 1, hints = 0.5 },
     auto_reload_files = true,
     auto_reload_mode = "auto", -- "auto", "prompt", "off"
+    file_watch_debounce_ms = 100, -- window for coalescing file change events
+    file_watch_content_hash = false, -- also compare content hashes before reloading
+    hidden_buffer_pool = { max_buffers = 200, max_bytes = 64 * 1024 * 1024 }, -- agent-loaded buffers kept in memory
+    file_preload = { max_parallel_stats = 32, load_batch_size = 20, load_interval_ms = 50 }, -- bulk file loading
     lsp_notify_mode = "auto", -- "auto", "manual", "disabled"
     file_deletion_mode = "prompt", -- "ignore", "prompt", "auto"
   }
@@ -102,6 +120,24 @@ end
    return "reload" -- Default mode
  end
 
+ -- Window in ms during which file change events are collected into one refresh
+ function M.get_file_watch_debounce_ms()
+   local config = M.get_active_config()
+   if config and config.file_watch_debounce_ms then
+     return config.file_watch_debounce_ms
+   end
+   return 100 -- Default debounce window
+ end
+
+ -- Whether the file watcher confirms changes with a content hash
+ function M.get_file_watch_content_hash()
+   local config = M.get_active_config()
+   if config and config.file_watch_content_hash ~= nil then
+     return config.file_watch_content_hash
+   end
+   return false -- Metadata comparison only
+ end
+
  -- Get LSP notify mode configuration
  function M.get_lsp_notify_mode()
    local config = M.get_active_config()
@@ -128,6 +164,94 @@ function M.get_lsp_timeout()
   return 1000 -- Default timeout
 end
 
+-- Per-client LSP request deadline
+-- lsp_client_timeouts maps client names to timeouts (e.g. { rust_analyzer = 5000 })
+-- so one slow server can be given longer without delaying the others
+function M.get_lsp_client_timeout(client_name, default_timeout)
+  local config = M.get_active_config()
+  if config and config.lsp_client_timeouts and config.lsp_client_timeouts[client_name] then
+    return config.lsp_client_timeouts[client_name]
+  end
+  return default_timeout or M.get_lsp_timeout()
+end
+
+-- LSP response cache settings, partial overrides keep the other defaults
+function M.get_lsp_cache_config()
+  local defaults = { enabled = true, max_entries = 1000, max_bytes = 8 * 1024 * 1024 }
+  local config = M.get_active_config()
+  if config and config.lsp_cache then
+    return vim.tbl_extend("force", defaults, config.lsp_cache)
+  end
+  return defaults
+end
+
+-- Limits for the pool of hidden buffers loaded on behalf of agents, partial overrides keep the other defaults
+function M.get_hidden_buffer_pool_config()
+  local defaults = { max_buffers = 200, max_bytes = 64 * 1024 * 1024 }
+  local config = M.get_active_config()
+  if config and config.hidden_buffer_pool then
+    return vim.tbl_extend("force", defaults, config.hidden_buffer_pool)
+  end
+  return defaults
+end
+
+-- Bulk file loading: concurrent stats and buffer load pacing, partial overrides keep the other defaults
+function M.get_file_preload_config()
+  local defaults = { max_parallel_stats = 32, load_batch_size = 20, load_interval_ms = 50 }
+  local config = M.get_active_config()
+  if config and config.file_preload then
+    return vim.tbl_extend("force", defaults, config.file_preload)
+  end
+  return defaults
+end
+
+-- Limits for code-action probing in correlate_diagnostics, partial overrides keep the other defaults
+function M.get_correlation_config()
+  local defaults = { max_concurrency = 4, time_budget_ms = 3000, max_probes_per_symbol = 3 }
+  local config = M.get_active_config()
+  if config and config.correlation then
+    return vim.tbl_extend("force", defaults, config.correlation)
+  end
+  return defaults
+end
+
+-- Longest deadline any client can be given
+function M.get_lsp_max_client_timeout()
+  local timeout = M.get_lsp_timeout()
+  local config = M.get_active_config()
+  for _, client_timeout in pairs(config and config.lsp_client_timeouts or {}) do
+    timeout = math.max(timeout, client_timeout)
+  end
+  return timeout
+end
+
+function M.get_diagnostics_page_size()
+  local config = M.get_active_config()
+  if config and config.diagnostics_page_size then
+    return config.diagnostics_page_size
+  end
+  return 200 -- Default page size
+end
+
+function M.get_diagnostics_delta_history()
+  local config = M.get_active_config()
+  if config and config.diagnostics_delta_history then
+    return config.diagnostics_delta_history
+  end
+  return 10000 -- Default number of retained change events
+end
+
+-- Per-severity weights used to rank diagnostic hotspots
+-- Partial overrides (e.g. { hints = 0 }) keep the defaults for the other severities
+function M.get_hotspot_weights()
+  local defaults = { errors = 3, warnings = 2, info = 1, hints = 0.5 }
+  local config = M.get_active_config()
+  if config and config.hotspot_weights then
+    return vim.tbl_extend("force", defaults, config.hotspot_weights)
+  end
+  return defaults
+end
+
 -- Unified logging function
 function M.log(level, message, prefix)
   if not M.is_feature_enabled('debug') and level == vim.log.levels.DEBUG then
@@ -0,0 +1,648 @@
+-- Incremental diagnostic index for MCP Diagnostics
+-- Keeps per-buffer and workspace-wide counters up to date from DiagnosticChanged
+-- events, so summary, hotspot and stats queries only rescan buffers that changed
+
+local M = {}
+
+-- Map severity number to the counter field used in summaries
+local SEVERITY_FIELDS = {
+    [vim.diagnostic.severity.ERROR] = "errors",
+    [vim.diagnostic.severity.WARN] = "warnings",
+    [vim.diagnostic.severity.INFO] = "info",
+    [vim.diagnostic.severity.HINT] = "hints"
+}
+
+-- Per-buffer contributions to the totals, keyed by bufnr
+local entries = {}
+
+-- Buffers whose diagnostics changed since the last flush
+local dirty = {}
+
+-- Workspace-wide counters (always the sum of all entries)
+local totals
+
+-- Diagnostics generation, bumped for every buffer whose diagnostics changed
+local generation = 0
+
+-- Ordered log of { generation, kind, key, diagnostic } change events
+-- Every change with a generation above log_floor is still present in the log
+local change_log = {}
+local log_floor = 0
+
+-- Hotspot score per filename, kept in step with totals.by_file once the
+-- first hotspot query has fixed the weights
+local scores = {}
+local score_weights
+
+-- Merged correlation groups, rebuilt from the per-buffer groups after a flush
+-- that touched any buffer
+local correlations
+
+local function new_counts()
+    return {
+        errors = 0,
+        warnings = 0,
+        info = 0,
+        hints = 0,
+        total = 0
+    }
+end
+
+local function reset_totals()
+    totals = new_counts()
+    totals.by_file = {}
+    totals.by_source = {}
+    totals.by_code = {}
+    totals.patterns = {}
+    totals.source_analysis = {}
+end
+
+local function score_counts(counts, weights)
+    return counts.errors * weights.errors + counts.warnings * weights.warnings
+        + counts.info * weights.info + counts.hints * weights.hints
+end
+
+-- Recompute the score of one file from its current counts
+local function update_score(filename)
+    local counts = totals.by_file[filename]
+    scores[filename] = counts and score_counts(counts, score_weights) or nil
+end
+
+-- Add delta to a keyed counter, dropping keys that reach zero
+local function add_count(tbl, key, delta)
+    local value = (tbl[key] or 0) + delta
+    if value == 0 then
+        tbl[key] = nil
+    else
+        tbl[key] = value
+    end
+end
+
+-- Add sign * counts into a nested counts table stored under key
+local function add_counts(tbl, key, counts, sign)
+    local target = tbl[key]
+    if not target then
+        target = new_counts()
+        tbl[key] = target
+    end
+
+    for field, value in pairs(counts) do
+        target[field] = target[field] + sign * value
+    end
+
+    if target.total == 0 then
+        tbl[key] = nil
+    end
+end
+
+-- Order diagnostics by position so duplicate identities get stable occurrence numbers
+local function compare_positions(a, b)
+    if a.lnum ~= b.lnum then
+        return a.lnum < b.lnum
+    end
+    if a.col ~= b.col then
+        return a.col < b.col
+    end
+    if (a.end_lnum or 0) ~= (b.end_lnum or 0) then
+        return (a.end_lnum or 0) < (b.end_lnum or 0)
+    end
+    if (a.end_col or 0) ~= (b.end_col or 0) then
+        return (a.end_col or 0) < (b.end_col or 0)
+    end
+    return (a.severity or 0) < (b.severity or 0)
+end
+
+-- Build the delta snapshot of a buffer: identity key -> { signature, diagnostic }
+-- Identity is (buffer, source, code, message, occurrence); position and severity
+-- form the signature, so a diagnostic that moves is reported as changed
+-- Also returns the formatted diagnostics in position order
+local function build_snapshot(bufnr, diagnostics)
+    local format_diagnostic = require("mcp-diagnostics.shared.diagnostics").format_diagnostic
+
+    table.sort(diagnostics, compare_positions)
+
+    local snapshot = {}
+    local formatted = {}
+    local occurrences = {}
+    for _, diag in ipairs(diagnostics) do
+        local identity = table.concat({
+            bufnr,
+            tostring(diag.source or ""),
+            tostring(diag.code or ""),
+            diag.message or ""
+        }, "\0")
+        local occurrence = (occurrences[identity] or 0) + 1
+        occurrences[identity] = occurrence
+
+        diag.bufnr = bufnr
+        local record = {
+            signature = table.concat({ diag.lnum, diag.col, diag.end_lnum or "", diag.end_col or "", diag.severity or "" }, ":"),
+            diagnostic = format_diagnostic(diag)
+        }
+        snapshot[identity .. "\0" .. occurrence] = record
+        table.insert(formatted, record.diagnostic)
+    end
+
+    return snapshot, formatted
+end
+
+-- Symbol named in a diagnostic message ('name' or `name`), if any
+local function extract_symbol(message)
+    return message:match("'([^']+)'") or message:match("`([^`]+)`")
+end
+
+-- Group a buffer's formatted diagnostics by symbol, message and code
+local function build_groups(formatted)
+    local groups = { by_symbol = {}, by_message = {}, by_code = {} }
+
+    local function add(kind, key, diag)
+        local list = groups[kind][key]
+        if not list then
+            list = {}
+            groups[kind][key] = list
+        end
+        table.insert(list, diag)
+    end
+
+    for _, diag in ipairs(formatted) do
+        local message = diag.message or ""
+        local symbol = extract_symbol(message)
+        if symbol then
+            add("by_symbol", symbol, diag)
+        end
+        add("by_message", message, diag)
+        if diag.code ~= "" then
+            add("by_code", tostring(diag.code), diag)
+        end
+    end
+
+    return groups
+end
+
+-- Build the contribution of a single buffer from its current diagnostics
+local function build_entry(bufnr)
+    local diagnostics = vim.diagnostic.get(bufnr)
+    if #diagnostics == 0 then
+        return nil
+    end
+
+    local name = vim.api.nvim_buf_get_name(bufnr)
+    local snapshot, formatted = build_snapshot(bufnr, diagnostics)
+    local entry = {
+        filename = name ~= "" and name or nil,
+        counts = new_counts(),
+        by_source = {},
+        by_code = {},
+        patterns = {},
+        source_analysis = {},
+        snapshot = snapshot,
+        groups = build_groups(formatted)
+    }
+
+    for _, diag in ipairs(diagnostics) do
+        local field = SEVERITY_FIELDS[diag.severity]
+        local counts = entry.counts
+        counts.total = counts.total + 1
+        if field then
+            counts[field] = counts[field] + 1
+        end
+
+        -- Count by source
+        local source = diag.source or "Unknown"
+        entry.by_source[source] = (entry.by_source[source] or 0) + 1
+
+        -- Count by code
+        if diag.code then
+            local code = tostring(diag.code)
+            entry.by_code[code] = (entry.by_code[code] or 0) + 1
+        end
+
+        -- Count error patterns by code or message prefix
+        local pattern = tostring(diag.code or (diag.message and diag.message:match("^[^:]+")) or "unknown")
+        entry.patterns[pattern] = (entry.patterns[pattern] or 0) + 1
+
+        -- Severity breakdown per source
+        local analysis = entry.source_analysis[source]
+        if not analysis then
+            analysis = new_counts()
+            entry.source_analysis[source] = analysis
+        end
+        analysis.total = analysis.total + 1
+        if field then
+            analysis[field] = analysis[field] + 1
+        end
+    end
+
+    return entry
+end
+
+-- Drop the oldest generations once the change log exceeds its configured size
+local function trim_change_log()
+    local max_entries = require("mcp-diagnostics.shared.config").get_diagnostics_delta_history()
+    if #change_log <= max_entries then
+        return
+    end
+
+    -- Never split a generation, so deltas are either complete or a reset
+    local cut = #change_log - max_entries
+    local cut_generation = change_log[cut].generation
+    while change_log[cut + 1] and change_log[cut + 1].generation == cut_generation do
+        cut = cut + 1
+    end
+
+    change_log = vim.list_slice(change_log, cut + 1)
+    log_floor = cut_generation
+end
+
+-- Record added/removed/changed events between two snapshots of a buffer
+local function record_changes(old_snapshot, new_snapshot)
+    old_snapshot = old_snapshot or {}
+    new_snapshot = new_snapshot or {}
+
+    local events = {}
+    for key, record in pairs(new_snapshot) do
+        local old_record = old_snapshot[key]
+        if not old_record then
+            table.insert(events, { kind = "added", key = key, diagnostic = record.diagnostic })
+        elseif old_record.signature ~= record.signature then
+            table.insert(events, { kind = "changed", key = key, diagnostic = record.diagnostic })
+        end
+    end
+    for key, old_record in pairs(old_snapshot) do
+        if not new_snapshot[key] then
+            table.insert(events, { kind = "removed", key = key, diagnostic = old_record.diagnostic })
+        end
+    end
+
+    if #events == 0 then
+        return
+    end
+
+    generation = generation + 1
+    for _, event in ipairs(events) do
+        event.generation = generation
+        table.insert(change_log, event)
+    end
+end
+
+-- Add (sign = 1) or remove (sign = -1) a buffer entry from the totals
+local function apply(entry, sign)
+    for field, value in pairs(entry.counts) do
+        totals[field] = totals[field] + sign * value
+    end
+
+    if entry.filename then
+        add_counts(totals.by_file, entry.filename, entry.counts, sign)
+        if score_weights then
+            update_score(entry.filename)
+        end
+    end
+
+    for source, count in pairs(entry.by_source) do
+        add_count(totals.by_source, source, sign * count)
+    end
+
+    for code, count in pairs(entry.by_code) do
+        add_count(totals.by_code, code, sign * count)
+    end
+
+    for pattern, count in pairs(entry.patterns) do
+        add_count(totals.patterns, pattern, sign * count)
+    end
+
+    for source, counts in pairs(entry.source_analysis) do
+        add_counts(totals.source_analysis, source, counts, sign)
+    end
+end
+
+-- Mark a buffer as needing a rescan on the next query
+function M.mark_dirty(bufnr)
+    dirty[bufnr] = true
+end
+
+-- Rescan all dirty buffers and fold the changes into the totals
+function M.flush()
+    if not next(dirty) then
+        return
+    end
+
+    local pending = dirty
+    dirty = {}
+    correlations = nil
+
+    for bufnr in pairs(pending) do
+        local old_entry = entries[bufnr]
+        if old_entry then
+            apply(old_entry, -1)
+        end
+
+        local new_entry = vim.api.nvim_buf_is_valid(bufnr) and build_entry(bufnr) or nil
+        entries[bufnr] = new_entry
+        if new_entry then
+            apply(new_entry, 1)
+        end
+
+        record_changes(old_entry and old_entry.snapshot, new_entry and new_entry.snapshot)
+    end
+
+    trim_change_log()
+end
+
+-- Drop all state and rescan every buffer on the next query
+-- The generation is bumped past all history, so clients holding an older one resync
+function M.rebuild()
+    entries = {}
+    dirty = {}
+    change_log = {}
+    generation = generation + 1
+    log_floor = generation
+    reset_totals()
+    scores = {}
+    correlations = nil
+
+    for _, bufnr in ipairs(vim.api.nvim_list_bufs()) do
+        dirty[bufnr] = true
+    end
+end
+
+-- Get diagnostic summary by severity, file and source
+function M.get_summary()
+    M.flush()
+
+    local summary = {
+        generation = generation,
+        total = totals.total,
+        errors = totals.errors,
+        warnings = totals.warnings,
+        info = totals.info,
+        hints = totals.hints,
+        files = 0,
+        byFile = {},
+        bySource = vim.deepcopy(totals.by_source)
+    }
+
+    for filename, counts in pairs(totals.by_file) do
+        summary.files = summary.files + 1
+        summary.byFile[filename] = {
+            errors = counts.errors,
+            warnings = counts.warnings,
+            info = counts.info,
+            hints = counts.hints
+        }
+    end
+
+    return summary
+end
+
+-- Get per-file severity counts (read-only view, do not modify)
+function M.get_file_counts()
+    M.flush()
+    return totals.by_file
+end
+
+-- Pick up configured weights, rescoring every file only when they changed
+local function refresh_scores()
+    local weights = require("mcp-diagnostics.shared.config").get_hotspot_weights()
+    if score_weights and vim.deep_equal(weights, score_weights) then
+        return
+    end
+
+    score_weights = weights
+    scores = {}
+    for filename in pairs(totals.by_file) do
+        update_score(filename)
+    end
+end
+
+-- True when (score_a, file_a) ranks above (score_b, file_b)
+-- Ties are broken by filename so the ranking is stable
+local function ranks_above(score_a, file_a, score_b, file_b)
+    if score_a ~= score_b then
+        return score_a > score_b
+    end
+    return file_a < file_b
+end
+
+-- Restore the min-heap property (lowest-ranked file at heap[1]) below position i
+local function sift_down(heap, i)
+    local size = #heap
+    while true do
+        local lowest = i
+        for child = 2 * i, math.min(2 * i + 1, size) do
+            if ranks_above(heap[lowest].score, heap[lowest].filename, heap[child].score, heap[child].filename) then
+                lowest = child
+            end
+        end
+        if lowest == i then
+            return
+        end
+        heap[i], heap[lowest] = heap[lowest], heap[i]
+        i = lowest
+    end
+end
+
+-- Restore the min-heap property above position i
+local function sift_up(heap, i)
+    while i > 1 do
+        local parent = math.floor(i / 2)
+        if not ranks_above(heap[parent].score, heap[parent].filename, heap[i].score, heap[i].filename) then
+            return
+        end
+        heap[i], heap[parent] = heap[parent], heap[i]
+        i = parent
+    end
+end
+
+-- Get the limit highest-scoring files, best first
+-- Uses a bounded heap, so the cost is O(files * log(limit)) with no full sort
+function M.get_hotspots(limit)
+    M.flush()
+    refresh_scores()
+
+    local heap = {}
+    if limit < 1 then
+        return heap
+    end
+
+    for filename, score in pairs(scores) do
+        if #heap < limit then
+            table.insert(heap, { filename = filename, score = score })
+            sift_up(heap, #heap)
+        elseif ranks_above(score, filename, heap[1].score, heap[1].filename) then
+            heap[1] = { filename = filename, score = score }
+            sift_down(heap, 1)
+        end
+    end
+
+    table.sort(heap, function(a, b)
+        return ranks_above(a.score, a.filename, b.score, b.filename)
+    end)
+
+    for _, item in ipairs(heap) do
+        local counts = totals.by_file[item.filename]
+        item.errors = counts.errors
+        item.warnings = counts.warnings
+        item.info = counts.info
+        item.hints = counts.hints
+        item.total = counts.total
+    end
+
+    return heap
+end
+
+-- Get diagnostic counts keyed by code
+function M.get_code_counts()
+    M.flush()
+    return vim.deepcopy(totals.by_code)
+end
+
+-- Get diagnostic counts keyed by code or message prefix
+function M.get_error_patterns()
+    M.flush()
+    return vim.deepcopy(totals.patterns)
+end
+
+-- Get severity breakdown per diagnostic source
+function M.get_source_analysis()
+    M.flush()
+    return vim.deepcopy(totals.source_analysis)
+end
+
+-- Get diagnostics grouped by symbol named in the message, exact message and code
+-- Groups are kept per buffer and only the merge is redone after changes; buffers
+-- are merged in bufnr order so group members keep a stable order
+-- (read-only view, do not modify)
+function M.get_correlations()
+    M.flush()
+    if correlations then
+        return correlations
+    end
+
+    local bufnrs = vim.tbl_keys(entries)
+    table.sort(bufnrs)
+
+    correlations = { by_symbol = {}, by_message = {}, by_code = {} }
+    for _, bufnr in ipairs(bufnrs) do
+        for kind, groups in pairs(entries[bufnr].groups) do
+            local merged = correlations[kind]
+            for key, diags in pairs(groups) do
+                local list = merged[key]
+                if not list then
+                    list = {}
+                    merged[key] = list
+                end
+                vim.list_extend(list, diags)
+            end
+        end
+    end
+
+    return correlations
+end
+
+-- Get the current diagnostics generation
+function M.get_generation()
+    M.flush()
+    return generation
+end
+
+-- Find the first change log position with a generation above since
+local function find_log_start(since)
+    local low, high = 1, #change_log + 1
+    while low < high do
+        local mid = math.floor((low + high) / 2)
+        if change_log[mid].generation > since then
+            high = mid
+        else
+            low = mid + 1
+        end
+    end
+    return low
+end
+
+-- Get diagnostics added, removed and changed since a client-supplied generation
+-- If since is older than the retained history (or unknown), reset is true and
+-- added holds the complete current set so the client can resync
+function M.get_delta(since)
+    M.flush()
+    since = since or 0
+
+    local delta = {
+        since = since,
+        generation = generation,
+        reset = false,
+        added = {},
+        removed = {},
+        changed = {}
+    }
+
+    if since < log_floor or since > generation then
+        delta.reset = true
+        for _, entry in pairs(entries) do
+            for _, record in pairs(entry.snapshot) do
+                table.insert(delta.added, record.diagnostic)
+            end
+        end
+        return delta
+    end
+
+    -- Collapse the events per diagnostic into its net change since the generation
+    local states = {}
+    local order = {}
+    for i = find_log_start(since), #change_log do
+        local event = change_log[i]
+        local state = states[event.key]
+        if not state then
+            state = { existed = event.kind ~= "added" }
+            states[event.key] = state
+            table.insert(order, event.key)
+        end
+        state.exists = event.kind ~= "removed"
+        state.diagnostic = event.diagnostic
+    end
+
+    for _, key in ipairs(order) do
+        local state = states[key]
+        if state.exists and not state.existed then
+            table.insert(delta.added, state.diagnostic)
+        elseif state.existed and not state.exists then
+            table.insert(delta.removed, state.diagnostic)
+        elseif state.existed and state.exists then
+            table.insert(delta.changed, state.diagnostic)
+        end
+    end
+
+    return delta
+end
+
+-- Get index bookkeeping information for health checks and debugging
+function M.get_index_status()
+    return {
+        indexed_buffers = vim.tbl_count(entries),
+        dirty_buffers = vim.tbl_count(dirty),
+        total = totals.total,
+        generation = generation,
+        change_log_size = #change_log
+    }
+end
+
+M.rebuild()
+
+local augroup = vim.api.nvim_create_augroup("MCPDiagnosticsIndex", { clear = true })
+
+vim.api.nvim_create_autocmd("DiagnosticChanged", {
+    group = augroup,
+    callback = function(args)
+        M.mark_dirty(args.buf)
+    end,
+    desc = "Track changed buffers for the MCP diagnostics index"
+})
+
+vim.api.nvim_create_autocmd({ "BufFilePost", "BufWipeout" }, {
+    group = augroup,
+    callback = function(args)
+        M.mark_dirty(args.buf)
+    end,
+    desc = "Reindex renamed or wiped buffers for the MCP diagnostics index"
+})
+
+return M
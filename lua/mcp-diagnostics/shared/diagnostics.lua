@@ -3,6 +3,7 @@
 -- FINAL FIXED VERSION: Preserves bufnr field in diagnostics
 
 local config = require("mcp-diagnostics.shared.config")
+local diagnostic_index = require("mcp-diagnostics.shared.diagnostic_index")
 local M = {}
 
 -- Convert severity number to text
@@ -27,38 +28,143 @@ local function text_to_severity(severity_text)
     return map[severity_text]
 end
 
+-- Buffer names keyed by bufnr, so formatting N diagnostics costs one API call per buffer
+local buffer_names = {}
+
 -- Get buffer name safely
 local function get_buffer_name(bufnr)
-    local name = vim.api.nvim_buf_get_name(bufnr)
+    local name = buffer_names[bufnr]
+    if name then
+        return name
+    end
+
+    name = vim.api.nvim_buf_get_name(bufnr)
     if name == "" then
-        return "[No Name]"
+        name = "[No Name]"
     end
+    buffer_names[bufnr] = name
     return name
 end
 
--- Filter diagnostics by criteria
-function M.filter_diagnostics(diagnostics, severity_filter, source_filter)
-    if not severity_filter and not source_filter then
-        return diagnostics
+-- Drop cached names when a buffer is renamed or goes away
+vim.api.nvim_create_autocmd({ "BufFilePost", "BufDelete", "BufWipeout" }, {
+    group = vim.api.nvim_create_augroup("MCPDiagnosticsBufferNames", { clear = true }),
+    callback = function(args)
+        buffer_names[args.buf] = nil
+    end
+})
+
+-- Normalize a severity filter into a form vim.diagnostic.get accepts
+-- Accepts a single value ("error" or 1), a list ({ "error", "warn" }) or a
+-- range ({ min = "warn" } = warnings and anything more severe)
+local function normalize_severity(severity_filter)
+    if severity_filter == nil then
+        return nil
     end
 
-    local filtered = {}
-    local severity_num = severity_filter and text_to_severity(severity_filter)
+    local function to_number(value)
+        if type(value) == "number" then
+            return value
+        end
+        return text_to_severity(value)
+    end
 
-    for _, diag in ipairs(diagnostics) do
-        local include = true
+    if type(severity_filter) ~= "table" then
+        return to_number(severity_filter)
+    end
+
+    if severity_filter.min or severity_filter.max then
+        return {
+            min = severity_filter.min and to_number(severity_filter.min),
+            max = severity_filter.max and to_number(severity_filter.max)
+        }
+    end
 
-        -- Filter by severity
-        if severity_num and diag.severity ~= severity_num then
-            include = false
+    local severities = {}
+    for _, value in ipairs(severity_filter) do
+        local severity = to_number(value)
+        if severity then
+            table.insert(severities, severity)
         end
+    end
+    if #severities == 0 then
+        return nil
+    end
+    return #severities == 1 and severities[1] or severities
+end
 
-        -- Filter by source
-        if include and source_filter and diag.source ~= source_filter then
-            include = false
+-- Normalize a namespace filter (id, name or list of either) into namespace ids
+local function normalize_namespace(namespace_filter)
+    if namespace_filter == nil then
+        return nil
+    end
+
+    local values = type(namespace_filter) == "table" and namespace_filter or { namespace_filter }
+    local namespaces = vim.api.nvim_get_namespaces()
+    local ids = {}
+    for _, value in ipairs(values) do
+        local id = type(value) == "number" and value or namespaces[value]
+        if id then
+            table.insert(ids, id)
         end
+    end
+    if #ids == 0 then
+        return nil
+    end
+    return #ids == 1 and ids[1] or ids
+end
+
+-- Check a severity number against a normalized severity filter
+local function severity_matches(severity_filter, severity)
+    if type(severity_filter) == "number" then
+        return severity == severity_filter
+    end
+    if severity_filter.min or severity_filter.max then
+        -- Lower numbers are more severe, so "min" is the numeric upper bound
+        return severity <= (severity_filter.min or vim.diagnostic.severity.HINT)
+            and severity >= (severity_filter.max or vim.diagnostic.severity.ERROR)
+    end
+    return vim.tbl_contains(severity_filter, severity)
+end
+
+-- Build a lookup set from a single value or a list of values
+local function to_set(value)
+    if value == nil then
+        return nil
+    end
+
+    local set = {}
+    for _, item in ipairs(type(value) == "table" and value or { value }) do
+        set[tostring(item)] = true
+    end
+    return next(set) and set or nil
+end
 
-        if include then
+-- Build the options table for vim.diagnostic.get
+-- Severity and namespace are matched natively so non-matching diagnostics are never copied
+local function build_get_opts(severity_filter, namespace_filter)
+    return {
+        severity = normalize_severity(severity_filter),
+        namespace = normalize_namespace(namespace_filter)
+    }
+end
+
+-- Filter diagnostics by criteria
+-- Each filter takes a single value or a list of values, severity also takes a { min, max } range
+function M.filter_diagnostics(diagnostics, severity_filter, source_filter, code_filter)
+    local severity = normalize_severity(severity_filter)
+    local sources = to_set(source_filter)
+    local codes = to_set(code_filter)
+
+    if not severity and not sources and not codes then
+        return diagnostics
+    end
+
+    local filtered = {}
+    for _, diag in ipairs(diagnostics) do
+        if (not severity or severity_matches(severity, diag.severity))
+            and (not sources or (diag.source and sources[diag.source]))
+            and (not codes or (diag.code ~= nil and codes[tostring(diag.code)])) then
             table.insert(filtered, diag)
         end
     end
@@ -66,6 +172,36 @@ function M.filter_diagnostics(diagnostics, severity_filter, source_filter)
     return filtered
 end
 
+-- Build filter arguments from tool parameters
+-- Multi-value parameters take precedence over their single-value counterparts:
+-- severities > min_severity > severity, sources > source
+-- Returns severity_filter, source_filter and an opts table for get_all_diagnostics/get_diagnostics_page
+function M.filters_from_params(params)
+    params = params or {}
+
+    local severity_filter = params.severity
+    if params.min_severity then
+        severity_filter = { min = params.min_severity }
+    end
+    if params.severities and #params.severities > 0 then
+        severity_filter = params.severities
+    end
+
+    local source_filter = params.source
+    if params.sources and #params.sources > 0 then
+        source_filter = params.sources
+    end
+
+    return severity_filter, source_filter, {
+        code = params.codes,
+        namespace = params.namespace,
+        group_by = params.group_by,
+        format = params.format,
+        limit = params.limit,
+        cursor = params.cursor
+    }
+end
+
 -- Format diagnostic for output
 function M.format_diagnostic(diag)
     local bufnr = diag.bufnr
@@ -86,10 +222,104 @@ function M.format_diagnostic(diag)
     }
 end
 
--- Get all diagnostics with optional filtering - FINAL FIXED VERSION
-function M.get_all_diagnostics(files, severity_filter, source_filter)
-    config.log_debug("Getting diagnostics", "[Shared Diagnostics Final]")
+-- Group formatted diagnostics under their file, in first-seen order
+-- Each group is { filename, bufnr, diagnostics } so the filename appears once per file
+function M.group_by_file(formatted)
+    local groups = {}
+    local by_buffer = {}
+
+    for _, diag in ipairs(formatted) do
+        local key = diag.bufnr or diag.filename
+        local group = by_buffer[key]
+        if not group then
+            group = { filename = diag.filename, bufnr = diag.bufnr, diagnostics = {} }
+            by_buffer[key] = group
+            table.insert(groups, group)
+        end
+
+        diag.filename = nil
+        diag.bufnr = nil
+        table.insert(group.diagnostics, diag)
+    end
+
+    return groups
+end
+
+-- Convert formatted diagnostics into parallel column arrays
+-- Filenames, sources and codes are stored once in string tables and the
+-- file/source/code columns hold 0-based indexes into them
+-- severityText is omitted, it is derivable from the severity column
+function M.to_columnar(formatted)
+    local columnar = {
+        format = "columnar",
+        count = #formatted,
+        files = {},
+        bufnrs = {},
+        sources = {},
+        codes = {},
+        columns = {
+            file = {},
+            lnum = {},
+            col = {},
+            end_lnum = {},
+            end_col = {},
+            severity = {},
+            source = {},
+            code = {},
+            message = {}
+        }
+    }
+
+    local columns = columnar.columns
+    local file_index, source_index, code_index = {}, {}, {}
+
+    -- Return the 0-based index of value in strings, appending it if new
+    local function intern(strings, index, key, value)
+        local i = index[key]
+        if not i then
+            table.insert(strings, value)
+            i = #strings - 1
+            index[key] = i
+        end
+        return i
+    end
 
+    for n, diag in ipairs(formatted) do
+        local file = file_index[diag.filename]
+        if not file then
+            file = intern(columnar.files, file_index, diag.filename, diag.filename)
+            table.insert(columnar.bufnrs, diag.bufnr or -1)
+        end
+
+        columns.file[n] = file
+        columns.lnum[n] = diag.lnum
+        columns.col[n] = diag.col
+        columns.end_lnum[n] = diag.end_lnum or diag.lnum
+        columns.end_col[n] = diag.end_col or diag.col
+        columns.severity[n] = diag.severity
+        columns.source[n] = intern(columnar.sources, source_index, diag.source, diag.source)
+        columns.code[n] = intern(columnar.codes, code_index, tostring(diag.code), diag.code)
+        columns.message[n] = diag.message
+    end
+
+    return columnar
+end
+
+-- Shape formatted diagnostics for output
+-- opts.format = "columnar" takes precedence over opts.group_by = "file"
+local function shape_output(formatted, opts)
+    if opts.format == "columnar" then
+        return M.to_columnar(formatted)
+    end
+    if opts.group_by == "file" then
+        return M.group_by_file(formatted)
+    end
+    return formatted
+end
+
+-- Collect raw diagnostics for the given files (or all buffers)
+-- get_opts is passed straight to vim.diagnostic.get (see build_get_opts)
+local function collect_diagnostics(files, get_opts)
     local all_diagnostics
 
     if files and #files > 0 then
@@ -101,7 +331,7 @@ function M.get_all_diagnostics(files, severity_filter, source_filter)
             -- Use ensure_file_loaded like LSP tools do for consistency
             local bufnr, loaded, err = lsp.ensure_file_loaded(file)
             if loaded then
-                local file_diagnostics = vim.diagnostic.get(bufnr)
+                local file_diagnostics = vim.diagnostic.get(bufnr, get_opts)
                 
                 -- CRITICAL FIX: Add bufnr field to each diagnostic
                 for _, diag in ipairs(file_diagnostics) do
@@ -119,11 +349,57 @@ function M.get_all_diagnostics(files, severity_filter, source_filter)
         end
     else
         -- Get all diagnostics from all buffers
-        all_diagnostics = vim.diagnostic.get()
+        all_diagnostics = vim.diagnostic.get(nil, get_opts)
     end
 
-    -- Filter diagnostics
-    local filtered = M.filter_diagnostics(all_diagnostics, severity_filter, source_filter)
+    return all_diagnostics
+end
+
+-- Sort diagnostics in a deterministic (file, lnum, col) order
+-- Remaining fields break ties so pages stay stable between calls
+local function sort_diagnostics(diagnostics)
+    local names = {}
+    for _, diag in ipairs(diagnostics) do
+        local bufnr = diag.bufnr or 0
+        if not names[bufnr] then
+            names[bufnr] = get_buffer_name(bufnr)
+        end
+    end
+
+    table.sort(diagnostics, function(a, b)
+        local a_name, b_name = names[a.bufnr or 0], names[b.bufnr or 0]
+        if a_name ~= b_name then
+            return a_name < b_name
+        end
+        if a.lnum ~= b.lnum then
+            return a.lnum < b.lnum
+        end
+        if a.col ~= b.col then
+            return a.col < b.col
+        end
+        if a.severity ~= b.severity then
+            return (a.severity or 0) < (b.severity or 0)
+        end
+        return (a.message or "") < (b.message or "")
+    end)
+
+    return diagnostics
+end
+
+-- Get all diagnostics with optional filtering - FINAL FIXED VERSION
+-- opts.code: diagnostic code or list of codes
+-- opts.namespace: namespace id/name or list of them
+-- opts.group_by: "file" to return group_by_file output instead of a flat list
+-- opts.format: "columnar" to return to_columnar output instead of a flat list
+function M.get_all_diagnostics(files, severity_filter, source_filter, opts)
+    opts = opts or {}
+    config.log_debug("Getting diagnostics", "[Shared Diagnostics Final]")
+
+    -- Severity and namespace are filtered by vim.diagnostic.get itself
+    local all_diagnostics = collect_diagnostics(files, build_get_opts(severity_filter, opts.namespace))
+
+    -- Source and code have no native filter
+    local filtered = M.filter_diagnostics(all_diagnostics, nil, source_filter, opts.code)
 
     -- Format for output
     local formatted = {}
@@ -133,72 +409,56 @@ function M.get_all_diagnostics(files, severity_filter, source_filter)
 
     config.log_debug(string.format("Found %d diagnostics (filtered from %d total)", 
         #formatted, #all_diagnostics), "[Shared Diagnostics Final]")
-    return formatted
-end
 
--- Get diagnostic summary by severity and file
-function M.get_diagnostic_summary()
-    local all_diagnostics = vim.diagnostic.get()
-
-    local summary = {
-        total = #all_diagnostics,
-        errors = 0,
-        warnings = 0,
-        info = 0,
-        hints = 0,
-        files = 0,
-        byFile = {},
-        bySource = {}
-    }
+    return shape_output(formatted, opts)
+end
 
-    local unique_files = {}
-
-    for _, diag in ipairs(all_diagnostics) do
-        -- Count by severity
-        if diag.severity == vim.diagnostic.severity.ERROR then
-            summary.errors = summary.errors + 1
-        elseif diag.severity == vim.diagnostic.severity.WARN then
-            summary.warnings = summary.warnings + 1
-        elseif diag.severity == vim.diagnostic.severity.INFO then
-            summary.info = summary.info + 1
-        elseif diag.severity == vim.diagnostic.severity.HINT then
-            summary.hints = summary.hints + 1
+-- Get one page of diagnostics in stable (file, lnum, col) order
+-- opts.limit: page size (defaults to the configured diagnostics_page_size)
+-- opts.cursor: opaque next_cursor value returned by the previous page
+-- opts.code, opts.namespace, opts.group_by, opts.format: as for get_all_diagnostics
+-- Only the returned page is formatted, so serialization cost scales with limit
+function M.get_diagnostics_page(files, severity_filter, source_filter, opts)
+    opts = opts or {}
+
+    local offset = 0
+    if opts.cursor and opts.cursor ~= "" then
+        offset = tonumber(opts.cursor)
+        if not offset or offset < 0 or offset % 1 ~= 0 then
+            return nil, "Invalid cursor: " .. tostring(opts.cursor)
         end
+    end
 
-        -- Count by file
-        local filename = get_buffer_name(diag.bufnr or 0)
-        if filename ~= "[No Name]" then
-            unique_files[filename] = true
-
-            if not summary.byFile[filename] then
-                summary.byFile[filename] = {
-                    errors = 0,
-                    warnings = 0,
-                    info = 0,
-                    hints = 0
-                }
-            end
+    local limit = opts.limit or config.get_diagnostics_page_size()
+    if limit < 1 then
+        return nil, "Invalid limit: must be at least 1"
+    end
 
-            if diag.severity == vim.diagnostic.severity.ERROR then
-                summary.byFile[filename].errors = summary.byFile[filename].errors + 1
-            elseif diag.severity == vim.diagnostic.severity.WARN then
-                summary.byFile[filename].warnings = summary.byFile[filename].warnings + 1
-            elseif diag.severity == vim.diagnostic.severity.INFO then
-                summary.byFile[filename].info = summary.byFile[filename].info + 1
-            elseif diag.severity == vim.diagnostic.severity.HINT then
-                summary.byFile[filename].hints = summary.byFile[filename].hints + 1
-            end
-        end
+    local all_diagnostics = collect_diagnostics(files, build_get_opts(severity_filter, opts.namespace))
+    local filtered = M.filter_diagnostics(all_diagnostics, nil, source_filter, opts.code)
+    sort_diagnostics(filtered)
 
-        -- Count by source
-        local source = diag.source or "Unknown"
-        if not summary.bySource[source] then
-            summary.bySource[source] = 0
-        end
-        summary.bySource[source] = summary.bySource[source] + 1
+    local page = {}
+    local last = math.min(offset + limit, #filtered)
+    for i = offset + 1, last do
+        table.insert(page, M.format_diagnostic(filtered[i]))
     end
 
-    summary.files = vim.tbl_count(unique_files)
+    config.log_debug(string.format("Diagnostics page: %d-%d of %d", offset, last, #filtered),
+        "[Shared Diagnostics Final]")
+
+    return {
+        diagnostics = shape_output(page, opts),
+        total = #filtered,
+        cursor = tostring(offset),
+        next_cursor = last < #filtered and tostring(last) or nil
+    }
+end
+
+-- Get diagnostic summary by severity and file
+-- Served from the incremental index, only buffers changed since the last call are rescanned
+function M.get_diagnostic_summary()
+    local summary = diagnostic_index.get_summary()
 
     config.log_debug(string.format("Diagnostic summary: %d total (%d errors, %d warnings)",
         summary.total, summary.errors, summary.warnings), "[Shared Diagnostics Final]")
@@ -206,6 +466,18 @@ function M.get_diagnostic_summary()
     return summary
 end
 
+-- Get diagnostics added, removed and changed since a generation
+-- The current generation is reported by get_diagnostic_summary and by every delta
+function M.get_diagnostics_delta(since_generation)
+    local delta = diagnostic_index.get_delta(since_generation)
+
+    config.log_debug(string.format("Diagnostics delta %d -> %d: +%d -%d ~%d%s",
+        delta.since, delta.generation, #delta.added, #delta.removed, #delta.changed,
+        delta.reset and " (reset)" or ""), "[Shared Diagnostics Final]")
+
+    return delta
+end
+
 -- Get diagnostics for a specific severity level
 function M.get_diagnostics_by_severity(severity_text)
     return M.get_all_diagnostics(nil, severity_text, nil)
@@ -217,31 +489,20 @@ function M.has_diagnostics(severity_filter)
     return #diagnostics > 0
 end
 
--- Get the most problematic files (by error count)
+-- Get the most problematic files (by weighted severity score)
+-- Weights come from config.get_hotspot_weights, ranking is done by the index
 function M.get_problematic_files(limit)
     limit = limit or 10
-    local summary = M.get_diagnostic_summary()
-
-    local files = {}
-    for filename, counts in pairs(summary.byFile) do
-        table.insert(files, {
-            filename = filename,
-            errors = counts.errors,
-            warnings = counts.warnings,
-            total = counts.errors + counts.warnings + counts.info + counts.hints,
-            score = counts.errors * 3 + counts.warnings * 2 + counts.info + counts.hints * 0.5
-        })
-    end
 
-    -- Sort by score (most problematic first)
-    table.sort(files, function(a, b)
-        return a.score > b.score
-    end)
-
-    -- Return top N files
     local result = {}
-    for i = 1, math.min(limit, #files) do
-        table.insert(result, files[i])
+    for _, file in ipairs(diagnostic_index.get_hotspots(limit)) do
+        table.insert(result, {
+            filename = file.filename,
+            errors = file.errors,
+            warnings = file.warnings,
+            total = file.total,
+            score = file.score
+        })
     end
 
     return result
@@ -249,49 +510,12 @@ end
 
 -- Get diagnostic statistics for analysis
 function M.get_diagnostic_stats()
-    local summary = M.get_diagnostic_summary()
-    local all_diagnostics = vim.diagnostic.get()
-
-    -- Analyze error patterns
-    local error_patterns = {}
-    local source_analysis = {}
-
-    for _, diag in ipairs(all_diagnostics) do
-        -- Count error patterns by code or message prefix
-        local pattern = diag.code or (diag.message and diag.message:match("^[^:]+")) or "unknown"
-        pattern = tostring(pattern)
-        error_patterns[pattern] = (error_patterns[pattern] or 0) + 1
-
-        -- Analyze by source
-        local source = diag.source or "Unknown"
-        if not source_analysis[source] then
-            source_analysis[source] = {
-                errors = 0,
-                warnings = 0,
-                info = 0,
-                hints = 0,
-                total = 0
-            }
-        end
-
-        source_analysis[source].total = source_analysis[source].total + 1
-        if diag.severity == vim.diagnostic.severity.ERROR then
-            source_analysis[source].errors = source_analysis[source].errors + 1
-        elseif diag.severity == vim.diagnostic.severity.WARN then
-            source_analysis[source].warnings = source_analysis[source].warnings + 1
-        elseif diag.severity == vim.diagnostic.severity.INFO then
-            source_analysis[source].info = source_analysis[source].info + 1
-        elseif diag.severity == vim.diagnostic.severity.HINT then
-            source_analysis[source].hints = source_analysis[source].hints + 1
-        end
-    end
-
     return {
-        summary = summary,
-        error_patterns = error_patterns,
-        source_analysis = source_analysis,
+        summary = M.get_diagnostic_summary(),
+        error_patterns = diagnostic_index.get_error_patterns(),
+        source_analysis = diagnostic_index.get_source_analysis(),
         problematic_files = M.get_problematic_files(10)
     }
 end
 
-return M
\ No newline at end of file
+return M
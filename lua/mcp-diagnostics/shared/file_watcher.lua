@@ -1,186 +1,283 @@
 -- Shared file watcher for MCP Diagnostics
 -- Provides unified file auto-reload functionality for both mcphub and server modes
+-- Watches parent directories (one fs_event per directory, not per file) and
+-- coalesces events within a debounce window into one batched unified refresh
+-- A file counts as changed when its (mtime with nanoseconds, size, inode)
+-- signature changes and, with file_watch_content_hash, its content hash too
 
 local config = require("mcp-diagnostics.shared.config")
+local buffers = require("mcp-diagnostics.shared.buffers")
 local M = {}
 
 -- Global state for file watchers
+-- Watched files: filepath -> { bufnr, dir, name }
 local file_watchers = {}
-local buffer_file_times = {}
+local file_signatures = {}
 
--- Get file modification time
-local function get_file_mtime(filepath)
+-- Directory watches: dir -> { handle, files = { [basename] = filepath } }
+-- Watching the directory also survives editors that save by renaming a temp file
+local dir_watchers = {}
+
+-- Files with events in the current debounce window
+local pending_changes = {}
+local flush_scheduled = false
+
+-- Hash of a file's content, or nil if it cannot be read
+local function hash_file(filepath, size)
+  local fd = vim.loop.fs_open(filepath, "r", 438)
+  if not fd then
+    return nil
+  end
+  local data = vim.loop.fs_read(fd, size, 0)
+  vim.loop.fs_close(fd)
+  return data and vim.fn.sha256(data) or nil
+end
+
+-- Change signature fields taken from a stat result
+local function signature_from_stat(stat)
+  return {
+    mtime_sec = stat.mtime.sec,
+    mtime_nsec = stat.mtime.nsec or 0,
+    size = stat.size,
+    ino = stat.ino
+  }
+end
+
+-- Get the change signature of a file, or nil if it does not exist
+-- The content hash is only computed when with_hash is set
+local function get_file_signature(filepath, with_hash)
   local stat = vim.loop.fs_stat(filepath)
-  return stat and stat.mtime.sec or 0
+  if not stat then
+    return nil
+  end
+
+  local signature = signature_from_stat(stat)
+  if with_hash then
+    signature.hash = hash_file(filepath, stat.size)
+  end
+  return signature
 end
 
-function M.setup_watcher(filepath, bufnr, log_prefix)
-  if file_watchers[filepath] then
-    return -- Already watching this file
+local function same_metadata(a, b)
+  return a.mtime_sec == b.mtime_sec and a.mtime_nsec == b.mtime_nsec
+    and a.size == b.size and a.ino == b.ino
+end
+
+-- Stored for watched files that do not exist yet, so their creation is a change
+local MISSING = { mtime_sec = 0, mtime_nsec = 0, size = -1 }
+
+-- Modification time in seconds, with the nanoseconds as fraction
+local function signature_mtime(signature)
+  return signature and (signature.mtime_sec + signature.mtime_nsec / 1e9) or 0
+end
+
+-- Map the watcher's reload modes onto the ones unified_refresh understands
+local RELOAD_MODES = {
+  reload = "auto",
+  ask = "prompt",
+  none = "off",
+}
+
+local function get_refresh_mode()
+  local mode = config.get_auto_reload_mode()
+  return RELOAD_MODES[mode] or mode
+end
+
+-- Refresh files in one batch through unified_refresh, recording their new signatures
+local function refresh_files(filepaths, log_prefix)
+  local with_hash = config.get_file_watch_content_hash()
+  for _, filepath in ipairs(filepaths) do
+    file_signatures[filepath] = get_file_signature(filepath, with_hash) or MISSING
   end
 
-  -- Check if auto-reload is disabled
-  local reload_mode = config.get_auto_reload_mode()
-  if reload_mode == "none" then
-    config.log_debug(string.format("Auto-reload disabled, skipping watcher for: %s", filepath), log_prefix or "[Shared File Watcher]")
-    return
+  local unified_refresh = require("mcp-diagnostics.shared.unified_refresh")
+  local batch_result = unified_refresh.unified_batch_refresh(filepaths, get_refresh_mode())
+
+  config.log_debug(string.format("Unified refresh completed: %d/%d files succeeded",
+    batch_result.success_count, batch_result.total_files), log_prefix)
+
+  return batch_result
+end
+
+-- Refresh every watched file that had events in the last debounce window
+function M.flush_pending_changes()
+  flush_scheduled = false
+  local candidates = pending_changes
+  pending_changes = {}
+
+  local changed = {}
+  for filepath in pairs(candidates) do
+    local watcher = file_watchers[filepath]
+    if watcher then
+      if not (vim.api.nvim_buf_is_valid(watcher.bufnr) and vim.api.nvim_buf_is_loaded(watcher.bufnr)) then
+        -- Buffer is no longer valid, clean up watcher
+        M.cleanup_watcher(filepath)
+      else
+        buffers.invalidate_file_stats(watcher.bufnr)
+        if M.check_file_staleness(filepath, watcher.bufnr) then
+          table.insert(changed, filepath)
+        end
+      end
+    end
   end
 
-  log_prefix = log_prefix or "[Shared File Watcher]"
-  config.log_debug(string.format("Setting up file watcher for: %s", filepath), log_prefix)
+  if #changed == 0 then
+    return nil
+  end
+
+  table.sort(changed)
+  config.log_debug(string.format("%d watched file(s) changed: %s", #changed, table.concat(changed, ", ")),
+    "[Shared File Watcher]")
 
-  -- Store initial modification time
-  buffer_file_times[filepath] = get_file_mtime(filepath)
+  local batch_result = refresh_files(changed, "[Shared File Watcher]")
+  if #changed == 1 and batch_result.success_count == 1 then
+    vim.notify("Auto-reloaded: " .. vim.fn.fnamemodify(changed[1], ":t"), vim.log.levels.INFO)
+  elseif batch_result.success_count > 0 then
+    vim.notify(string.format("Auto-reloaded %d files", batch_result.success_count), vim.log.levels.INFO)
+  end
+
+  return batch_result
+end
+
+-- Add a file to the current debounce window, opening a window if none is open
+-- Runs in libuv callbacks, where defer_fn is safe but most of the API is not
+local function queue_change(filepath)
+  pending_changes[filepath] = true
+  if not flush_scheduled then
+    flush_scheduled = true
+    vim.defer_fn(M.flush_pending_changes, config.get_file_watch_debounce_ms())
+  end
+end
 
-  -- Create file watcher using vim.loop (libuv)
-  local watcher = vim.loop.new_fs_event()
-  if not watcher then
-    config.log_debug(string.format("Failed to create file watcher for: %s", filepath), log_prefix)
+local function on_directory_event(dir, err, filename)
+  if err then
+    config.log_debug(string.format("Directory watcher error for %s: %s", dir, err), "[Shared File Watcher]")
     return
   end
 
-  file_watchers[filepath] = watcher
+  local watch = dir_watchers[dir]
+  if not watch then
+    return
+  end
 
-  local function on_file_change(err, _filename, _events)
-    if err then
-      config.log_debug(string.format("File watcher error for %s: %s", filepath, err), log_prefix)
-      return
+  if filename then
+    -- Events for files in the directory that are not watched are ignored
+    local filepath = watch.files[filename]
+    if filepath then
+      queue_change(filepath)
     end
-
-    -- Check if file actually changed (avoid duplicate events)
-    local current_mtime = get_file_mtime(filepath)
-    local last_mtime = buffer_file_times[filepath] or 0
-
-    if current_mtime > last_mtime then
-      buffer_file_times[filepath] = current_mtime
-
-      local current_reload_mode = config.get_auto_reload_mode()
-      config.log_debug(string.format("File changed: %s (reload_mode: %s)", filepath, current_reload_mode), log_prefix)
-
-      vim.schedule(function()
-        -- Check if buffer is still valid and loaded
-        if vim.api.nvim_buf_is_valid(bufnr) and vim.api.nvim_buf_is_loaded(bufnr) then
-
-          if current_reload_mode == "ask" then
-            local filename = vim.fn.fnamemodify(filepath, ":t")
-            local choice = vim.fn.confirm(
-              string.format("File %s has been modified externally. Reload?", filename),
-              "&Yes\n&No\n&Always\n&Never", 1, "Question"
-            )
-
-            if choice == 1 then -- Yes (reload once)
-              current_reload_mode = "reload"
-            elseif choice == 2 then -- No (skip this time)
-              return
-            elseif choice == 3 then -- Always (change config and reload)
-              -- This would need config updating capability
-              current_reload_mode = "reload"
-            elseif choice == 4 then -- Never (disable watching)
-              M.cleanup_watcher(filepath)
-              return
-            end
-          end
-
-          if current_reload_mode == "reload" then
-            -- Use checktime to gracefully reload buffer if file changed
-            local before_changedtick = vim.api.nvim_buf_get_changedtick(bufnr)
-            local ok, err_msg = pcall(function()
-              vim.api.nvim_buf_call(bufnr, function()
-                vim.cmd('checktime')
-              end)
-            end)
-
-            if ok then
-              local after_changedtick = vim.api.nvim_buf_get_changedtick(bufnr)
-              
-              if after_changedtick ~= before_changedtick then
-                config.log_debug(string.format("File changed, buffer reloaded: %s (tick %d -> %d)", 
-                  filepath, before_changedtick, after_changedtick), log_prefix)
-                vim.notify("Auto-reloaded: " .. vim.fn.fnamemodify(filepath, ":t"), vim.log.levels.INFO)
-
-                -- Notify LSP of file change via lsp_interact
-                local lsp_interact = package.loaded["mcp-diagnostics.shared.lsp_interact"]
-                if lsp_interact then
-                  lsp_interact.handle_file_changed(filepath, bufnr)
-                end
-              else
-                config.log_debug(string.format("File timestamp changed but content unchanged: %s", filepath), log_prefix)
-              end
-            else
-              config.log_debug(string.format("Failed to reload buffer %s: %s", filepath, tostring(err_msg)), log_prefix)
-            end
-          else
-            config.log_debug(string.format("File changed but reload skipped for: %s", filepath), log_prefix)
-            vim.notify(string.format("File %s changed externally (reload disabled)", vim.fn.fnamemodify(filepath, ":t")), vim.log.levels.WARN)
-
-            -- Still notify LSP even if we don't reload the buffer
-            local lsp_interact = package.loaded["mcp-diagnostics.shared.lsp_interact"]
-            if lsp_interact then
-              lsp_interact.handle_file_changed(filepath, bufnr)
-            end
-          end
-        else
-          -- Buffer is no longer valid, clean up watcher
-          M.cleanup_watcher(filepath)
-        end
-      end)
+  else
+    -- The platform did not report which entry changed, check them all
+    for _, filepath in pairs(watch.files) do
+      queue_change(filepath)
     end
   end
+end
+
+-- Start watching a directory, returns its watch entry or nil on failure
+local function start_directory_watch(dir, log_prefix)
+  local handle = vim.loop.new_fs_event()
+  if not handle then
+    config.log_debug(string.format("Failed to create directory watcher for: %s", dir), log_prefix)
+    return nil
+  end
 
-  -- Start watching the file
-  local ok, watch_err = pcall(function()
-    watcher:start(filepath, {}, on_file_change)
+  local ok, started, start_err = pcall(handle.start, handle, dir, {}, function(err, filename)
+    on_directory_event(dir, err, filename)
   end)
+  if not ok or not started then
+    config.log_debug(string.format("Failed to start directory watcher for %s: %s",
+      dir, tostring(ok and start_err or started)), log_prefix)
+    handle:close()
+    return nil
+  end
 
-  if not ok then
-    config.log_debug(string.format("Failed to start file watcher for %s: %s", filepath, tostring(watch_err)), log_prefix)
-    file_watchers[filepath] = nil
-    watcher:close()
-  else
-    config.log_debug(string.format("File watcher started for: %s", filepath), log_prefix)
+  local watch = { handle = handle, files = {} }
+  dir_watchers[dir] = watch
+  config.log_debug(string.format("Directory watcher started for: %s", dir), log_prefix)
+  return watch
+end
 
-    -- Set up buffer cleanup when buffer is deleted
-    vim.api.nvim_create_autocmd("BufDelete", {
-      buffer = bufnr,
-      callback = function()
-        M.cleanup_watcher(filepath)
-      end,
-      once = true,
-      desc = string.format("Cleanup file watcher for %s", filepath)
-    })
+function M.setup_watcher(filepath, bufnr, log_prefix)
+  if file_watchers[filepath] then
+    return -- Already watching this file
   end
+
+  -- Check if auto-reload is disabled
+  local reload_mode = config.get_auto_reload_mode()
+  if reload_mode == "none" then
+    config.log_debug(string.format("Auto-reload disabled, skipping watcher for: %s", filepath), log_prefix or "[Shared File Watcher]")
+    return
+  end
+
+  log_prefix = log_prefix or "[Shared File Watcher]"
+  config.log_debug(string.format("Setting up file watcher for: %s", filepath), log_prefix)
+
+  local dir, name = vim.fs.dirname(filepath), vim.fs.basename(filepath)
+  local watch = dir_watchers[dir] or start_directory_watch(dir, log_prefix)
+  if not watch then
+    return
+  end
+
+  -- Store initial signature
+  file_signatures[filepath] = get_file_signature(filepath, config.get_file_watch_content_hash()) or MISSING
+  watch.files[name] = filepath
+  file_watchers[filepath] = { bufnr = bufnr, dir = dir, name = name }
+
+  -- Set up buffer cleanup when buffer is deleted
+  vim.api.nvim_create_autocmd("BufDelete", {
+    buffer = bufnr,
+    callback = function()
+      M.cleanup_watcher(filepath)
+    end,
+    once = true,
+    desc = string.format("Cleanup file watcher for %s", filepath)
+  })
 end
 
 -- Clean up a specific file watcher
+-- The directory watch is closed with its last file
 function M.cleanup_watcher(filepath)
   local watcher = file_watchers[filepath]
   if watcher then
-    watcher:stop()
-    watcher:close()
     file_watchers[filepath] = nil
-    buffer_file_times[filepath] = nil
+    file_signatures[filepath] = nil
+    pending_changes[filepath] = nil
+
+    local watch = dir_watchers[watcher.dir]
+    if watch then
+      watch.files[watcher.name] = nil
+      if not next(watch.files) then
+        watch.handle:stop()
+        watch.handle:close()
+        dir_watchers[watcher.dir] = nil
+      end
+    end
     config.log_debug(string.format("Cleaned up file watcher for: %s", filepath), "[Shared File Watcher]")
   end
 end
 
 function M.cleanup_all_watchers()
-  for _filepath, watcher in pairs(file_watchers) do
-    watcher:stop()
-    watcher:close()
+  for _dir, watch in pairs(dir_watchers) do
+    watch.handle:stop()
+    watch.handle:close()
   end
+  dir_watchers = {}
   file_watchers = {}
-  buffer_file_times = {}
+  file_signatures = {}
+  pending_changes = {}
   config.log_debug("Cleaned up all file watchers", "[Shared File Watcher]")
 end
 
 -- Get status of all active watchers
 function M.get_watcher_status()
   local status = {}
-  for filepath, _watcher in pairs(file_watchers) do
+  for filepath, watcher in pairs(file_watchers) do
     status[filepath] = {
       watching = true,
-      last_mtime = buffer_file_times[filepath] or 0,
-      current_mtime = get_file_mtime(filepath)
+      directory = watcher.dir,
+      last_mtime = signature_mtime(file_signatures[filepath]),
+      current_mtime = signature_mtime(get_file_signature(filepath, false))
     }
   end
   return status
@@ -195,27 +292,46 @@ function M.get_watcher_count()
   return vim.tbl_count(file_watchers)
 end
 
- function M.check_file_staleness(filepath, _bufnr)
-  if not filepath then
+-- Number of fs_event handles in use (one per watched directory)
+function M.get_directory_watcher_count()
+  return vim.tbl_count(dir_watchers)
+end
+
+-- Whether a file whose current signature (without hash) is current differs
+-- from the stored one
+local function is_signature_stale(filepath, current)
+  local stored = file_signatures[filepath]
+  if not stored then
+    -- File not being watched, consider it fresh
     return false
   end
 
-  -- Get current file modification time
-  local current_mtime = get_file_mtime(filepath)
-  local stored_mtime = buffer_file_times[filepath]
-
-  if not stored_mtime then
-    -- File not being watched, consider it fresh
+  if not current or same_metadata(current, stored) then
     return false
   end
 
-  -- Check if file has been modified externally
-  if current_mtime > stored_mtime then
-    config.log_debug(string.format("File %s is stale (mtime: %d vs %d)", filepath, current_mtime, stored_mtime), "[File Watcher]")
-    return true
+  -- Metadata changed: with content hashing, a rewrite with identical content
+  -- (touch, formatter that changed nothing) only updates the stored signature
+  if stored.hash then
+    current.hash = hash_file(filepath, current.size)
+    if current.hash == stored.hash then
+      file_signatures[filepath] = current
+      config.log_debug(string.format("File %s rewritten with unchanged content", filepath), "[File Watcher]")
+      return false
+    end
+  end
+
+  config.log_debug(string.format("File %s is stale (mtime: %.9f vs %.9f, size: %d vs %d)", filepath,
+    signature_mtime(current), signature_mtime(stored), current.size, stored.size), "[File Watcher]")
+  return true
+end
+
+ function M.check_file_staleness(filepath, _bufnr)
+  if not filepath then
+    return false
   end
 
-  return false
+  return is_signature_stale(filepath, get_file_signature(filepath, false))
 end
 
 -- Check all watched files for staleness
@@ -230,38 +346,52 @@ function M.check_all_files_staleness()
 
   return stale_files
 end
-local unified_refresh = require("mcp-diagnostics.shared.unified_refresh")
 
  -- Force refresh all watched files (useful for external changes)
+ -- Files are stat'ed in parallel and only the stale ones are reloaded
  function M.refresh_all_watched_files()
    config.log_debug("Force refreshing all watched files", "[File Watcher]")
-   local files_to_refresh = {}
-
-   for filepath, _ in pairs(file_watchers) do
-     if M.check_file_staleness(filepath, nil) then
-       -- Find the buffer for this file
-       local bufnr = vim.fn.bufnr(filepath)
-       if bufnr ~= -1 and vim.api.nvim_buf_is_valid(bufnr) then
-         table.insert(files_to_refresh, filepath)
-       end
-     end
-   end
+   local watched = vim.tbl_keys(file_watchers)
+   table.sort(watched)
+
+   local with_hash = config.get_file_watch_content_hash()
+   local unified_refresh = require("mcp-diagnostics.shared.unified_refresh")
+   local lsp_request = require("mcp-diagnostics.shared.lsp_request")
 
    -- Use unified refresh system for perfect LSP synchronization
-   if #files_to_refresh > 0 then
-     local batch_result = unified_refresh.unified_batch_refresh(files_to_refresh, config.get_auto_reload_mode())
+   local batch_result = lsp_request.await(function(done)
+     unified_refresh.batch_refresh_async(watched, {
+       mode = get_refresh_mode(),
+       wait = false,
+       is_changed = function(filepath, stat)
+         if not is_signature_stale(filepath, signature_from_stat(stat)) then
+           return false
+         end
+         file_signatures[filepath] = get_file_signature(filepath, with_hash) or MISSING
+         return true
+       end
+     }, done)
+   end)
 
-     config.log_debug(string.format("Unified refresh completed: %d/%d files succeeded",
-       batch_result.success_count, batch_result.total_files), "[File Watcher]")
+   if not batch_result then
+     return {}
+   end
 
-     if batch_result.success_count > 0 then
-       vim.notify(string.format("Auto-refreshed %d files with LSP sync", batch_result.success_count), vim.log.levels.INFO)
-     end
+   config.log_debug(string.format("Unified refresh completed: %d/%d files succeeded",
+     batch_result.success_count, batch_result.total_files), "[File Watcher]")
 
-     return batch_result.results
+   if batch_result.changed_files > 0 then
+     vim.notify(string.format("Auto-refreshed %d files with LSP sync", batch_result.changed_files), vim.log.levels.INFO)
    end
 
-   return {}
+   -- Report the stale files of loaded buffers only, as before
+   local results = {}
+   for filepath, result in pairs(batch_result.results) do
+     if not result.skipped and result.reason ~= "not_loaded" and result.reason ~= "not_found" then
+       results[filepath] = result
+     end
+   end
+   return results
  end
 
 vim.api.nvim_create_autocmd("VimLeavePre", {
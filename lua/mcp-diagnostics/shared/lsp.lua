@@ -3,6 +3,8 @@
 local config = require("mcp-diagnostics.shared.config")
 local lsp_inquiry = require("mcp-diagnostics.shared.lsp_inquiry")
 local lsp_interact = require("mcp-diagnostics.shared.lsp_interact")
+local lsp_cache = require("mcp-diagnostics.shared.lsp_cache")
+local lsp_request = require("mcp-diagnostics.shared.lsp_request")
 local M = {}
 
 -- Ensure file is loaded in a buffer and return buffer number
@@ -25,6 +27,55 @@ M.handle_file_deleted = lsp_interact.handle_file_deleted
 M.handle_file_changed = lsp_interact.handle_file_changed
 M.get_lsp_client_status = lsp_interact.get_lsp_client_status
 
+-- LSP response cache (see lsp_cache.lua)
+M.get_cache_stats = lsp_cache.get_stats
+M.clear_cache = lsp_cache.clear
+
+-- Load file and pass its buffer to fn, or report the load error through callback
+local function with_loaded_file(file, callback, fn)
+  local bufnr, loaded, err = M.ensure_file_loaded(file)
+  if not loaded then
+    callback(nil, err or ("Failed to load file: " .. file))
+    return
+  end
+  return fn(bufnr)
+end
+
+-- Async variants: callback(result, err) runs once all LSP clients answered or timed out
+function M.get_hover_info_async(file, line, column, callback)
+  return with_loaded_file(file, callback, function(bufnr)
+    return lsp_inquiry.get_hover_info_async(bufnr, line, column, callback)
+  end)
+end
+
+function M.get_definitions_async(file, line, column, callback)
+  return with_loaded_file(file, callback, function(bufnr)
+    return lsp_inquiry.get_definitions_async(bufnr, line, column, callback)
+  end)
+end
+
+function M.get_references_async(file, line, column, callback)
+  return with_loaded_file(file, callback, function(bufnr)
+    return lsp_inquiry.get_references_async(bufnr, line, column, callback)
+  end)
+end
+
+function M.get_document_symbols_async(file, callback)
+  return with_loaded_file(file, callback, function(bufnr)
+    return lsp_inquiry.get_document_symbols_async(bufnr, callback)
+  end)
+end
+
+function M.get_workspace_symbols_async(query, callback)
+  return lsp_inquiry.get_workspace_symbols_async(query, callback)
+end
+
+function M.get_code_actions_async(file, line, column, end_line, end_column, callback)
+  return with_loaded_file(file, callback, function(bufnr)
+    return lsp_inquiry.get_code_actions_async(bufnr, line, column, end_line, end_column, callback)
+  end)
+end
+
 function M.get_hover_info(file, line, column)
   config.log_debug(string.format("Getting hover info for %s:%d:%d", file, line, column), "[Shared LSP]")
 
@@ -84,4 +135,154 @@ function M.get_code_actions(file, line, column, end_line, end_column)
   return lsp_inquiry.get_code_actions(bufnr, line, column, end_line, end_column)
 end
 
+-- Operations batch_async can run on a loaded buffer: fn(bufnr, op, callback)
+local BATCH_OPERATIONS = {
+  hover = function(bufnr, op, callback)
+    return lsp_inquiry.get_hover_info_async(bufnr, op.line, op.column, callback)
+  end,
+  definitions = function(bufnr, op, callback)
+    return lsp_inquiry.get_definitions_async(bufnr, op.line, op.column, callback)
+  end,
+  references = function(bufnr, op, callback)
+    return lsp_inquiry.get_references_async(bufnr, op.line, op.column, callback)
+  end,
+  document_symbols = function(bufnr, _op, callback)
+    return lsp_inquiry.get_document_symbols_async(bufnr, callback)
+  end,
+  code_actions = function(bufnr, op, callback)
+    return lsp_inquiry.get_code_actions_async(bufnr, op.line, op.column, op.end_line, op.end_column, callback)
+  end,
+}
+
+-- Operations taking a position, which must be 0-based integers
+local POSITION_OPERATIONS = { hover = true, definitions = true, references = true, code_actions = true }
+
+local function is_position(value)
+  return type(value) == "number" and value >= 0 and value == math.floor(value)
+end
+
+-- Error message for an operation with a missing or invalid position, nil if it is valid
+local function validate_position(op)
+  if not (is_position(op.line) and is_position(op.column)) then
+    return "line and column must be non-negative integers"
+  end
+  for _, field in ipairs({ "end_line", "end_column" }) do
+    if op[field] ~= nil and not is_position(op[field]) then
+      return field .. " must be a non-negative integer"
+    end
+  end
+  return nil
+end
+
+-- Run several LSP operations at once
+-- operations: list of { method, file, line, column, end_line, end_column } where method is
+-- hover, definitions, references, document_symbols, code_actions or workspace_symbols (with query)
+-- Each file is loaded once however many operations use it, then all requests run
+-- concurrently under one deadline
+-- callback(results) with results[i] = { method, file, result, error } in operation order
+-- Returns a function that cancels the outstanding requests
+function M.batch_async(operations, callback)
+  local results = {}
+  local tasks = {}
+  local loaded_files = {}
+
+  for i, op in ipairs(operations) do
+    results[i] = { method = op.method, file = op.file }
+
+    local run = BATCH_OPERATIONS[op.method]
+    local position_error = POSITION_OPERATIONS[op.method] and validate_position(op)
+    if op.method == "workspace_symbols" then
+      tasks[i] = function(done)
+        return lsp_inquiry.get_workspace_symbols_async(op.query or "", done)
+      end
+    elseif not run then
+      results[i].error = "Unknown LSP operation: " .. tostring(op.method)
+    elseif type(op.file) ~= "string" then
+      results[i].error = "Missing file"
+    elseif position_error then
+      results[i].error = position_error
+    else
+      if not loaded_files[op.file] then
+        local bufnr, loaded, err = M.ensure_file_loaded(op.file)
+        loaded_files[op.file] = loaded and { bufnr = bufnr }
+          or { error = err or ("Failed to load file: " .. op.file) }
+      end
+
+      local file = loaded_files[op.file]
+      if file.error then
+        results[i].error = file.error
+      else
+        tasks[i] = function(done)
+          return run(file.bufnr, op, done)
+        end
+      end
+    end
+  end
+
+  -- Tasks report (result, err); gather keeps only the first value
+  for i, task in pairs(tasks) do
+    tasks[i] = function(done)
+      return task(function(result, err)
+        done({ result = result, error = err })
+      end)
+    end
+  end
+
+  return lsp_request.gather(tasks, config.get_lsp_max_client_timeout() + 250, function(responses, info)
+    for i in pairs(tasks) do
+      if responses[i] then
+        results[i].result = responses[i].result
+        results[i].error = responses[i].error
+      end
+    end
+    for _, i in ipairs(info.timed_out) do
+      results[i].error = "Timed out"
+    end
+    for i, err in pairs(info.failed) do
+      results[i].error = "Failed: " .. err
+    end
+    callback(results)
+  end)
+end
+
+-- Async operations the Node server can start with call_async
+local ASYNC_OPERATIONS = {
+  hover = M.get_hover_info_async,
+  definitions = M.get_definitions_async,
+  references = M.get_references_async,
+  document_symbols = M.get_document_symbols_async,
+  workspace_symbols = M.get_workspace_symbols_async,
+  code_actions = M.get_code_actions_async,
+  batch = M.batch_async,
+  pull_diagnostics = function(max_wait_ms, callback)
+    return require("mcp-diagnostics.shared.unified_refresh").pull_diagnostics_async(max_wait_ms, callback)
+  end,
+}
+
+-- Start an async LSP operation on behalf of an RPC client and return immediately
+-- The result is delivered as an "mcp_diagnostics_response" notification with
+-- (request_id, result, err) on channel, so the RPC call never blocks Neovim
+function M.call_async(channel, request_id, operation, args)
+  local fn = ASYNC_OPERATIONS[operation]
+  if not fn then
+    return false, "Unknown LSP operation: " .. tostring(operation)
+  end
+
+  -- Positional args may contain vim.NIL for omitted optional values
+  args = args or {}
+  local call_args = {}
+  for i = 1, #args do
+    if args[i] ~= vim.NIL then
+      call_args[i] = args[i]
+    end
+  end
+  call_args[#args + 1] = function(result, err)
+    vim.rpcnotify(channel, "mcp_diagnostics_response", request_id,
+      result == nil and vim.NIL or result, err or vim.NIL)
+  end
+
+  fn(unpack(call_args, 1, #args + 1))
+  return true
+end
+
 return M
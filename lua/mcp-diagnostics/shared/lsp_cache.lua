@@ -0,0 +1,242 @@
+-- LSP response cache for MCP Diagnostics
+-- Caches per-client responses keyed by (method, uri, position/range, version, client id)
+-- so repeated lookups on unchanged files never reach the language server.
+-- Single-file methods are versioned by the buffer's changedtick; cross-file
+-- methods (references, workspace symbols) by a per-client workspace version
+-- that is bumped whenever any document the client tracks changes.
+
+local config = require("mcp-diagnostics.shared.config")
+
+local M = {}
+
+local methods = vim.lsp.protocol.Methods
+
+-- Methods whose answer only depends on the requested document
+local SINGLE_FILE_METHODS = {
+    [methods.textDocument_hover] = true,
+    [methods.textDocument_definition] = true,
+    [methods.textDocument_documentSymbol] = true,
+}
+
+-- Methods whose answer can change when any document changes
+local CROSS_FILE_METHODS = {
+    [methods.textDocument_references] = true,
+    [methods.workspace_symbol] = true,
+}
+
+-- Client notifications that mean a tracked document changed
+local CHANGE_NOTIFICATIONS = {
+    [methods.textDocument_didOpen] = true,
+    [methods.textDocument_didChange] = true,
+    [methods.textDocument_didClose] = true,
+    [methods.textDocument_didSave] = true,
+    [methods.workspace_didChangeWatchedFiles] = true,
+}
+
+-- Stored in place of a nil result so "no answer" is cached too
+local NONE = {}
+
+-- key -> node; nodes form a doubly linked list from most (head) to least (tail) recently used
+local nodes = {}
+local head, tail
+local entry_count = 0
+local total_bytes = 0
+
+-- Cross-file keys per client, dropped when that client's workspace version changes
+local cross_file_keys = {}
+local workspace_versions = {}
+
+local stats = { hits = 0, misses = 0, evictions = 0, invalidations = 0 }
+
+-- Rough in-memory size of a decoded LSP result
+local function estimate_size(value, depth)
+    local kind = type(value)
+    if kind == "string" then
+        return 24 + #value
+    elseif kind ~= "table" then
+        return 16
+    end
+
+    depth = depth or 0
+    if depth > 32 then
+        return 0
+    end
+
+    local size = 40
+    for k, v in pairs(value) do
+        size = size + estimate_size(k, depth + 1) + estimate_size(v, depth + 1)
+    end
+    return size
+end
+
+local function unlink(node)
+    if node.prev then
+        node.prev.next = node.next
+    else
+        head = node.next
+    end
+    if node.next then
+        node.next.prev = node.prev
+    else
+        tail = node.prev
+    end
+    node.prev, node.next = nil, nil
+end
+
+local function push_front(node)
+    node.next = head
+    if head then
+        head.prev = node
+    end
+    head = node
+    if not tail then
+        tail = node
+    end
+end
+
+local function remove(key)
+    local node = nodes[key]
+    if not node then
+        return
+    end
+    unlink(node)
+    nodes[key] = nil
+    entry_count = entry_count - 1
+    total_bytes = total_bytes - node.size
+    if node.client_id and cross_file_keys[node.client_id] then
+        cross_file_keys[node.client_id][key] = nil
+    end
+end
+
+-- Evict least recently used entries until within the configured limits
+local function enforce_limits()
+    local limits = config.get_lsp_cache_config()
+    while tail and (entry_count > limits.max_entries or total_bytes > limits.max_bytes) do
+        remove(tail.key)
+        stats.evictions = stats.evictions + 1
+    end
+end
+
+-- Describe the requested location in params (position, range or query)
+local function location_key(params)
+    if params.position then
+        return params.position.line .. ":" .. params.position.character
+    end
+    if params.range then
+        local range = params.range
+        return string.format("%d:%d-%d:%d", range.start.line, range.start.character,
+            range["end"].line, range["end"].character)
+    end
+    return params.query or ""
+end
+
+-- Build the cache key for a request, or nil if the method is not cacheable
+function M.key(client, method, bufnr, params)
+    if not config.get_lsp_cache_config().enabled or type(params) ~= "table" then
+        return nil
+    end
+
+    local uri = params.textDocument and params.textDocument.uri or ""
+    local version
+    if SINGLE_FILE_METHODS[method] then
+        if not bufnr or not vim.api.nvim_buf_is_valid(bufnr) then
+            return nil
+        end
+        version = "t" .. vim.api.nvim_buf_get_changedtick(bufnr)
+    elseif CROSS_FILE_METHODS[method] then
+        version = "w" .. (workspace_versions[client.id] or 0)
+    else
+        return nil
+    end
+
+    return table.concat({ method, uri, location_key(params), version, client.id }, "\0")
+end
+
+-- Look up a cached response: returns found, result
+function M.get(key)
+    local node = nodes[key]
+    if not node then
+        stats.misses = stats.misses + 1
+        return false, nil
+    end
+
+    stats.hits = stats.hits + 1
+    unlink(node)
+    push_front(node)
+    if node.value == NONE then
+        return true, nil
+    end
+    return true, node.value
+end
+
+-- Store a response for key (client is the client that produced it)
+function M.set(key, client, method, result)
+    remove(key)
+
+    local node = {
+        key = key,
+        value = result == nil and NONE or result,
+        size = estimate_size(key) + estimate_size(result)
+    }
+
+    if CROSS_FILE_METHODS[method] then
+        node.client_id = client.id
+        cross_file_keys[client.id] = cross_file_keys[client.id] or {}
+        cross_file_keys[client.id][key] = true
+    end
+
+    nodes[key] = node
+    push_front(node)
+    entry_count = entry_count + 1
+    total_bytes = total_bytes + node.size
+    enforce_limits()
+end
+
+-- Invalidate cross-file results of a client after one of its documents changed
+function M.bump_workspace(client_id)
+    workspace_versions[client_id] = (workspace_versions[client_id] or 0) + 1
+
+    local keys = cross_file_keys[client_id]
+    if keys then
+        for key in pairs(keys) do
+            remove(key)
+            stats.invalidations = stats.invalidations + 1
+        end
+        cross_file_keys[client_id] = nil
+    end
+end
+
+-- Drop every cached response
+function M.clear()
+    nodes = {}
+    head, tail = nil, nil
+    entry_count = 0
+    total_bytes = 0
+    cross_file_keys = {}
+end
+
+-- Get hit/miss counters and current size
+function M.get_stats()
+    local lookups = stats.hits + stats.misses
+    return {
+        hits = stats.hits,
+        misses = stats.misses,
+        hit_rate = lookups > 0 and stats.hits / lookups or 0,
+        evictions = stats.evictions,
+        invalidations = stats.invalidations,
+        entries = entry_count,
+        bytes = total_bytes
+    }
+end
+
+-- Watch notifications sent to language servers for document changes
+vim.api.nvim_create_autocmd("LspNotify", {
+    group = vim.api.nvim_create_augroup("MCPDiagnosticsLspCache", { clear = true }),
+    callback = function(args)
+        if args.data and CHANGE_NOTIFICATIONS[args.data.method] then
+            M.bump_workspace(args.data.client_id)
+        end
+    end
+})
+
+return M
@@ -3,24 +3,29 @@
 local lsp_inquiry = require("mcp-diagnostics.shared.lsp_inquiry")
 local lsp_interact = require("mcp-diagnostics.shared.lsp_interact")
 local file_watcher = require("mcp-diagnostics.shared.file_watcher")
+local lsp_request = require("mcp-diagnostics.shared.lsp_request")
+local config = require("mcp-diagnostics.shared.config")
 local M = {}
 
-function M.ensure_files_loaded(filepaths, options)
-  options = options or {}
-
-  -- Handle reload_mode if provided
-  if options.reload_mode then
-    -- For now, if reload_mode is "reload", force refresh files first
-    if options.reload_mode == "reload" then
-      -- Refresh any stale files before loading
-      file_watcher.refresh_all_watched_files()
-    end
-    -- reload_mode "ask" and "none" are handled by the file watcher system automatically
+-- Refresh stale files first when reload_mode is "reload"
+-- reload_mode "ask" and "none" are handled by the file watcher system automatically
+local function apply_reload_mode(options)
+  if options.reload_mode == "reload" then
+    file_watcher.refresh_all_watched_files()
   end
+end
 
+function M.ensure_files_loaded(filepaths, options)
+  apply_reload_mode(options or {})
   return lsp_interact.ensure_files_loaded(filepaths)
 end
 
+-- Bulk load files without blocking, see lsp_interact.preload_files_async
+function M.ensure_files_loaded_async(filepaths, options, callback)
+  apply_reload_mode(options or {})
+  return lsp_interact.preload_files_async(filepaths, nil, callback)
+end
+
 function M.ensure_file_loaded(filepath)
   return lsp_interact.ensure_file_loaded(filepath)
 end
@@ -30,35 +35,90 @@ function M.handle_file_deleted(filepath)
   return lsp_interact.handle_file_deleted(filepath)
 end
 
-function M.analyze_symbol(filepath, line, column)
+-- Extra time the overall analysis deadline allows past the slowest client's own
+-- deadline, so per-client partial results win over dropping a whole sub-request
+local ANALYSIS_DEADLINE_GRACE_MS = 250
+
+local function analysis_deadline()
+  return config.get_lsp_max_client_timeout() + ANALYSIS_DEADLINE_GRACE_MS
+end
+
+-- LSP sub-requests describing the symbol at a position, keyed by analysis field
+local function symbol_tasks(bufnr, line, column)
+  return {
+    hover_info = function(done)
+      return lsp_inquiry.get_hover_info_async(bufnr, line, column, done)
+    end,
+    definitions = function(done)
+      return lsp_inquiry.get_definitions_async(bufnr, line, column, done)
+    end,
+    references = function(done)
+      return lsp_inquiry.get_references_async(bufnr, line, column, done)
+    end,
+    document_symbols = function(done)
+      return lsp_inquiry.get_document_symbols_async(bufnr, done)
+    end
+  }
+end
+
+-- Analyze the symbol at a position, dispatching all LSP requests at once
+-- callback(analysis) receives whatever completed before the overall deadline;
+-- sub-requests that missed it are listed in analysis.timed_out, ones that raised
+-- an error in analysis.failed
+function M.analyze_symbol_async(filepath, line, column, callback)
   local bufnr, loaded, err = M.ensure_file_loaded(filepath)
   if not loaded then
-    return { error = err or ("Could not load file: " .. filepath) }
+    callback({ error = err or ("Could not load file: " .. filepath) })
+    return function() end
   end
 
-  local analysis = {
-    filepath = filepath,
-    line = line,
-    column = column,
-    hover_info = nil,
-    definitions = nil,
-    references = nil,
-    document_symbols = nil
-  }
+  return lsp_request.gather(symbol_tasks(bufnr, line, column), analysis_deadline(), function(results, info)
+    local analysis = {
+      filepath = filepath,
+      line = line,
+      column = column,
+      hover_info = results.hover_info,
+      definitions = results.definitions,
+      references = results.references,
+      document_symbols = results.document_symbols
+    }
+    if #info.timed_out > 0 then
+      analysis.timed_out = info.timed_out
+    end
+    if next(info.failed) then
+      analysis.failed = info.failed
+    end
+    callback(analysis)
+  end)
+end
+
+function M.analyze_symbol(filepath, line, column)
+  return lsp_request.await(function(done)
+    M.analyze_symbol_async(filepath, line, column, done)
+  end)
+end
 
-  -- Chain LSP operations using lsp_inquiry
-  analysis.hover_info = lsp_inquiry.get_hover_info(bufnr, line, column)
-  analysis.definitions = lsp_inquiry.get_definitions(bufnr, line, column)
-  analysis.references = lsp_inquiry.get_references(bufnr, line, column)
-  analysis.document_symbols = lsp_inquiry.get_document_symbols(bufnr)
+-- Find diagnostics in the same file related to diagnostic (same source/code or nearby)
+local function find_related_diagnostics(filepath, diagnostic)
+  local diagnostics_mod = require("mcp-diagnostics.shared.diagnostics")
+  local all_diags = diagnostics_mod.get_all_diagnostics({filepath})
 
-  return analysis
+  return vim.tbl_filter(function(diag)
+    return diag ~= diagnostic and (
+      diag.source == diagnostic.source or
+      diag.code == diagnostic.code or
+      (math.abs(diag.lnum - diagnostic.lnum) <= 2) -- nearby lines
+    )
+  end, all_diags)
 end
 
-function M.analyze_diagnostics(filepath, diagnostic)
+-- Analyze a diagnostic: symbol analysis and code actions are requested together
+-- in a single fan-out under one deadline
+function M.analyze_diagnostics_async(filepath, diagnostic, callback)
   local bufnr, loaded, err = M.ensure_file_loaded(filepath)
   if not loaded then
-    return { error = err or ("Could not load file: " .. filepath) }
+    callback({ error = err or ("Could not load file: " .. filepath) })
+    return function() end
   end
 
   local analysis = {
@@ -66,92 +126,256 @@ function M.analyze_diagnostics(filepath, diagnostic)
     diagnostic = diagnostic,
     symbol_analysis = nil,
     code_actions = nil,
-    related_diagnostics = nil
+    related_diagnostics = find_related_diagnostics(filepath, diagnostic)
   }
 
-  -- Analyze the symbol at diagnostic location
-  if diagnostic.lnum and diagnostic.col then
-    analysis.symbol_analysis = M.analyze_symbol(filepath, diagnostic.lnum, diagnostic.col)
+  if not (diagnostic.lnum and diagnostic.col) then
+    callback(analysis)
+    return function() end
   end
 
-  -- Get code actions for the diagnostic
-  if diagnostic.lnum and diagnostic.col then
-    analysis.code_actions = lsp_inquiry.get_code_actions(bufnr, diagnostic.lnum, diagnostic.col)
+  local line, column = diagnostic.lnum, diagnostic.col
+  local tasks = symbol_tasks(bufnr, line, column)
+  tasks.code_actions = function(done)
+    return lsp_inquiry.get_code_actions_async(bufnr, line, column, nil, nil, done)
   end
 
-  -- Find related diagnostics (same symbol, same source, etc.)
-  local diagnostics_mod = require("mcp-diagnostics.shared.diagnostics")
-  local all_diags = diagnostics_mod.get_all_diagnostics({filepath})
+  return lsp_request.gather(tasks, analysis_deadline(), function(results, info)
+    analysis.symbol_analysis = {
+      filepath = filepath,
+      line = line,
+      column = column,
+      hover_info = results.hover_info,
+      definitions = results.definitions,
+      references = results.references,
+      document_symbols = results.document_symbols
+    }
+    analysis.code_actions = results.code_actions
+    if #info.timed_out > 0 then
+      analysis.timed_out = info.timed_out
+    end
+    if next(info.failed) then
+      analysis.failed = info.failed
+    end
+    callback(analysis)
+  end)
+end
 
-  analysis.related_diagnostics = vim.tbl_filter(function(diag)
-    return diag ~= diagnostic and (
-      diag.source == diagnostic.source or
-      diag.code == diagnostic.code or
-      (math.abs(diag.lnum - diagnostic.lnum) <= 2) -- nearby lines
-    )
-  end, all_diags)
+function M.analyze_diagnostics(filepath, diagnostic)
+  return lsp_request.await(function(done)
+    M.analyze_diagnostics_async(filepath, diagnostic, done)
+  end)
+end
+
+-- Code actions found while probing for cascading fixes, per buffer and valid
+-- while its changedtick is unchanged: bufnr -> { tick, ranges = { [range] = actions } }
+local code_action_cache = {}
 
-  return analysis
+local function range_key(diag)
+  return string.format("%d:%d-%d:%d", diag.lnum, diag.col, diag.end_lnum or diag.lnum, diag.end_col or diag.col)
 end
 
--- Correlation: Group related diagnostics across files
-function M.correlate_diagnostics()
-  local diagnostics_mod = require("mcp-diagnostics.shared.diagnostics")
-  local all_diags = diagnostics_mod.get_all_diagnostics()
+local function get_cached_code_actions(bufnr, range)
+  local file_cache = code_action_cache[bufnr]
+  if file_cache and file_cache.tick == vim.api.nvim_buf_get_changedtick(bufnr) then
+    return file_cache.ranges[range]
+  end
+  return nil
+end
 
-  local correlations = {
-    by_symbol = {},
-    by_message = {},
-    by_code = {},
-    cascading_potential = {}
-  }
+local function store_code_actions(bufnr, range, actions)
+  local tick = vim.api.nvim_buf_get_changedtick(bufnr)
+  local file_cache = code_action_cache[bufnr]
+  if not file_cache or file_cache.tick ~= tick then
+    file_cache = { tick = tick, ranges = {} }
+    code_action_cache[bufnr] = file_cache
+  end
+  file_cache.ranges[range] = actions
+end
 
-  -- Group by symbol name (extracted from messages)
-  for _, diag in ipairs(all_diags) do
-    -- Simple symbol extraction (this could be enhanced)
-    local symbol = diag.message:match("'([^']+)'") or diag.message:match("`([^`]+)`")
-    if symbol then
-      correlations.by_symbol[symbol] = correlations.by_symbol[symbol] or {}
-      table.insert(correlations.by_symbol[symbol], diag)
+vim.api.nvim_create_autocmd("BufWipeout", {
+  group = vim.api.nvim_create_augroup("MCPDiagnosticsCorrelation", { clear = true }),
+  callback = function(args)
+    code_action_cache[args.buf] = nil
+  end
+})
+
+-- Buffer holding a diagnostic, loading its file if the buffer is gone
+local function diagnostic_buffer(diag)
+  if diag.bufnr and vim.api.nvim_buf_is_valid(diag.bufnr) then
+    return diag.bufnr
+  end
+  if diag.filename and diag.filename ~= "" then
+    local bufnr, loaded = M.ensure_file_loaded(diag.filename)
+    if loaded then
+      return bufnr
     end
+  end
+  return nil
+end
 
-    -- Group by exact message
-    correlations.by_message[diag.message] = correlations.by_message[diag.message] or {}
-    table.insert(correlations.by_message[diag.message], diag)
+-- Find symbols whose repeated diagnostics have a code action at one of them
+-- Symbols with the most diagnostics are probed first, at most max_concurrency at
+-- a time and max_probes_per_symbol diagnostics each; probing stops when the time
+-- budget runs out and unfinished symbols are reported in info.timed_out
+-- callback(cascading_potential, info)
+function M.find_cascading_fixes_async(by_symbol, callback)
+  local settings = config.get_correlation_config()
 
-    -- Group by diagnostic code
-    if diag.code then
-      correlations.by_code[diag.code] = correlations.by_code[diag.code] or {}
-      table.insert(correlations.by_code[diag.code], diag)
+  local queue = {}
+  for symbol, diags in pairs(by_symbol) do
+    if #diags > 1 then
+      table.insert(queue, { symbol = symbol, diags = diags })
     end
   end
+  table.sort(queue, function(a, b)
+    if #a.diags ~= #b.diags then
+      return #a.diags > #b.diags
+    end
+    return a.symbol < b.symbol
+  end)
 
-  -- Identify potential cascading fixes
-  for symbol, diags in pairs(correlations.by_symbol) do
-    if #diags > 1 then
-      -- Check if any diagnostic has available code actions
-      local actions -- Declare actions at proper scope
-      for _, diag in ipairs(diags) do
-        if diag.filename and diag.lnum and diag.col then
-          -- Ensure file is loaded first
-          local bufnr, loaded = M.ensure_file_loaded(diag.filename)
-          if loaded then
-            actions = lsp_inquiry.get_code_actions(bufnr, diag.lnum, diag.col)
-          end
-          if actions and #actions > 0 then
-            correlations.cascading_potential[symbol] = {
-              diagnostics = diags,
-              fix_location = { file = diag.filename, line = diag.lnum, col = diag.col },
-              available_actions = actions
-            }
-            break
-          end
-        end
+  local cascading_potential = {}
+  local info = { candidates = #queue, requests = 0, cache_hits = 0, timed_out = {} }
+  local next_index = 1
+  local active = {}
+  local active_count = 0
+  local finished = false
+  local dispatching = false
+  local start_next
+
+  local function finish()
+    if finished then
+      return
+    end
+    finished = true
+
+    for symbol, cancel in pairs(active) do
+      table.insert(info.timed_out, symbol)
+      if type(cancel) == "function" then
+        pcall(cancel)
       end
     end
+    for i = next_index, #queue do
+      table.insert(info.timed_out, queue[i].symbol)
+    end
+    table.sort(info.timed_out)
+
+    callback(cascading_potential, info)
+  end
+
+  local function complete(item)
+    active[item.symbol] = nil
+    active_count = active_count - 1
+    start_next()
   end
 
-  return correlations
+  local function probe(item, index, attempts)
+    if finished then
+      return
+    end
+
+    local diag = item.diags[index]
+    if not diag or attempts >= settings.max_probes_per_symbol then
+      return complete(item)
+    end
+
+    local bufnr = diagnostic_buffer(diag)
+    if not bufnr then
+      return probe(item, index + 1, attempts)
+    end
+
+    local range = range_key(diag)
+    local function handle(actions)
+      if actions and #actions > 0 then
+        cascading_potential[item.symbol] = {
+          diagnostics = item.diags,
+          fix_location = { file = diag.filename, line = diag.lnum, col = diag.col },
+          available_actions = actions
+        }
+        return complete(item)
+      end
+      return probe(item, index + 1, attempts + 1)
+    end
+
+    local cached = get_cached_code_actions(bufnr, range)
+    if cached then
+      info.cache_hits = info.cache_hits + 1
+      return handle(cached)
+    end
+
+    info.requests = info.requests + 1
+    local answered = false
+    local cancel = lsp_inquiry.get_code_actions_async(bufnr, diag.lnum, diag.col,
+      diag.end_lnum, diag.end_col, function(actions, request_info)
+        answered = true
+        -- Requests cut short by the time budget answer with partial results, don't keep those
+        if finished then
+          return
+        end
+        -- nor results missing the actions of a client that timed out
+        if not (request_info and #request_info.timed_out > 0) then
+          store_code_actions(bufnr, range, actions)
+        end
+        handle(actions)
+      end)
+    if not answered then
+      active[item.symbol] = cancel or true
+    end
+  end
+
+  -- Start symbols until the concurrency limit is reached
+  -- Probes answered from the cache complete synchronously and re-enter here,
+  -- the flag keeps that from recursing
+  start_next = function()
+    if dispatching or finished then
+      return
+    end
+    dispatching = true
+    while not finished and active_count < settings.max_concurrency and next_index <= #queue do
+      local item = queue[next_index]
+      next_index = next_index + 1
+      active[item.symbol] = true
+      active_count = active_count + 1
+      probe(item, 1, 0)
+    end
+    dispatching = false
+
+    if active_count == 0 and next_index > #queue then
+      finish()
+    end
+  end
+
+  start_next()
+  if not finished then
+    vim.defer_fn(finish, settings.time_budget_ms)
+  end
+
+  return finish
+end
+
+-- Correlation: Group related diagnostics across files
+-- Groups come from the diagnostic index; only cascading-fix probing talks to LSP
+function M.correlate_diagnostics_async(callback)
+  local groups = require("mcp-diagnostics.shared.diagnostic_index").get_correlations()
+
+  return M.find_cascading_fixes_async(groups.by_symbol, function(cascading_potential, info)
+    callback({
+      by_symbol = groups.by_symbol,
+      by_message = groups.by_message,
+      by_code = groups.by_code,
+      cascading_potential = cascading_potential,
+      probe = info
+    })
+  end)
+end
+
+function M.correlate_diagnostics()
+  -- Probing stops at the time budget; allow an LSP timeout on top for it to wind down
+  local timeout = config.get_correlation_config().time_budget_ms + config.get_lsp_max_client_timeout()
+  return lsp_request.await(function(done)
+    M.correlate_diagnostics_async(done)
+  end, timeout)
 end
 
 function M.get_file_states()
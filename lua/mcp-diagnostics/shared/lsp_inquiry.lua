@@ -1,8 +1,11 @@
 -- Pure LSP inquiry operations
 -- Handles LSP requests without buffer management concerns
 -- Assumes buffers are already loaded by lsp_interact.lua
+-- Every inquiry has an _async variant taking a callback; the plain variant waits
+-- for it (yielding when called from lsp_request.run, blocking otherwise)
 
 local config = require("mcp-diagnostics.shared.config")
+local lsp_request = require("mcp-diagnostics.shared.lsp_request")
 
 -- LSP Methods from protocol - following codecompanion's clean approach
 local LSP_METHODS = {
@@ -18,187 +21,210 @@ local M = {}
 
 -- Helper to get client name from client_id
 local function get_client_name(client_id)
-    local client_name = "unknown"
-    if vim.lsp.get_clients then
-        local clients = vim.lsp.get_clients()
-        for _, client in ipairs(clients) do
-            if client.id == client_id then
-                client_name = client.name
-                break
+    local client = vim.lsp.get_client_by_id(client_id)
+    return client and client.name or "unknown"
+end
+
+-- Build text document position params for an explicit position
+local function position_params(bufnr, line, column)
+    return {
+        textDocument = { uri = vim.uri_from_bufnr(bufnr) },
+        position = { line = line, character = column }
+    }
+end
+
+-- Collect { client, uri, file, range } locations from definition/references responses
+local function collect_locations(responses)
+    local locations = {}
+    for client_id, response in pairs(responses) do
+        local result = response.result
+        local client_name = get_client_name(client_id)
+
+        -- A single Location is returned as a table with a uri
+        if result and result.uri then
+            result = { result }
+        end
+
+        for _, location in pairs(result or {}) do
+            -- LocationLink results carry targetUri/targetRange
+            local uri = location.uri or location.targetUri
+            if uri then
+                table.insert(locations, {
+                    client = client_name,
+                    uri = uri,
+                    file = vim.uri_to_fname(uri),
+                    range = location.range or location.targetSelectionRange or location.targetRange
+                })
             end
         end
     end
-    return client_name
+    return locations
 end
 
 -- Get hover information for a position
-function M.get_hover_info(bufnr, line, column)
+function M.get_hover_info_async(bufnr, line, column, callback)
     config.log_debug(string.format("Getting hover info for buffer %d:%d:%d", bufnr, line, column), "[LSP Inquiry]")
 
-    local params = vim.lsp.util.make_position_params()
-    local lsp_response = vim.lsp.buf_request_sync(bufnr, LSP_METHODS.hover, params)
-
-    local hover_info = {}
-    for client_id, response in pairs(lsp_response or {}) do
-        local result = response.result
-        local client_name = get_client_name(client_id)
-
-        if result and result.contents then
-            local content = result.contents
-            local text = ""
-
-            if type(content) == "string" then
-                text = content
-            elseif type(content) == "table" then
-                if content.value then
-                    text = content.value
-                elseif content[1] then
-                    if type(content[1]) == "string" then
-                        text = content[1]
-                    elseif content[1].value then
-                        text = content[1].value
+    local params = position_params(bufnr, line, column)
+    return lsp_request.request(bufnr, LSP_METHODS.hover, params, {}, function(lsp_response)
+        local hover_info = {}
+        for client_id, response in pairs(lsp_response) do
+            local result = response.result
+            local client_name = get_client_name(client_id)
+
+            if result and result.contents then
+                local content = result.contents
+                local text = ""
+
+                if type(content) == "string" then
+                    text = content
+                elseif type(content) == "table" then
+                    if content.value then
+                        text = content.value
+                    elseif content[1] then
+                        if type(content[1]) == "string" then
+                            text = content[1]
+                        elseif content[1].value then
+                            text = content[1].value
+                        end
                     end
                 end
-            end
 
-            if text and text ~= "" then
-                table.insert(hover_info, {
-                    client = client_name,
-                    content = text
-                })
+                if text and text ~= "" then
+                    table.insert(hover_info, {
+                        client = client_name,
+                        content = text
+                    })
+                end
             end
         end
-    end
 
-    return hover_info
+        callback(hover_info)
+    end)
+end
+
+function M.get_hover_info(bufnr, line, column)
+    return lsp_request.await(function(done)
+        M.get_hover_info_async(bufnr, line, column, done)
+    end)
 end
 
 -- Get definitions for a symbol at a position
-function M.get_definitions(bufnr, line, column)
+function M.get_definitions_async(bufnr, line, column, callback)
     config.log_debug(string.format("Getting definitions for buffer %d:%d:%d", bufnr, line, column), "[LSP Inquiry]")
 
-    local params = vim.lsp.util.make_position_params()
-    local lsp_response = vim.lsp.buf_request_sync(bufnr, LSP_METHODS.definition, params)
-
-    local definitions = {}
-    for client_id, response in pairs(lsp_response or {}) do
-        local result = response.result
-        local client_name = get_client_name(client_id)
-
-        for _, definition in pairs(result or {}) do
-            if definition.uri then
-                table.insert(definitions, {
-                    client = client_name,
-                    uri = definition.uri,
-                    file = vim.uri_to_fname(definition.uri),
-                    range = definition.range
-                })
-            end
-        end
-    end
+    local params = position_params(bufnr, line, column)
+    return lsp_request.request(bufnr, LSP_METHODS.definition, params, {}, function(lsp_response)
+        callback(collect_locations(lsp_response))
+    end)
+end
 
-    return definitions
+function M.get_definitions(bufnr, line, column)
+    return lsp_request.await(function(done)
+        M.get_definitions_async(bufnr, line, column, done)
+    end)
 end
 
 -- Get references for a symbol at a position
-function M.get_references(bufnr, line, column)
+function M.get_references_async(bufnr, line, column, callback)
     config.log_debug(string.format("Getting references for buffer %d:%d:%d", bufnr, line, column), "[LSP Inquiry]")
 
-    local params = vim.lsp.util.make_position_params()
+    local params = position_params(bufnr, line, column)
     params.context = { includeDeclaration = true }
-    local lsp_response = vim.lsp.buf_request_sync(bufnr, LSP_METHODS.references, params)
-
-    local references = {}
-    for client_id, response in pairs(lsp_response or {}) do
-        local result = response.result
-        local client_name = get_client_name(client_id)
-
-        for _, reference in pairs(result or {}) do
-            if reference.uri then
-                table.insert(references, {
-                    client = client_name,
-                    uri = reference.uri,
-                    file = vim.uri_to_fname(reference.uri),
-                    range = reference.range
-                })
-            end
-        end
-    end
+    return lsp_request.request(bufnr, LSP_METHODS.references, params, {}, function(lsp_response)
+        callback(collect_locations(lsp_response))
+    end)
+end
 
-    return references
+function M.get_references(bufnr, line, column)
+    return lsp_request.await(function(done)
+        M.get_references_async(bufnr, line, column, done)
+    end)
 end
 
 -- Get document symbols for a buffer
-function M.get_document_symbols(bufnr)
+function M.get_document_symbols_async(bufnr, callback)
     config.log_debug(string.format("Getting document symbols for buffer %d", bufnr), "[LSP Inquiry]")
 
-    local file = vim.api.nvim_buf_get_name(bufnr)
     local params = {
-        textDocument = { uri = vim.uri_from_fname(file) }
+        textDocument = { uri = vim.uri_from_bufnr(bufnr) }
     }
-    local lsp_response = vim.lsp.buf_request_sync(bufnr, LSP_METHODS.document_symbols, params)
-
-    local symbols = {}
-    for client_id, response in pairs(lsp_response or {}) do
-        local result = response.result
-        local client_name = get_client_name(client_id)
-
-        if result then
-            for _, symbol in ipairs(result) do
-                table.insert(symbols, {
-                    client = client_name,
-                    name = symbol.name,
-                    kind = symbol.kind,
-                    range = symbol.range,
-                    selectionRange = symbol.selectionRange,
-                    children = symbol.children
-                })
+    return lsp_request.request(bufnr, LSP_METHODS.document_symbols, params, {}, function(lsp_response)
+        local symbols = {}
+        for client_id, response in pairs(lsp_response) do
+            local result = response.result
+            local client_name = get_client_name(client_id)
+
+            if result then
+                for _, symbol in ipairs(result) do
+                    table.insert(symbols, {
+                        client = client_name,
+                        name = symbol.name,
+                        kind = symbol.kind,
+                        range = symbol.range or (symbol.location and symbol.location.range),
+                        selectionRange = symbol.selectionRange,
+                        children = symbol.children
+                    })
+                end
             end
         end
-    end
 
-    return symbols
+        callback(symbols)
+    end)
+end
+
+function M.get_document_symbols(bufnr)
+    return lsp_request.await(function(done)
+        M.get_document_symbols_async(bufnr, done)
+    end)
 end
 
 -- Get workspace symbols with optional query
-function M.get_workspace_symbols(query)
+-- Asks every client that supports workspace/symbol, not only those on the current buffer
+function M.get_workspace_symbols_async(query, callback)
     config.log_debug(string.format("Getting workspace symbols with query: %s", query or "(none)"), "[LSP Inquiry]")
 
     local params = { query = query or "" }
-    local bufnr = vim.api.nvim_get_current_buf()
-    local lsp_response = vim.lsp.buf_request_sync(bufnr, LSP_METHODS.workspace_symbols, params)
-
-    local symbols = {}
-    for client_id, response in pairs(lsp_response or {}) do
-        local result = response.result
-        local client_name = get_client_name(client_id)
-
-        if result then
-            for _, symbol in ipairs(result) do
-                local location = symbol.location
-                table.insert(symbols, {
-                    client = client_name,
-                    name = symbol.name,
-                    kind = symbol.kind,
-                    containerName = symbol.containerName,
-                    location = {
-                        uri = location.uri,
-                        file = vim.uri_to_fname(location.uri),
-                        range = location.range
-                    }
-                })
+    return lsp_request.request(nil, LSP_METHODS.workspace_symbols, params, {}, function(lsp_response)
+        local symbols = {}
+        for client_id, response in pairs(lsp_response) do
+            local result = response.result
+            local client_name = get_client_name(client_id)
+
+            if result then
+                for _, symbol in ipairs(result) do
+                    local location = symbol.location
+                    if location and location.uri then
+                        table.insert(symbols, {
+                            client = client_name,
+                            name = symbol.name,
+                            kind = symbol.kind,
+                            containerName = symbol.containerName,
+                            location = {
+                                uri = location.uri,
+                                file = vim.uri_to_fname(location.uri),
+                                range = location.range
+                            }
+                        })
+                    end
+                end
             end
         end
-    end
 
-    return symbols
+        callback(symbols)
+    end)
+end
+
+function M.get_workspace_symbols(query)
+    return lsp_request.await(function(done)
+        M.get_workspace_symbols_async(query, done)
+    end)
 end
 
 -- Get code actions for a range
-function M.get_code_actions(bufnr, line, column, end_line, end_column)
+function M.get_code_actions_async(bufnr, line, column, end_line, end_column, callback)
     config.log_debug(string.format("Getting code actions for buffer %d:%d:%d", bufnr, line, column), "[LSP Inquiry]")
 
-    local file = vim.api.nvim_buf_get_name(bufnr)
     local range = {
         start = { line = line, character = column },
         ["end"] = {
@@ -213,36 +239,44 @@ function M.get_code_actions(bufnr, line, column, end_line, end_column)
     })
 
     local params = {
-        textDocument = { uri = vim.uri_from_fname(file) },
+        textDocument = { uri = vim.uri_from_bufnr(bufnr) },
         range = range,
         context = {
             diagnostics = diagnostics
         }
     }
 
-    local lsp_response = vim.lsp.buf_request_sync(bufnr, LSP_METHODS.code_actions, params)
-
-    local actions = {}
-    for client_id, response in pairs(lsp_response or {}) do
-        local result = response.result
-        local client_name = get_client_name(client_id)
-
-        if result then
-            for _, action in ipairs(result) do
-                table.insert(actions, {
-                    client = client_name,
-                    title = action.title,
-                    kind = action.kind,
-                    isPreferred = action.isPreferred,
-                    disabled = action.disabled,
-                    edit = action.edit,
-                    command = action.command
-                })
+    return lsp_request.request(bufnr, LSP_METHODS.code_actions, params, {}, function(lsp_response, info)
+        local actions = {}
+        for client_id, response in pairs(lsp_response) do
+            local result = response.result
+            local client_name = get_client_name(client_id)
+
+            if result then
+                for _, action in ipairs(result) do
+                    table.insert(actions, {
+                        client = client_name,
+                        title = action.title,
+                        kind = action.kind,
+                        isPreferred = action.isPreferred,
+                        disabled = action.disabled,
+                        diagnostics = action.diagnostics,
+                        edit = action.edit,
+                        command = action.command
+                    })
+                end
             end
         end
-    end
 
-    return actions
+        -- info.timed_out lists clients whose actions are missing from a partial result
+        callback(actions, info)
+    end)
+end
+
+function M.get_code_actions(bufnr, line, column, end_line, end_column)
+    return lsp_request.await(function(done)
+        M.get_code_actions_async(bufnr, line, column, end_line, end_column, done)
+    end)
 end
 
 return M
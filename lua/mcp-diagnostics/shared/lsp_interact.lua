@@ -17,74 +17,247 @@ local LSP_METHODS = {
 }
 
 local buffers = require("mcp-diagnostics.shared.buffers")
+local lsp_request = require("mcp-diagnostics.shared.lsp_request")
 local M = {}
 
 local file_states = {}
 
+local TextDocumentSyncKind = vim.lsp.protocol.TextDocumentSyncKind
+
 local function get_lsp_clients(bufnr)
     return vim.lsp.get_clients({ bufnr = bufnr })
 end
 
+-- How the client wants didChange content: None, Full or Incremental
+local function get_change_sync_kind(client)
+    local sync = client.server_capabilities.textDocumentSync
+    if type(sync) == "number" then
+        return sync
+    elseif type(sync) == "table" and sync.change then
+        return sync.change
+    end
+    return TextDocumentSyncKind.None
+end
+
+-- Length of a line in the client's position encoding
+local function encoded_length(line, encoding)
+    if encoding == "utf-8" then
+        return #line
+    end
+    local ok, length = pcall(vim.str_utfindex, line, encoding)
+    if ok and type(length) == "number" then
+        return length
+    end
+    -- Older signature: returns the utf-32 and utf-16 indexes
+    local utf32, utf16 = vim.str_utfindex(line)
+    return encoding == "utf-32" and utf32 or utf16
+end
+
+-- Snapshot of the text last sent to the servers, used to diff the next change
+local function make_snapshot(lines)
+    return {
+        text = table.concat(lines, '\n'),
+        line_count = #lines,
+        last_line = lines[#lines] or ""
+    }
+end
+
+-- Build incremental contentChanges turning old snapshot into new lines
+-- Text is sent as lines joined by '\n' (no trailing newline), matching didOpen.
+-- Hunks are emitted bottom-up so every range is valid in the original document.
+local function build_incremental_changes(old, new_lines, new_text, encoding)
+    local hunks = vim.diff(old.text .. '\n', new_text .. '\n', { result_type = "indices" })
+    local changes = {}
+
+    for i = #hunks, 1, -1 do
+        local start_a, count_a, start_b, count_b = unpack(hunks[i])
+        local new_chunk = table.concat(vim.list_slice(new_lines, start_b, start_b + count_b - 1), '\n')
+        local range, text
+
+        if count_a == 0 then
+            -- Insertion after old line start_a
+            if start_a < old.line_count then
+                range = { start = { line = start_a, character = 0 }, ["end"] = { line = start_a, character = 0 } }
+                text = new_chunk .. '\n'
+            else
+                local eol = { line = old.line_count - 1, character = encoded_length(old.last_line, encoding) }
+                range = { start = eol, ["end"] = eol }
+                text = '\n' .. new_chunk
+            end
+        else
+            local first = start_a - 1
+            local after = first + count_a
+            if after < old.line_count then
+                range = { start = { line = first, character = 0 }, ["end"] = { line = after, character = 0 } }
+                text = count_b > 0 and (new_chunk .. '\n') or ""
+            else
+                -- Hunk runs to the end of the document, which has no trailing newline
+                local doc_end = { line = old.line_count - 1, character = encoded_length(old.last_line, encoding) }
+                if count_b > 0 or first == 0 then
+                    range = { start = { line = first, character = 0 }, ["end"] = doc_end }
+                    text = new_chunk
+                else
+                    -- Pure deletion of the last lines also removes the preceding newline,
+                    -- whose line is unchanged and therefore still as in new_lines
+                    local previous = new_lines[start_b + count_b] or new_lines[#new_lines] or ""
+                    range = {
+                        start = { line = first - 1, character = encoded_length(previous, encoding) },
+                        ["end"] = doc_end
+                    }
+                    text = ""
+                end
+            end
+        end
+
+        table.insert(changes, { range = range, text = text })
+    end
+
+    return changes
+end
+
+-- True when Neovim's own client keeps bufnr in sync with this server
+-- (attached through vim.lsp.buf_attach_client): it sends didOpen on attach,
+-- incremental didChange from on_lines, didClose/didOpen on reload and didClose
+-- on detach, so the plugin must not send its own on top
+local function is_synced_by_vim_lsp(client, bufnr)
+    return vim.lsp.buf_is_attached(bufnr, client.id)
+end
+
+-- Whether filepath lies in one of the client's workspace folders or its root_dir
+local function in_client_workspace(client, filepath)
+    local roots = {}
+    for _, folder in ipairs(client.workspace_folders or {}) do
+        table.insert(roots, vim.uri_to_fname(folder.uri))
+    end
+    if client.root_dir then
+        table.insert(roots, client.root_dir)
+    end
+
+    for _, root in ipairs(roots) do
+        root = root:gsub("/$", "")
+        if filepath == root or filepath:sub(1, #root + 1) == root .. "/" then
+            return true
+        end
+    end
+    return false
+end
+
+-- Running clients that serve filepath but are not attached to bufnr through vim.lsp
+-- (e.g. started with autostart off, or the buffer was loaded without attaching them):
+-- vim.lsp doesn't sync the document to these, so the plugin does. A client has to
+-- declare the buffer's filetype and have the file in its workspace to count.
+local function get_unsynced_clients(bufnr, filepath)
+    local filetype = vim.bo[bufnr].filetype
+    return vim.tbl_filter(function(client)
+        local filetypes = client.config and client.config.filetypes
+        return client.server_capabilities.textDocumentSync ~= nil
+            and not is_synced_by_vim_lsp(client, bufnr)
+            and filetypes ~= nil and vim.tbl_contains(filetypes, filetype)
+            and in_client_workspace(client, filepath)
+    end, vim.lsp.get_clients())
+end
+
 -- LSP Protocol Notifications
-local function notify_lsp_file_opened(filepath, bufnr)
+-- Bring the servers the plugin syncs up to date with bufnr at version (the changedtick,
+-- as vim.lsp uses): clients that already have the document get a didChange against the
+-- text they were last sent (incremental ranges where the server supports them), newly
+-- found ones a didOpen. Every plugin-synced client holds the same text afterwards, so
+-- one snapshot per file is the base of the next diff.
+local function sync_document(filepath, bufnr, version)
   local mode = config.get_lsp_notify_mode()
   if mode == "disabled" then
     return
   end
 
-  local clients = get_lsp_clients(bufnr)
-  if #clients == 0 then
+  version = version or vim.api.nvim_buf_get_changedtick(bufnr)
+  local state = file_states[filepath] or { uri = vim.uri_from_fname(filepath), clients = {} }
+  state.bufnr = bufnr
+  file_states[filepath] = state
+
+  local new_clients = vim.tbl_filter(function(client)
+    return not state.clients[client.id]
+  end, get_unsynced_clients(bufnr, filepath))
+  if not next(state.clients) and #new_clients == 0 then
     return
   end
 
-  local uri = vim.uri_from_fname(filepath)
-  local content = table.concat(vim.api.nvim_buf_get_lines(bufnr, 0, -1, false), '\n')
+  local new_lines = vim.api.nvim_buf_get_lines(bufnr, 0, -1, false)
+  local new_snapshot = make_snapshot(new_lines)
+  local old_snapshot = state.snapshot
+
+  -- Clients only the plugin syncs saw nothing but the plugin's own notifications,
+  -- so old_snapshot is exactly their copy of the document. Unchanged text needs
+  -- no didChange (these clients aren't among those wait_for_diagnostics waits on).
+  if old_snapshot and old_snapshot.text ~= new_snapshot.text then
+    -- Incremental changes per position encoding, shared by clients using the same one
+    local incremental = {}
+
+    for client_id in pairs(state.clients) do
+      local client = vim.lsp.get_client_by_id(client_id)
+      local sync_kind = client and get_change_sync_kind(client)
+      if not client or is_synced_by_vim_lsp(client, bufnr) then
+        -- Gone, or Neovim took over syncing the document
+        state.clients[client_id] = nil
+      elseif sync_kind ~= TextDocumentSyncKind.None then
+        local content_changes
+        if sync_kind == TextDocumentSyncKind.Incremental then
+          local encoding = client.offset_encoding or "utf-16"
+          incremental[encoding] = incremental[encoding]
+            or build_incremental_changes(old_snapshot, new_lines, new_snapshot.text, encoding)
+          content_changes = incremental[encoding]
+        else
+          content_changes = { { text = new_snapshot.text } }
+        end
 
-  -- Get file language ID
-  local language_id = vim.bo[bufnr].filetype or 'text'
+        config.log_debug(string.format("Notifying LSP client %s: %s (v%d=changedtick, %d change(s))",
+          client.name, filepath, version, #content_changes), "[LSP Interact]")
 
-  for _, client in ipairs(clients) do
-    if client.server_capabilities.textDocumentSync then
-      config.log_debug(string.format("Notifying LSP client %s that file opened: %s", client.name, filepath), "[LSP Interact]")
-
-      client.notify(LSP_METHODS.did_open, {
-        textDocument = {
-          uri = uri,
-          languageId = language_id,
-          version = 0,
-          text = content
-        }
-      })
+        client.notify(LSP_METHODS.did_change, {
+          textDocument = {
+            uri = state.uri,
+            version = version
+          },
+          contentChanges = content_changes
+        })
+      end
     end
   end
 
-  file_states[filepath] = {
-    uri = uri,
-    version = 0,
-    opened = true,
-    bufnr = bufnr,
-    last_changedtick = vim.api.nvim_buf_get_changedtick(bufnr)
-  }
-end
+  -- KEY: Use Neovim's actual version instead of our own counter
+  state.version = version
+  state.last_changedtick = version
+  state.snapshot = new_snapshot
 
-function M.notify_lsp_file_closed(filepath, bufnr)
-  local mode = config.get_lsp_notify_mode()
-  if mode == "disabled" then
-    return
-  end
+  -- Get file language ID
+  local language_id = vim.bo[bufnr].filetype or 'text'
 
-  local clients = get_lsp_clients(bufnr or file_states[filepath] and file_states[filepath].bufnr)
-  if #clients == 0 then
-    return
+  for _, client in ipairs(new_clients) do
+    config.log_debug(string.format("Notifying LSP client %s that file opened: %s", client.name, filepath), "[LSP Interact]")
+
+    client.notify(LSP_METHODS.did_open, {
+      textDocument = {
+        uri = state.uri,
+        languageId = language_id,
+        version = version,
+        text = new_snapshot.text
+      }
+    })
+    state.clients[client.id] = true
   end
+end
 
+-- Send didClose to the clients the plugin opened the document on itself
+-- (Neovim sends it for clients attached through vim.lsp when they detach)
+function M.notify_lsp_file_closed(filepath, bufnr)
   local state = file_states[filepath]
-  if not state or not state.opened then
+  file_states[filepath] = nil
+  if not state or config.get_lsp_notify_mode() == "disabled" then
     return
   end
 
-  for _, client in ipairs(clients) do
-    if client.server_capabilities.textDocumentSync then
+  for client_id in pairs(state.clients) do
+    local client = vim.lsp.get_client_by_id(client_id)
+    if client and not is_synced_by_vim_lsp(client, bufnr or state.bufnr) then
       config.log_debug(string.format("Notifying LSP client %s that file closed: %s", client.name, filepath), "[LSP Interact]")
 
       client.notify(LSP_METHODS.did_close, {
@@ -94,8 +267,6 @@ function M.notify_lsp_file_closed(filepath, bufnr)
       })
     end
   end
-
-  file_states[filepath] = nil
 end
 
 function M.notify_lsp_file_changed(filepath, bufnr)
@@ -105,46 +276,10 @@ function M.notify_lsp_file_changed(filepath, bufnr)
 end
 
 -- Internal implementation with explicit version - used by notify_lsp_file_changed and unified_refresh
+-- Only reaches clients vim.lsp doesn't sync (see sync_document); for attached
+-- clients Neovim has already sent the change itself
 function M.notify_lsp_file_changed_with_version(filepath, bufnr, version)
-  local mode = config.get_lsp_notify_mode()
-  if mode == "disabled" then
-    return
-  end
-
-  local clients = get_lsp_clients(bufnr)
-  if #clients == 0 then
-    return
-  end
-
-  local state = file_states[filepath]
-  if not state or not state.opened then
-    -- File not registered, do a full open
-    notify_lsp_file_opened(filepath, bufnr)
-    return
-  end
-
-  -- KEY: Use Neovim's actual version instead of our own counter
-  state.version = version
-  state.last_changedtick = version
-  local content = table.concat(vim.api.nvim_buf_get_lines(bufnr, 0, -1, false), '\n')
-
-  for _, client in ipairs(clients) do
-    if client.server_capabilities.textDocumentSync then
-      config.log_debug(string.format("Notifying LSP client %s: %s (v%d=changedtick)", client.name, filepath, version), "[LSP Interact]")
-
-      client.notify(LSP_METHODS.did_change, {
-        textDocument = {
-          uri = state.uri,
-          version = state.version
-        },
-        contentChanges = {
-          {
-            text = content
-          }
-        }
-      })
-    end
-  end
+  sync_document(filepath, bufnr, version)
 end
 
 function M.ensure_file_loaded(filepath)
@@ -169,7 +304,7 @@ function M.ensure_file_loaded(filepath)
   -- Notify LSP of file opening for new or newly loaded buffers
   if buffer_created or not vim.api.nvim_buf_is_loaded(bufnr) then
     vim.schedule(function()
-      notify_lsp_file_opened(filepath, bufnr)
+      sync_document(filepath, bufnr)
     end)
   end
 
@@ -182,25 +317,171 @@ function M.ensure_file_loaded(filepath)
   return bufnr, loaded, nil
 end
 
--- Batch file loading
-function M.ensure_files_loaded(filepaths)
-  local results = {}
-
-  for _, filepath in ipairs(filepaths) do
-    local bufnr, loaded, error_msg = M.ensure_file_loaded(filepath)
-    table.insert(results, {
-      filepath = filepath,
-      bufnr = bufnr,
-      loaded = loaded,
-      error = error_msg
-    })
-  end
+local function elapsed_ms(start_ns)
+  return (vim.loop.hrtime() - start_ns) / 1e6
+end
 
-  return {
-    results = results,
+-- Check through libuv that filepath is a regular file, without blocking the editor
+-- (nothing is read: bufload reads the file itself)
+local function stat_file_async(filepath, callback)
+  vim.loop.fs_stat(filepath, function(err, stat)
+    callback(not err and stat ~= nil and stat.type == "file")
+  end)
+end
+
+-- Load many files at once without stalling the editor:
+--   1. stat files concurrently through libuv (at most file_preload.max_parallel_stats at a time)
+--   2. load buffers load_batch_size at a time, one batch per tick, load_interval_ms apart
+-- What is paced is the bufload calls. Whatever loading a buffer sets off (FileType,
+-- vim.lsp attaching and sending didOpen, the plugin's didOpen to running clients that
+-- aren't attached, see sync_document) happens per buffer as it loads, nothing more.
+-- opts.on_progress(done, total, entry) is called as each file finishes
+-- callback(result) with per-file results and latencies in ms:
+--   { results = { { filepath, bufnr, loaded, error, timing = { stat_ms, load_ms, ready_ms } } },
+--     total_files, successfully_loaded, timing = { stat_ms, load_ms, total_ms } }
+function M.preload_files_async(filepaths, opts, callback)
+  opts = opts or {}
+  local limits = config.get_file_preload_config()
+  local start_ns = vim.loop.hrtime()
+  local enable_file_watcher = config.is_feature_enabled('auto_reload_files')
+
+  local result = {
+    results = {},
     total_files = #filepaths,
-    successfully_loaded = vim.tbl_count(vim.tbl_filter(function(r) return r.loaded end, results))
+    successfully_loaded = 0,
+    timing = {}
   }
+  local done_count = 0
+
+  local entries = {}
+  for i, filepath in ipairs(filepaths) do
+    entries[i] = { filepath = filepath, loaded = false, timing = {} }
+    result.results[i] = entries[i]
+  end
+
+  local function finish_entry(entry)
+    entry.timing.ready_ms = elapsed_ms(start_ns)
+    done_count = done_count + 1
+    if entry.loaded then
+      result.successfully_loaded = result.successfully_loaded + 1
+    end
+    if opts.on_progress then
+      opts.on_progress(done_count, result.total_files, entry)
+    end
+  end
+
+  -- Phase 2: paced batches of buffer loads
+  local function load_phase(readable)
+    local load_start_ns = vim.loop.hrtime()
+    local index = 1
+
+    local function load_batch()
+      local last = math.min(index + limits.load_batch_size - 1, #entries)
+      for i = index, last do
+        local entry = entries[i]
+        if readable[entry] then
+          local file_start_ns = vim.loop.hrtime()
+          local bufnr, loaded, buffer_created = buffers.ensure_buffer_loaded(
+            entry.filepath, enable_file_watcher, "[LSP Interact]"
+          )
+          entry.timing.load_ms = elapsed_ms(file_start_ns)
+          entry.bufnr = bufnr
+          entry.loaded = loaded
+          if not loaded then
+            entry.error = "Failed to load buffer"
+          elseif buffer_created then
+            sync_document(entry.filepath, bufnr)
+          end
+        else
+          entry.error = "File not readable"
+        end
+        finish_entry(entry)
+      end
+      index = last + 1
+
+      if index <= #entries then
+        config.log_debug(string.format("Preload: loaded %d/%d files", last, #entries), "[LSP Interact]")
+        vim.defer_fn(load_batch, limits.load_interval_ms)
+        return
+      end
+
+      -- Later batches may have pushed earlier hidden buffers out of the pool
+      for _, entry in ipairs(entries) do
+        if entry.loaded and not (vim.api.nvim_buf_is_valid(entry.bufnr) and vim.api.nvim_buf_is_loaded(entry.bufnr)) then
+          entry.loaded = false
+          entry.error = "Evicted from hidden buffer pool"
+          result.successfully_loaded = result.successfully_loaded - 1
+        end
+      end
+
+      result.timing.load_ms = elapsed_ms(load_start_ns)
+      result.timing.total_ms = elapsed_ms(start_ns)
+      config.log_debug(string.format("Preloaded %d/%d files in %.1f ms", result.successfully_loaded,
+        result.total_files, result.timing.total_ms), "[LSP Interact]")
+      callback(result)
+    end
+
+    load_batch()
+  end
+
+  -- Phase 1: concurrent stats, files already loaded need none
+  local readable = {}
+  local queue = {}
+  for _, entry in ipairs(entries) do
+    if buffers.is_file_loaded(entry.filepath) then
+      readable[entry] = true
+    else
+      table.insert(queue, entry)
+    end
+  end
+
+  local remaining = #queue
+  if remaining == 0 then
+    result.timing.stat_ms = 0
+    load_phase(readable)
+    return
+  end
+
+  local next_index = 1
+  local function stat_next()
+    local entry = queue[next_index]
+    if not entry then
+      return
+    end
+    next_index = next_index + 1
+
+    local file_start_ns = vim.loop.hrtime()
+    stat_file_async(entry.filepath, function(ok)
+      entry.timing.stat_ms = elapsed_ms(file_start_ns)
+      readable[entry] = ok or nil
+      remaining = remaining - 1
+      if remaining == 0 then
+        result.timing.stat_ms = elapsed_ms(start_ns)
+        -- libuv callbacks run in a fast context, buffers need the full API
+        vim.schedule(function()
+          load_phase(readable)
+        end)
+      else
+        stat_next()
+      end
+    end)
+  end
+
+  for _ = 1, math.min(limits.max_parallel_stats, #queue) do
+    stat_next()
+  end
+end
+
+-- Batch file loading (sync wrapper around preload_files_async)
+function M.ensure_files_loaded(filepaths)
+  -- The loader always finishes on its own, the timeout only guards against a stuck stat:
+  -- the pauses between load batches plus await's usual deadline
+  local limits = config.get_file_preload_config()
+  local batches = math.ceil(#filepaths / limits.load_batch_size)
+  local timeout = batches * limits.load_interval_ms + config.get_lsp_max_client_timeout() * 2
+  return lsp_request.await(function(done)
+    M.preload_files_async(filepaths, nil, done)
+  end, timeout)
 end
 
 -- Handle file deletions - called by file watcher
@@ -272,7 +553,7 @@ function M.get_file_states()
     return {
       uri = state.uri,
       version = state.version,
-      opened = state.opened,
+      opened = next(state.clients) ~= nil,
       bufnr = state.bufnr
     }
   end, file_states)
@@ -281,13 +562,38 @@ end
 -- Clean up all LSP notifications (for shutdown)
 function M.cleanup_all_lsp_notifications()
   for filepath, state in pairs(file_states) do
-    if state.opened and state.bufnr then
-      M.notify_lsp_file_closed(filepath, state.bufnr)
-    end
+    M.notify_lsp_file_closed(filepath, state.bufnr)
   end
   file_states = {}
 end
 
+-- A client attaching through vim.lsp takes over syncing the buffer's document:
+-- Neovim sends didChange and the final didClose from now on, not the plugin
+local augroup = vim.api.nvim_create_augroup("MCPDiagnosticsLspInteract", { clear = true })
+
+vim.api.nvim_create_autocmd("LspAttach", {
+  group = augroup,
+  callback = function(args)
+    for _, state in pairs(file_states) do
+      if state.bufnr == args.buf then
+        state.clients[args.data.client_id] = nil
+      end
+    end
+  end
+})
+
+-- Close the documents the plugin opened once their buffer is gone
+vim.api.nvim_create_autocmd("BufWipeout", {
+  group = augroup,
+  callback = function(args)
+    for filepath, state in pairs(file_states) do
+      if state.bufnr == args.buf then
+        M.notify_lsp_file_closed(filepath, args.buf)
+      end
+    end
+  end
+})
+
 -- Get LSP client status for a buffer
 function M.get_lsp_client_status(bufnr)
   local clients = get_lsp_clients(bufnr)
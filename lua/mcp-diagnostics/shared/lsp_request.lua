@@ -0,0 +1,279 @@
+-- Concurrent LSP request engine
+-- Sends a request to every capable client at once and gathers the responses
+-- through callbacks, so the main loop is never blocked waiting on a server.
+-- Each client gets its own deadline; clients that miss it are cancelled and
+-- the responses that did arrive are returned as a partial result.
+
+local config = require("mcp-diagnostics.shared.config")
+local lsp_cache = require("mcp-diagnostics.shared.lsp_cache")
+
+local M = {}
+
+-- Pack varargs keeping trailing nils (LuaJIT has no table.pack)
+local function pack(...)
+    return { n = select("#", ...), ... }
+end
+
+-- Coroutines started by M.run, the only ones M.await may yield
+-- (other plugins' coroutines must not be suspended behind their back)
+local run_coroutines = setmetatable({}, { __mode = "k" })
+
+-- Get the clients that can answer method (for bufnr, or workspace-wide when bufnr is nil)
+local function get_clients(bufnr, method)
+    if bufnr then
+        return vim.lsp.get_clients({ bufnr = bufnr, method = method })
+    end
+    return vim.lsp.get_clients({ method = method })
+end
+
+-- Send method to all capable clients concurrently
+-- params: request parameters, or a function(client) returning them
+-- opts.timeout: default per-client deadline in ms (overridden per client by lsp_client_timeouts)
+-- Cacheable methods are answered from lsp_cache per client when possible
+-- callback(responses, info) is called exactly once:
+--   responses = { [client_id] = { result = ..., error = ... } } (same shape as buf_request_sync)
+--   info = { clients = n, timed_out = { client names } }
+-- Returns a function that cancels all outstanding requests
+function M.request(bufnr, method, params, opts, callback)
+    opts = opts or {}
+
+    local clients = get_clients(bufnr, method)
+    local responses = {}
+    local info = { clients = #clients, timed_out = {} }
+    local pending = {}
+    local request_ids = {}
+    local remaining = #clients
+    local finished = false
+
+    local function finish()
+        if finished then
+            return
+        end
+        finished = true
+
+        if #info.timed_out > 0 then
+            config.log_debug(string.format("%s: partial result, timed out: %s", method,
+                table.concat(info.timed_out, ", ")), "[LSP Request]")
+        end
+        callback(responses, info)
+    end
+
+    local function settle(client)
+        if not pending[client.id] then
+            return
+        end
+        pending[client.id] = nil
+        remaining = remaining - 1
+        if remaining == 0 then
+            finish()
+        end
+    end
+
+    if remaining == 0 then
+        finish()
+        return function() end
+    end
+
+    for _, client in ipairs(clients) do
+        local client_params = type(params) == "function" and params(client) or params
+        pending[client.id] = true
+
+        local cache_key = lsp_cache.key(client, method, bufnr, client_params)
+        local cached, cached_result = false, nil
+        if cache_key then
+            cached, cached_result = lsp_cache.get(cache_key)
+        end
+
+        local ok, request_id
+        if cached then
+            responses[client.id] = { result = cached_result }
+            ok = true
+        else
+            ok, request_id = client:request(method, client_params, function(err, result)
+                if not pending[client.id] then
+                    return
+                end
+                responses[client.id] = { result = result, error = err }
+                if cache_key and not err then
+                    lsp_cache.set(cache_key, client, method, result)
+                end
+                settle(client)
+            end, bufnr)
+        end
+
+        if cached then
+            settle(client)
+        elseif not ok then
+            responses[client.id] = { error = { message = "Request failed to send" } }
+            settle(client)
+        else
+            request_ids[client.id] = request_id
+            local timeout = config.get_lsp_client_timeout(client.name, opts.timeout)
+            vim.defer_fn(function()
+                if pending[client.id] then
+                    table.insert(info.timed_out, client.name)
+                    pcall(client.cancel_request, client, request_id)
+                    settle(client)
+                end
+            end, timeout)
+        end
+    end
+
+    return function()
+        for _, client in ipairs(clients) do
+            if pending[client.id] then
+                table.insert(info.timed_out, client.name)
+                pcall(client.cancel_request, client, request_ids[client.id])
+                settle(client)
+            end
+        end
+    end
+end
+
+-- Run several async operations at once and collect their results
+-- tasks: { [name] = function(done) ... end } where each task calls done(result)
+-- and may return a cancel function (as M.request and the lsp_inquiry *_async do)
+-- timeout: overall deadline in ms; tasks still running then are cancelled
+-- callback(results, info) is called exactly once:
+--   results = { [name] = result } for the tasks that finished
+--   info = { timed_out = { task names }, failed = { [name] = error message } for tasks that threw }
+-- Returns a function that cancels all outstanding tasks
+function M.gather(tasks, timeout, callback)
+    local results = {}
+    local info = { timed_out = {}, failed = {} }
+    local pending = {}
+    local cancels = {}
+    local remaining = 0
+    local finished = false
+
+    local function finish()
+        if finished then
+            return
+        end
+        finished = true
+        table.sort(info.timed_out)
+        callback(results, info)
+    end
+
+    local function cancel_pending()
+        for name in pairs(pending) do
+            pending[name] = nil
+            table.insert(info.timed_out, name)
+            if cancels[name] then
+                pcall(cancels[name])
+            end
+        end
+        finish()
+    end
+
+    for name in pairs(tasks) do
+        pending[name] = true
+        remaining = remaining + 1
+    end
+
+    if remaining == 0 then
+        finish()
+        return function() end
+    end
+
+    for name, task in pairs(tasks) do
+        local ok, cancel = pcall(task, function(result)
+            if not pending[name] then
+                return
+            end
+            pending[name] = nil
+            results[name] = result
+            remaining = remaining - 1
+            if remaining == 0 then
+                finish()
+            end
+        end)
+        if not ok then
+            config.log_debug(string.format("%s failed: %s", name, tostring(cancel)), "[LSP Request]")
+            if pending[name] then
+                pending[name] = nil
+                info.failed[name] = tostring(cancel)
+                remaining = remaining - 1
+            end
+        elseif type(cancel) == "function" then
+            cancels[name] = cancel
+        end
+    end
+
+    if remaining == 0 then
+        finish()
+    elseif not finished then
+        vim.defer_fn(function()
+            if not finished then
+                cancel_pending()
+            end
+        end, timeout or config.get_lsp_max_client_timeout())
+    end
+
+    return function()
+        if not finished then
+            cancel_pending()
+        end
+    end
+end
+
+-- Block until start(done) calls done, processing events meanwhile
+-- This is the sync wrapper around the async API, for callers that must return a value
+-- Returns whatever was passed to done
+function M.wait(start, timeout)
+    local results
+    start(function(...)
+        results = pack(...)
+    end)
+
+    -- The engine always settles by its own deadlines, this is only a safety net
+    timeout = timeout or config.get_lsp_max_client_timeout() * 2
+    vim.wait(timeout, function()
+        return results ~= nil
+    end, 10)
+
+    if not results then
+        return nil, "Timed out waiting for LSP response"
+    end
+    return unpack(results, 1, results.n)
+end
+
+-- Wait for start(done) from inside a coroutine started by M.run
+-- Anywhere else this falls back to the blocking M.wait (with its timeout)
+function M.await(start, timeout)
+    local co = coroutine.running()
+    if not co or not run_coroutines[co] then
+        return M.wait(start, timeout)
+    end
+
+    local results
+    local waiting = false
+    start(function(...)
+        results = pack(...)
+        if waiting then
+            coroutine.resume(co)
+        end
+    end)
+
+    -- done may have been called synchronously (e.g. no clients)
+    if not results then
+        waiting = true
+        coroutine.yield()
+    end
+    return unpack(results, 1, results.n)
+end
+
+-- Run fn in a coroutine so it can M.await requests without blocking
+-- callback(ok, ...) receives fn's return values, or false and the error
+function M.run(fn, callback)
+    local co = coroutine.create(function()
+        local results = pack(pcall(fn))
+        if callback then
+            callback(unpack(results, 1, results.n))
+        end
+    end)
+    run_coroutines[co] = true
+    coroutine.resume(co)
+end
+
+return M
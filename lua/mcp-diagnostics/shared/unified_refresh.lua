@@ -7,11 +7,280 @@ local lsp_interact = require("mcp-diagnostics.shared.lsp_interact")
 
 -- LSP Methods from protocol  
 local LSP_METHODS = {
-    hover = vim.lsp.protocol.Methods.textDocument_hover,
+    publish_diagnostics = vim.lsp.protocol.Methods.textDocument_publishDiagnostics,
+    pull_diagnostics = vim.lsp.protocol.Methods.textDocument_diagnostic,
 }
 
 local M = {}
 
+-- Pending diagnostics waits per document uri: uri -> { waiter, ... }
+local diagnostic_waiters = {}
+
+-- Clients that have reported diagnostics (pushed or pulled) at least once
+local reporting_clients = {}
+
+local handlers_installed = false
+
+-- Settle the waits on uri that client_id has now reported diagnostics for
+-- version is the document version the diagnostics belong to (nil if the server omits it)
+local function on_diagnostics_reported(uri, client_id, version)
+  reporting_clients[client_id] = true
+
+  local waiters = diagnostic_waiters[uri]
+  if not waiters then
+    return
+  end
+
+  for i = #waiters, 1, -1 do
+    local waiter = waiters[i]
+    if (waiter.any or waiter.pending[client_id]) and (version == nil or version >= waiter.version) then
+      local client = vim.lsp.get_client_by_id(client_id)
+      table.insert(waiter.acknowledged, client and client.name or tostring(client_id))
+      waiter.pending[client_id] = nil
+      if waiter.any or not next(waiter.pending) then
+        table.remove(waiters, i)
+        waiter.resolve()
+      end
+    end
+  end
+
+  if #waiters == 0 then
+    diagnostic_waiters[uri] = nil
+  end
+end
+
+-- Observe diagnostics as they arrive, after the default handlers have stored them
+local function install_diagnostic_handlers()
+  if handlers_installed then
+    return
+  end
+  handlers_installed = true
+
+  local publish = vim.lsp.handlers[LSP_METHODS.publish_diagnostics]
+  vim.lsp.handlers[LSP_METHODS.publish_diagnostics] = function(err, result, ctx, handler_config)
+    local ret = publish(err, result, ctx, handler_config)
+    if result and result.uri then
+      on_diagnostics_reported(result.uri, ctx.client_id, result.version)
+    end
+    return ret
+  end
+
+  local pull = vim.lsp.handlers[LSP_METHODS.pull_diagnostics]
+  if pull then
+    vim.lsp.handlers[LSP_METHODS.pull_diagnostics] = function(err, result, ctx, handler_config)
+      local ret = pull(err, result, ctx, handler_config)
+      if not err and ctx.params and ctx.params.textDocument then
+        on_diagnostics_reported(ctx.params.textDocument.uri, ctx.client_id, ctx.version)
+      end
+      return ret
+    end
+  end
+end
+
+-- Clients of bufnr expected to report diagnostics: those with pull diagnostics
+-- and those seen publishing before. Returns nil when none is known yet, in
+-- which case the first report from any attached client counts.
+local function expected_clients(bufnr)
+  local clients = vim.lsp.get_clients({ bufnr = bufnr })
+  if #clients == 0 then
+    return {}
+  end
+
+  local expected = {}
+  for _, client in ipairs(clients) do
+    if reporting_clients[client.id] or client.server_capabilities.diagnosticProvider then
+      expected[client.id] = client.name
+    end
+  end
+  return next(expected) and expected or nil
+end
+
+-- Wait until diagnostics for the given document versions have been reported
+-- targets: list of { bufnr, version }, all waited on together under one deadline
+-- (target.clients = { [client_id] = name } waits on exactly those clients instead)
+-- callback(result) with result.files[bufnr] = { acknowledged, clients, timed_out, wait_time }
+-- and the overall result.wait_time in ms
+-- Returns a function that stops waiting (reporting what is still pending as timed out)
+function M.wait_for_diagnostics_async(targets, max_wait_ms, callback)
+  install_diagnostic_handlers()
+
+  local start_time = vim.loop.now()
+  local result = { success = true, files = {} }
+  local remaining = 0
+  local finished = false
+  local waiters = {}
+
+  local function finish()
+    if finished then
+      return
+    end
+    finished = true
+
+    for _, waiter in ipairs(waiters) do
+      local file_result = result.files[waiter.bufnr]
+      if not waiter.resolved then
+        file_result.acknowledged = false
+        result.success = false
+        local uri_waiters = diagnostic_waiters[waiter.uri] or {}
+        for i = #uri_waiters, 1, -1 do
+          if uri_waiters[i] == waiter then
+            table.remove(uri_waiters, i)
+          end
+        end
+        if #uri_waiters == 0 then
+          diagnostic_waiters[waiter.uri] = nil
+        end
+        for _, name in pairs(waiter.any and waiter.names or waiter.pending) do
+          table.insert(file_result.timed_out, name)
+        end
+      end
+    end
+
+    result.wait_time = vim.loop.now() - start_time
+    callback(result)
+  end
+
+  for _, target in ipairs(targets) do
+    local expected = target.clients or expected_clients(target.bufnr)
+    local file_result = { version = target.version, acknowledged = true, clients = {}, timed_out = {} }
+    result.files[target.bufnr] = file_result
+
+    if expected == nil or next(expected) then
+      local waiter = {
+        bufnr = target.bufnr,
+        uri = vim.uri_from_bufnr(target.bufnr),
+        version = target.version,
+        any = expected == nil,
+        pending = expected or {},
+        names = {},
+        acknowledged = file_result.clients
+      }
+      if waiter.any then
+        for _, client in ipairs(vim.lsp.get_clients({ bufnr = target.bufnr })) do
+          waiter.names[client.id] = client.name
+        end
+      end
+      waiter.resolve = function()
+        waiter.resolved = true
+        file_result.wait_time = vim.loop.now() - start_time
+        remaining = remaining - 1
+        if remaining == 0 then
+          finish()
+        end
+      end
+
+      remaining = remaining + 1
+      table.insert(waiters, waiter)
+      diagnostic_waiters[waiter.uri] = diagnostic_waiters[waiter.uri] or {}
+      table.insert(diagnostic_waiters[waiter.uri], waiter)
+    end
+  end
+
+  if remaining == 0 then
+    finish()
+  else
+    vim.defer_fn(finish, max_wait_ms or 3000)
+  end
+
+  return finish
+end
+
+-- changedtick of each buffer when its pulled diagnostics last came back complete
+local pulled_ticks = {}
+
+-- An unloaded or wiped buffer starts over (and its number may be reused)
+vim.api.nvim_create_autocmd({ "BufUnload", "BufWipeout" }, {
+  group = vim.api.nvim_create_augroup("MCPDiagnosticsPulledTicks", { clear = true }),
+  callback = function(args)
+    pulled_ticks[args.buf] = nil
+  end
+})
+
+-- Bring pulled diagnostics up to date without discarding the stored ones
+-- Sends textDocument/diagnostic for every loaded buffer whose changedtick moved
+-- since its last complete pull, to the clients that support it, and waits for
+-- the answers under one deadline (max_wait_ms, default the longest client timeout)
+-- Push-only servers publish on their own after didChange and are not asked
+-- callback(result) with result = { success, requested, skipped, timed_out = { bufnr, ... }, wait_time }
+-- Returns a function that stops waiting
+function M.pull_diagnostics_async(max_wait_ms, callback)
+  install_diagnostic_handlers()
+
+  local targets = {}
+  local requests = {}
+  local skipped = 0
+
+  for _, bufnr in ipairs(vim.api.nvim_list_bufs()) do
+    local clients = vim.api.nvim_buf_is_loaded(bufnr)
+      and vim.lsp.get_clients({ bufnr = bufnr, method = LSP_METHODS.pull_diagnostics }) or {}
+    if #clients > 0 then
+      local tick = vim.api.nvim_buf_get_changedtick(bufnr)
+      if pulled_ticks[bufnr] == tick then
+        skipped = skipped + 1
+      else
+        local pending = {}
+        local params = { textDocument = { uri = vim.uri_from_bufnr(bufnr) } }
+        requests[bufnr] = {}
+        for _, client in ipairs(clients) do
+          -- No handler: the default one stores the result and reports it to the waiters
+          local ok, request_id = client:request(LSP_METHODS.pull_diagnostics, params, nil, bufnr)
+          if ok then
+            pending[client.id] = client.name
+            table.insert(requests[bufnr], { client = client, id = request_id })
+          end
+        end
+        if next(pending) then
+          table.insert(targets, { bufnr = bufnr, version = tick, clients = pending })
+        end
+      end
+    end
+  end
+
+  config.log_debug(string.format("Pulling diagnostics for %d buffer(s), %d unchanged", #targets, skipped),
+    "[Unified Refresh]")
+
+  return M.wait_for_diagnostics_async(targets, max_wait_ms or config.get_lsp_max_client_timeout(), function(wait_result)
+    local result = {
+      success = wait_result.success,
+      requested = #targets,
+      skipped = skipped,
+      timed_out = {},
+      wait_time = wait_result.wait_time
+    }
+
+    for bufnr, file_result in pairs(wait_result.files) do
+      if file_result.acknowledged then
+        pulled_ticks[bufnr] = file_result.version
+      else
+        table.insert(result.timed_out, bufnr)
+        for _, request in ipairs(requests[bufnr]) do
+          pcall(request.client.cancel_request, request.client, request.id)
+        end
+      end
+    end
+    table.sort(result.timed_out)
+
+    callback(result)
+  end)
+end
+
+-- Reload a buffer from disk if its file changed
+-- Returns ok, changedtick before, changedtick after, error
+local function reload_buffer(bufnr)
+  -- Capture version BEFORE reload
+  local before_changedtick = vim.api.nvim_buf_get_changedtick(bufnr)
+
+  -- Unified reload: use checktime to gracefully reload only if file changed
+  local ok, err = pcall(function()
+    vim.api.nvim_buf_call(bufnr, function()
+      vim.cmd('checktime')
+    end)
+  end)
+
+  -- Get the NEW changedtick that Neovim created
+  return ok, before_changedtick, vim.api.nvim_buf_get_changedtick(bufnr), err
+end
+
 function M.unified_external_refresh(filepath, mode)
   mode = mode or config.get_auto_reload_mode()
 
@@ -38,24 +307,13 @@ function M.unified_external_refresh(filepath, mode)
     end
   end
 
-  -- Capture version BEFORE reload
-  local before_changedtick = vim.api.nvim_buf_get_changedtick(bufnr)
-
-  -- Unified reload: use checktime to gracefully reload only if file changed
-  local reload_success, reload_error = pcall(function()
-    vim.api.nvim_buf_call(bufnr, function()
-      vim.cmd('checktime')
-    end)
-  end)
+  local reload_success, before_changedtick, after_changedtick, reload_error = reload_buffer(bufnr)
 
   if not reload_success then
     config.log_error(string.format("Buffer reload failed: %s (%s)", filepath, reload_error), "[Unified Refresh]")
     return { success = false, reason = "reload_failed", error = reload_error }
   end
 
-  -- Get the NEW changedtick that Neovim created
-  local after_changedtick = vim.api.nvim_buf_get_changedtick(bufnr)
-
   -- Send LSP notification with Neovim's actual version (KEY INSIGHT!)
   -- Only notify LSP if file actually changed (checktime is smarter than edit!)
   if after_changedtick ~= before_changedtick then
@@ -77,78 +335,212 @@ function M.unified_external_refresh(filepath, mode)
   }
 end
 
--- Batch refresh multiple files
-function M.unified_batch_refresh(filepaths, mode)
-  local results = {}
-  local success_count = 0
+local function elapsed_ms(start_ns)
+  return (vim.loop.hrtime() - start_ns) / 1e6
+end
+
+-- Stat files concurrently through libuv
+-- callback(stats) with filepath -> stat, or false for files that cannot be stat'ed
+local function stat_files_async(filepaths, callback)
+  local stats = {}
+  local remaining = #filepaths
+  if remaining == 0 then
+    callback(stats)
+    return
+  end
 
   for _, filepath in ipairs(filepaths) do
-    local result = M.unified_external_refresh(filepath, mode)
-    results[filepath] = result
-    if result.success then
-      success_count = success_count + 1
-    end
+    vim.loop.fs_stat(filepath, function(err, stat)
+      stats[filepath] = not err and stat or false
+      remaining = remaining - 1
+      if remaining == 0 then
+        -- libuv callbacks run in a fast context, the rest needs the full API
+        vim.schedule(function()
+          callback(stats)
+        end)
+      end
+    end)
   end
+end
 
-  return {
-    success = success_count > 0,
+-- Refresh many files as one batch:
+--   1. stat all files concurrently through libuv
+--   2. reload only the buffers of files that exist and pass opts.is_changed(filepath, stat)
+--   3. send the didChange notifications for reloaded buffers in one burst
+--   4. wait once for the affected clients to report diagnostics (skipped with opts.wait = false)
+-- opts: mode (default auto_reload_mode), max_wait_ms (default 5000), is_changed, wait
+-- callback(result) with per-file results and phase timings in ms
+function M.batch_refresh_async(filepaths, opts, callback)
+  opts = opts or {}
+  local mode = opts.mode or config.get_auto_reload_mode()
+  local start_ns = vim.loop.hrtime()
+
+  local result = {
+    success = false,
     total_files = #filepaths,
-    success_count = success_count,
-    failed_count = #filepaths - success_count,
-    results = results
+    success_count = 0,
+    failed_count = 0,
+    changed_files = 0,
+    results = {},
+    timing = {}
   }
+
+  local function fail(filepath, reason)
+    result.results[filepath] = { success = false, reason = reason, filepath = filepath }
+    result.failed_count = result.failed_count + 1
+  end
+
+  stat_files_async(filepaths, function(stats)
+    result.timing.stat_ms = elapsed_ms(start_ns)
+
+    -- Pick the buffers to reload
+    local candidates = {}
+    for _, filepath in ipairs(filepaths) do
+      local bufnr = vim.fn.bufnr(filepath)
+      if bufnr == -1 or not vim.api.nvim_buf_is_loaded(bufnr) then
+        fail(filepath, "not_loaded")
+      elseif not stats[filepath] then
+        fail(filepath, "not_found")
+      elseif opts.is_changed and not opts.is_changed(filepath, stats[filepath]) then
+        result.results[filepath] = { success = true, skipped = true, version_changed = false, filepath = filepath }
+        result.success_count = result.success_count + 1
+      else
+        table.insert(candidates, { filepath = filepath, bufnr = bufnr })
+      end
+    end
+
+    -- One decision for the whole batch instead of a prompt per file
+    if #candidates > 0 and mode == "off" then
+      vim.notify(string.format("%d file(s) changed externally (auto-reload disabled)", #candidates), vim.log.levels.WARN)
+      for _, candidate in ipairs(candidates) do
+        fail(candidate.filepath, "disabled")
+      end
+      candidates = {}
+    elseif #candidates > 0 and mode == "prompt" then
+      local choice = vim.fn.confirm(
+        string.format("%d file(s) have been modified externally. Reload?", #candidates),
+        "&Yes\n&No", 1, "Question"
+      )
+      if choice ~= 1 then
+        for _, candidate in ipairs(candidates) do
+          fail(candidate.filepath, "user_declined")
+        end
+        candidates = {}
+      end
+    end
+
+    -- Reload phase
+    local reload_ns = vim.loop.hrtime()
+    local changed = {}
+    for _, candidate in ipairs(candidates) do
+      local file_ns = vim.loop.hrtime()
+      local ok, before, after, err = reload_buffer(candidate.bufnr)
+      if not ok then
+        config.log_error(string.format("Buffer reload failed: %s (%s)", candidate.filepath, err), "[Unified Refresh]")
+        result.results[candidate.filepath] = { success = false, reason = "reload_failed", error = err, filepath = candidate.filepath }
+        result.failed_count = result.failed_count + 1
+      else
+        local file_result = {
+          success = true,
+          before_version = before,
+          after_version = after,
+          version_changed = after ~= before,
+          filepath = candidate.filepath,
+          timing = { reload_ms = elapsed_ms(file_ns) }
+        }
+        result.results[candidate.filepath] = file_result
+        result.success_count = result.success_count + 1
+        if file_result.version_changed then
+          candidate.version = after
+          table.insert(changed, candidate)
+        end
+      end
+    end
+    result.timing.reload_ms = elapsed_ms(reload_ns)
+    result.changed_files = #changed
+
+    -- Notify phase: all didChange notifications back to back
+    local notify_ns = vim.loop.hrtime()
+    for _, candidate in ipairs(changed) do
+      lsp_interact.notify_lsp_file_changed_with_version(candidate.filepath, candidate.bufnr, candidate.version)
+    end
+    result.timing.notify_ms = elapsed_ms(notify_ns)
+
+    config.log_debug(string.format("Batch refresh: %d file(s), %d reloaded (stat %.1fms, reload %.1fms, notify %.1fms)",
+      #filepaths, #changed, result.timing.stat_ms, result.timing.reload_ms, result.timing.notify_ms), "[Unified Refresh]")
+
+    local function done(wait_success)
+      result.timing.total_ms = elapsed_ms(start_ns)
+      result.success = wait_success and (result.success_count > 0 or #filepaths == 0)
+      callback(result)
+    end
+
+    if opts.wait == false or #changed == 0 then
+      return done(true)
+    end
+
+    -- Wait phase: a single deadline for every affected client
+    M.wait_for_diagnostics_async(changed, opts.max_wait_ms or 5000, function(wait_result)
+      result.timing.wait_ms = wait_result.wait_time
+      for _, candidate in ipairs(changed) do
+        local file_wait = wait_result.files[candidate.bufnr]
+        local file_result = result.results[candidate.filepath]
+        file_result.diagnostics_acknowledged = file_wait.acknowledged
+        file_result.acknowledged_by = file_wait.clients
+        file_result.timed_out = file_wait.timed_out
+        file_result.timing.diagnostics_ms = file_wait.wait_time
+      end
+      done(wait_result.success)
+    end)
+  end)
+end
+
+-- Batch refresh multiple files
+-- Reloads and notifies without waiting for diagnostics
+function M.unified_batch_refresh(filepaths, mode)
+  local lsp_request = require("mcp-diagnostics.shared.lsp_request")
+  return lsp_request.await(function(done)
+    M.batch_refresh_async(filepaths, { mode = mode, wait = false }, done)
+  end)
 end
 
 -- Wait for LSP to acknowledge the version change
+-- Resolves when every attached client that reports diagnostics has published
+-- (or answered a pull) for the buffer's current version
 function M.wait_for_lsp_acknowledgment(filepath, max_wait_ms)
   max_wait_ms = max_wait_ms or 3000
-  local start_time = vim.loop.now()
 
   local bufnr = vim.fn.bufnr(filepath)
   if bufnr == -1 then
     return { success = false, reason = "buffer_not_found" }
   end
 
-  -- Use synchronous LSP request to ensure LSP processed changes
   local clients = vim.lsp.get_clients({ bufnr = bufnr })
   if #clients == 0 then
     return { success = false, reason = "no_lsp_clients" }
   end
 
-  -- Use first available client for sync request
-  local client = clients[1]
-
-  -- Make a lightweight synchronous request to ensure LSP is caught up
-  local params = {
-    textDocument = {
-      uri = vim.uri_from_bufnr(bufnr)
-    },
-    position = { line = 0, character = 0 }
-  }
+  local version = vim.api.nvim_buf_get_changedtick(bufnr)
+  local lsp_request = require("mcp-diagnostics.shared.lsp_request")
+  local wait_result = lsp_request.await(function(done)
+    M.wait_for_diagnostics_async({ { bufnr = bufnr, version = version } }, max_wait_ms, done)
+  end, max_wait_ms + 1000)
+  local file_result = wait_result and wait_result.files[bufnr]
 
-  local success, result = pcall(function()
-    -- Use a timeout that's reasonable but not too long
-    local timeout = math.min(max_wait_ms, 1000) -- Max 1 second for sync request
-    return client.request_sync(LSP_METHODS.hover, params, timeout)
-  end)
-
-  local wait_time = vim.loop.now() - start_time
-
-  if success and result then
+  if file_result and file_result.acknowledged then
     return {
       success = true,
-      wait_time = wait_time,
+      wait_time = wait_result.wait_time,
       final_version = vim.api.nvim_buf_get_changedtick(bufnr),
-      method = "sync_request",
-      client_name = client.name
+      method = "diagnostics_published",
+      clients = file_result.clients
     }
   else
     return {
       success = false,
-      reason = "sync_request_failed",
-      wait_time = wait_time,
-      error = result,
-      client_name = client.name
+      reason = "diagnostics_timeout",
+      wait_time = wait_result and wait_result.wait_time or max_wait_ms,
+      timed_out = file_result and file_result.timed_out or {}
     }
   end
 end
@@ -184,4 +576,54 @@ function M.unified_refresh_and_wait(filepath, mode, max_wait_ms)
   end
 end
 
+-- Files to refresh when none are given: every loaded buffer backed by a file
+local function get_loaded_files()
+  local files = {}
+  for _, bufnr in ipairs(vim.api.nvim_list_bufs()) do
+    if vim.api.nvim_buf_is_loaded(bufnr) and vim.bo[bufnr].buftype == "" then
+      local name = vim.api.nvim_buf_get_name(bufnr)
+      if name ~= "" and vim.fn.filereadable(name) == 1 then
+        table.insert(files, name)
+      end
+    end
+  end
+  return files
+end
+
+-- Reload files changed outside Neovim, notify LSP, and wait for fresh diagnostics
+-- files: list of paths (all loaded files when nil or empty)
+-- callback(result) with per-file refresh and acknowledgment state and the
+-- diagnostics reported for the new content
+function M.refresh_after_external_changes_async(files, max_wait_ms, callback)
+  if not files or #files == 0 then
+    files = get_loaded_files()
+  end
+
+  -- The caller asked for this refresh, so the reload is not prompted
+  return M.batch_refresh_async(files, { mode = "auto", max_wait_ms = max_wait_ms or 5000 }, function(result)
+    local diagnostics = require("mcp-diagnostics.shared.diagnostics")
+    for filepath, file_result in pairs(result.results) do
+      if file_result.success then
+        file_result.diagnostics = diagnostics.get_all_diagnostics({ filepath })
+      end
+    end
+
+    result.wait_time = result.timing.wait_ms or 0
+    if result.changed_files == 0 then
+      result.message = string.format("No changes in %d files", result.total_files)
+    else
+      result.message = string.format("Refreshed %d of %d files, %s", result.changed_files, result.total_files,
+        result.success and "diagnostics up to date" or "some servers did not report diagnostics in time")
+    end
+    callback(result)
+  end)
+end
+
+function M.refresh_after_external_changes(files, max_wait_ms)
+  local lsp_request = require("mcp-diagnostics.shared.lsp_request")
+  return lsp_request.await(function(done)
+    M.refresh_after_external_changes_async(files, max_wait_ms, done)
+  end, (max_wait_ms or 5000) + 1000)
+end
+
 return M
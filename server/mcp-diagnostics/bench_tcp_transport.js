@@ -0,0 +1,211 @@
+#!/usr/bin/env node
+
+/**
+ * Benchmark for the MCP TCP transport
+ * Pushes large JSON-RPC payloads through the message framer and through a
+ * live TCP connection transport, in both directions.
+ *
+ * Run after `npm run build`:
+ *   node bench_tcp_transport.js
+ */
+
+import net from 'net';
+import { TCPSessionServer, LineFramer } from './dist/tcp-transport.js';
+
+const BENCH_HOST = '127.0.0.1';
+const BENCH_PORT = parseInt(process.env.MCP_BENCH_PORT || '3900');
+const CHUNK_SIZE = 64 * 1024;
+
+// A diagnostics-like result with multi-byte characters, about `bytes` long
+function createPayload(bytes, id = 1) {
+  const entry = {
+    file: '/project/src/módulo/ファイル.ts',
+    line: 42,
+    message: 'Type “Ünïcödé” is not assignable to type 🚀',
+  };
+  const entryBytes = Buffer.byteLength(JSON.stringify(entry)) + 1;
+  const diagnostics = Array.from({ length: Math.ceil(bytes / entryBytes) }, (_, i) => ({ ...entry, line: i }));
+  return { jsonrpc: '2.0', id, result: { diagnostics } };
+}
+
+function chunk(buffer, size) {
+  const chunks = [];
+  for (let offset = 0; offset < buffer.length; offset += size) {
+    chunks.push(buffer.subarray(offset, offset + size));
+  }
+  return chunks;
+}
+
+// The previous transport's framing: decode every chunk and rescan the whole buffer
+function legacyFrame(chunks) {
+  const lines = [];
+  let buffer = '';
+  for (const data of chunks) {
+    buffer += data.toString();
+    const parts = buffer.split('\n');
+    buffer = parts.pop() || '';
+    lines.push(...parts);
+  }
+  return lines;
+}
+
+function streamingFrame(chunks) {
+  const framer = new LineFramer();
+  const lines = [];
+  for (const data of chunks) {
+    lines.push(...framer.push(data));
+  }
+  return lines;
+}
+
+function time(fn) {
+  const start = process.hrtime.bigint();
+  const result = fn();
+  return { result, ms: Number(process.hrtime.bigint() - start) / 1e6 };
+}
+
+function formatMB(bytes) {
+  return `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+}
+
+function benchFramer() {
+  console.log('📦 Framer: one message split into 64 KB chunks');
+
+  for (const size of [1, 4, 16].map(mb => mb * 1024 * 1024)) {
+    const expected = JSON.stringify(createPayload(size));
+    const chunks = chunk(Buffer.from(expected + '\n'), CHUNK_SIZE);
+
+    const legacy = time(() => legacyFrame(chunks));
+    const streaming = time(() => streamingFrame(chunks));
+
+    const legacyOk = legacy.result.length === 1 && legacy.result[0] === expected;
+    const streamingOk = streaming.result.length === 1 && streaming.result[0] === expected;
+
+    console.log(`  ${formatMB(Buffer.byteLength(expected)).padStart(8)} in ${chunks.length} chunks: ` +
+      `legacy ${legacy.ms.toFixed(1)} ms${legacyOk ? '' : ' (corrupted)'}, ` +
+      `streaming ${streaming.ms.toFixed(1)} ms${streamingOk ? '' : ' (corrupted)'}`);
+
+    if (!streamingOk) {
+      throw new Error('Streaming framer returned a different message');
+    }
+  }
+}
+
+function connect() {
+  return new Promise((resolve, reject) => {
+    const socket = net.connect(BENCH_PORT, BENCH_HOST, () => resolve(socket));
+    socket.once('error', reject);
+  });
+}
+
+// Client -> server: large requests written in many chunks
+async function benchInbound(transport, socket, count, size) {
+  const message = JSON.stringify(createPayload(size)) + '\n';
+  const data = Buffer.from(message);
+  let received = 0;
+
+  const done = new Promise((resolve, reject) => {
+    transport.onmessage = (parsed) => {
+      if (JSON.stringify(parsed) + '\n' !== message) {
+        reject(new Error('Server received a corrupted message'));
+        return;
+      }
+      received++;
+      if (received === count) {
+        resolve();
+      }
+    };
+  });
+
+  const start = process.hrtime.bigint();
+  for (let i = 0; i < count; i++) {
+    for (const piece of chunk(data, CHUNK_SIZE)) {
+      if (!socket.write(piece)) {
+        await new Promise(resolve => socket.once('drain', resolve));
+      }
+    }
+  }
+  await done;
+  const ms = Number(process.hrtime.bigint() - start) / 1e6;
+
+  console.log(`  inbound:  ${count} x ${formatMB(data.length)} in ${ms.toFixed(0)} ms ` +
+    `(${formatMB(count * data.length / (ms / 1000))}/s)`);
+}
+
+// Server -> client: large responses to a client that stops reading for a while
+async function benchOutbound(transport, socket, count, size, pauseMs) {
+  const message = createPayload(size);
+  const expected = JSON.stringify(message);
+  const framer = new LineFramer();
+  let received = 0;
+
+  const done = new Promise((resolve, reject) => {
+    socket.on('data', (data) => {
+      for (const line of framer.push(data)) {
+        if (line !== expected) {
+          reject(new Error('Client received a corrupted message'));
+          return;
+        }
+        received++;
+        if (received === count) {
+          resolve();
+        }
+      }
+    });
+  });
+
+  socket.pause();
+  setTimeout(() => socket.resume(), pauseMs);
+
+  const start = process.hrtime.bigint();
+  let peakRss = process.memoryUsage().rss;
+  const sends = [];
+  for (let i = 0; i < count; i++) {
+    sends.push(transport.send(message));
+    peakRss = Math.max(peakRss, process.memoryUsage().rss);
+  }
+  await Promise.all([...sends, done]);
+  const ms = Number(process.hrtime.bigint() - start) / 1e6;
+  const bytes = count * Buffer.byteLength(expected);
+
+  console.log(`  outbound: ${count} x ${formatMB(bytes / count)} in ${ms.toFixed(0)} ms ` +
+    `including a ${pauseMs} ms reader pause (peak RSS ${formatMB(peakRss)})`);
+}
+
+async function benchTransport() {
+  console.log(`\n🔌 Transport: ${BENCH_HOST}:${BENCH_PORT}`);
+
+  const server = new TCPSessionServer({
+    port: BENCH_PORT,
+    host: BENCH_HOST,
+    maxQueuedBytes: 256 * 1024 * 1024,
+  });
+  const connected = new Promise(resolve => {
+    server.onconnection = async (transport) => {
+      await transport.start();
+      resolve(transport);
+    };
+  });
+  await server.start();
+
+  const socket = await connect();
+  try {
+    const transport = await connected;
+    await benchInbound(transport, socket, 20, 4 * 1024 * 1024);
+    await benchOutbound(transport, socket, 20, 4 * 1024 * 1024, 200);
+  } finally {
+    socket.destroy();
+    await server.close();
+  }
+}
+
+async function main() {
+  benchFramer();
+  await benchTransport();
+  console.log('\n✅ Benchmark complete');
+}
+
+main().catch((error) => {
+  console.error('❌ Benchmark failed:', error);
+  process.exit(1);
+});
@@ -15,16 +15,11 @@ import { McpServer, ResourceTemplate } from "@modelcontextprotocol/sdk/server/mc
 import { StdioServerTransport } from "@modelcontextprotocol/sdk/server/stdio.js";
 import { z } from "zod";
 import { NeovimDiagnosticsManager } from "./neovim-manager.js";
-import { TCPServerTransport } from "./tcp-transport.js";
+import { TCPSessionServer } from "./tcp-transport.js";
 import { spawn } from "child_process";
 import { promises as fs } from "fs";
 import path from "path";
 
-const server = new McpServer({
-  name: "mcp-neovim-diagnostics",
-  version: "1.0.0"
-});
-
 const diagnosticsManager = NeovimDiagnosticsManager.getInstance();
 
 // Neovim server management
@@ -120,440 +115,581 @@ process.on('SIGTERM', () => {
   shutdownNeovimServer();
   process.exit(0);
 });
-// Resources for diagnostic data
-server.resource(
-  "diagnostics",
-  new ResourceTemplate("diagnostics://current", { 
-    list: () => ({
-      resources: [{
-        uri: "diagnostics://current",
-        mimeType: "application/json", 
-        name: "Current Diagnostics",
-        description: "All current diagnostics from Neovim buffers"
-      }]
-    })
-  }),
-  async (uri) => {
-    try {
-      const diagnostics = await diagnosticsManager.getAllDiagnostics();
-      return {
-        contents: [{
-          uri: uri.href,
-          mimeType: "application/json",
-          text: JSON.stringify(diagnostics, null, 2)
-        }]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        contents: [{
-          uri: uri.href,
+
+/**
+ * Create an MCP server with all diagnostics resources, tools and prompts
+ * Every TCP connection gets its own instance (its own session and request IDs);
+ * all of them share the one Neovim connection held by diagnosticsManager.
+ */
+function createServer(): McpServer {
+  const server = new McpServer({
+    name: "mcp-neovim-diagnostics",
+    version: "1.0.0"
+  });
+
+  // Resources for diagnostic data
+  server.resource(
+    "diagnostics",
+    new ResourceTemplate("diagnostics://current", { 
+      list: () => ({
+        resources: [{
+          uri: "diagnostics://current",
           mimeType: "application/json", 
-          text: JSON.stringify({ error: `Failed to get diagnostics: ${errorMessage}` }, null, 2)
+          name: "Current Diagnostics",
+          description: "All current diagnostics from Neovim buffers"
         }]
-      };
+      })
+    }),
+    async (uri) => {
+      try {
+        const diagnostics = await diagnosticsManager.getAllDiagnostics();
+        return {
+          contents: [{
+            uri: uri.href,
+            mimeType: "application/json",
+            text: JSON.stringify(diagnostics, null, 2)
+          }]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          contents: [{
+            uri: uri.href,
+            mimeType: "application/json", 
+            text: JSON.stringify({ error: `Failed to get diagnostics: ${errorMessage}` }, null, 2)
+          }]
+        };
+      }
     }
-  }
-);
-
-server.resource(
-  "diagnostics-summary",
-  new ResourceTemplate("diagnostics://summary", { 
-    list: () => ({
-      resources: [{
-        uri: "diagnostics://summary",
-        mimeType: "application/json",
-        name: "Diagnostic Summary", 
-        description: "Summary of diagnostic counts by severity"
-      }]
-    })
-  }),
-  async (uri) => {
-    try {
-      const summary = await diagnosticsManager.getDiagnosticSummary();
-      return {
-        contents: [{
-          uri: uri.href,
-          mimeType: "application/json",
-          text: JSON.stringify(summary, null, 2)
-        }]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        contents: [{
-          uri: uri.href,
+  );
+
+  server.resource(
+    "diagnostics-columnar",
+    new ResourceTemplate("diagnostics://current/columnar", {
+      list: () => ({
+        resources: [{
+          uri: "diagnostics://current/columnar",
           mimeType: "application/json",
-          text: JSON.stringify({ error: `Failed to get diagnostic summary: ${errorMessage}` }, null, 2)
+          name: "Current Diagnostics (columnar)",
+          description: "All current diagnostics as parallel column arrays with shared filename, source and code tables"
         }]
-      };
-    }
-  }
-);
-
-// Tools for diagnostic and LSP operations
-server.tool(
-  "diagnostics_get",
-  "Get diagnostics for specified files with optional filtering",
-  {
-    files: z.array(z.string()).optional().describe("Files to get diagnostics for (all if not specified)"),
-    severity: z.enum(["error", "warn", "info", "hint"]).optional().describe("Filter by severity level"),
-    source: z.string().optional().describe("Filter by diagnostic source (e.g. 'pylsp', 'eslint')")
-  },
-  async ({ files, severity, source }) => {
-    try {
-      const diagnostics = await diagnosticsManager.getDiagnostics(files, severity, source);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify(diagnostics, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text", 
+      })
+    }),
+    async (uri) => {
+      try {
+        const diagnostics = await diagnosticsManager.getDiagnosticsOutput(undefined, undefined, undefined, undefined, { format: "columnar" });
+        return {
+          contents: [{
+            uri: uri.href,
+            mimeType: "application/json",
+            text: JSON.stringify(diagnostics)
+          }]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          contents: [{
+            uri: uri.href,
+            mimeType: "application/json",
             text: JSON.stringify({ error: `Failed to get diagnostics: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
+          }]
+        };
+      }
     }
-  }
-);
-
-server.tool(
-  "diagnostics_summary",
-  "Get diagnostic summary with counts by severity and file",
-  {},
-  async () => {
-    try {
-      const summary = await diagnosticsManager.getDiagnosticSummary();
-      return {
-        content: [
-          {
-            type: "text",
+  );
+
+  server.resource(
+    "diagnostics-summary",
+    new ResourceTemplate("diagnostics://summary", { 
+      list: () => ({
+        resources: [{
+          uri: "diagnostics://summary",
+          mimeType: "application/json",
+          name: "Diagnostic Summary", 
+          description: "Summary of diagnostic counts by severity"
+        }]
+      })
+    }),
+    async (uri) => {
+      try {
+        const summary = await diagnosticsManager.getDiagnosticSummary();
+        return {
+          contents: [{
+            uri: uri.href,
+            mimeType: "application/json",
             text: JSON.stringify(summary, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text",
+          }]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          contents: [{
+            uri: uri.href,
+            mimeType: "application/json",
             text: JSON.stringify({ error: `Failed to get diagnostic summary: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
+          }]
+        };
+      }
     }
-  }
-);
-
-server.tool(
-  "lsp_hover", 
-  "Get LSP hover information for a position in a file",
-  {
-    file: z.string().describe("File path"),
-    line: z.number().describe("Line number (0-based)"), 
-    column: z.number().describe("Column number (0-based)")
-  },
-  async ({ file, line, column }) => {
-    try {
-      const hoverInfo = await diagnosticsManager.getHoverInfo(file, line, column);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify(hoverInfo, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify({ error: `Failed to get hover info: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
+  );
+
+  // Tools for diagnostic and LSP operations
+  server.tool(
+    "diagnostics_get",
+    "Get diagnostics for specified files with optional filtering",
+    {
+      files: z.array(z.string()).optional().describe("Files to get diagnostics for (all if not specified)"),
+      severity: z.enum(["error", "warn", "info", "hint"]).optional().describe("Filter by severity level"),
+      source: z.string().optional().describe("Filter by diagnostic source (e.g. 'pylsp', 'eslint')"),
+      severities: z.array(z.enum(["error", "warn", "info", "hint"])).optional().describe("Match any of several severities (e.g. ['error', 'warn']); takes precedence over severity and min_severity"),
+      min_severity: z.enum(["error", "warn", "info", "hint"]).optional().describe("Match this severity and anything more severe (e.g. 'warn' returns errors and warnings); takes precedence over severity"),
+      sources: z.array(z.string()).optional().describe("Match any of several sources (e.g. ['pyright', 'ruff']); takes precedence over source"),
+      codes: z.array(z.string()).optional().describe("Match any of several diagnostic codes"),
+      group_by: z.enum(["file"]).optional().describe("Set to 'file' to return [{ filename, bufnr, diagnostics }] groups so each filename appears once"),
+      format: z.enum(["objects", "columnar"]).optional().describe("'columnar' returns parallel arrays under 'columns' with filenames, sources and codes stored once (file/source/code columns are 0-based indexes); much smaller for large result sets"),
+      limit: z.number().int().positive().optional().describe("Page size. With limit or cursor, results are sorted by file, line and column and returned as { diagnostics, total, next_cursor }"),
+      cursor: z.string().optional().describe("next_cursor from the previous page; omit for the first page")
+    },
+    async ({ files, severity, source, severities, min_severity, sources, codes, group_by, format, limit, cursor }) => {
+      try {
+        const filters = { severities, min_severity, sources, codes };
+        const output = { group_by, format };
+        if (limit !== undefined || cursor !== undefined) {
+          const page = await diagnosticsManager.getDiagnosticsPage(files, severity, source, limit, cursor, filters, output);
+          return {
+            content: [
+              {
+                type: "text",
+                text: JSON.stringify(page)
+              }
+            ]
+          };
+        }
+
+        const diagnostics = await diagnosticsManager.getDiagnosticsOutput(files, severity, source, filters, output);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(diagnostics)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text", 
+              text: JSON.stringify({ error: `Failed to get diagnostics: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
     }
-  }
-);
-
-server.tool(
-  "lsp_definition",
-  "Get LSP definition for a symbol at a position",
-  {
-    file: z.string().describe("File path"),
-    line: z.number().describe("Line number (0-based)"),
-    column: z.number().describe("Column number (0-based)")
-  },
-  async ({ file, line, column }) => {
-    try {
-      const definitions = await diagnosticsManager.getDefinitions(file, line, column);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify(definitions, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify({ error: `Failed to get definitions: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
+  );
+
+  server.tool(
+    "diagnostics_delta",
+    "Get only the diagnostics added, removed or changed since a generation (use the generation from a previous call). If reset is true, 'added' holds the full current set",
+    {
+      since: z.number().int().nonnegative().optional().describe("Generation from a previous diagnostics_delta call (0 for everything)")
+    },
+    async ({ since }) => {
+      try {
+        const delta = await diagnosticsManager.getDiagnosticsDelta(since ?? 0);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(delta)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get diagnostics delta: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
     }
-  }
-);
-
-server.tool(
-  "lsp_references",
-  "Get LSP references for a symbol at a position",
-  {
-    file: z.string().describe("File path"),
-    line: z.number().describe("Line number (0-based)"),
-    column: z.number().describe("Column number (0-based)")
-  },
-  async ({ file, line, column }) => {
-    try {
-      const references = await diagnosticsManager.getReferences(file, line, column);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify(references, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify({ error: `Failed to get references: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
+  );
+
+  server.tool(
+    "diagnostics_summary",
+    "Get diagnostic summary with counts by severity and file",
+    {},
+    async () => {
+      try {
+        const summary = await diagnosticsManager.getDiagnosticSummary();
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(summary, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get diagnostic summary: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
     }
-  }
-);
-
-server.tool(
-  "lsp_symbols",
-  "Get document symbols for a file",
-  {
-    file: z.string().describe("File path")
-  },
-  async ({ file }) => {
-    try {
-      const symbols = await diagnosticsManager.getDocumentSymbols(file);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify(symbols, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify({ error: `Failed to get symbols: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
+  );
+
+  server.tool(
+    "lsp_hover", 
+    "Get LSP hover information for a position in a file",
+    {
+      file: z.string().describe("File path"),
+      line: z.number().describe("Line number (0-based)"), 
+      column: z.number().describe("Column number (0-based)")
+    },
+    async ({ file, line, column }) => {
+      try {
+        const hoverInfo = await diagnosticsManager.getHoverInfo(file, line, column);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(hoverInfo, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get hover info: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
     }
-  }
-);
-
-server.tool(
-  "lsp_workspace_symbols",
-  "Get workspace symbols with optional query",
-  {
-    query: z.string().optional().describe("Symbol search query")
-  },
-  async ({ query }) => {
-    try {
-      const symbols = await diagnosticsManager.getWorkspaceSymbols(query);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify(symbols, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify({ error: `Failed to get workspace symbols: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
+  );
+
+  server.tool(
+    "lsp_definition",
+    "Get LSP definition for a symbol at a position",
+    {
+      file: z.string().describe("File path"),
+      line: z.number().describe("Line number (0-based)"),
+      column: z.number().describe("Column number (0-based)")
+    },
+    async ({ file, line, column }) => {
+      try {
+        const definitions = await diagnosticsManager.getDefinitions(file, line, column);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(definitions, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get definitions: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
     }
-  }
-);
-
-server.tool(
-  "lsp_code_action",
-  "Get available code actions for a position or range",
-  {
-    file: z.string().describe("File path"),
-    line: z.number().describe("Line number (0-based)"),
-    column: z.number().describe("Column number (0-based)"),
-    endLine: z.number().optional().describe("End line number (0-based)"),
-    endColumn: z.number().optional().describe("End column number (0-based)")
-  },
-  async ({ file, line, column, endLine, endColumn }) => {
-    try {
-      const actions = await diagnosticsManager.getCodeActions(file, line, column, endLine, endColumn);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify(actions, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify({ error: `Failed to get code actions: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
+  );
+
+  server.tool(
+    "lsp_references",
+    "Get LSP references for a symbol at a position",
+    {
+      file: z.string().describe("File path"),
+      line: z.number().describe("Line number (0-based)"),
+      column: z.number().describe("Column number (0-based)")
+    },
+    async ({ file, line, column }) => {
+      try {
+        const references = await diagnosticsManager.getReferences(file, line, column);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(references, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get references: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
     }
-  }
-);
-
-// Buffer management tools
-server.tool(
-  "ensure_files_loaded",
-  "Ensure specified files are loaded into Neovim buffers for LSP operations",
-  {
-    files: z.array(z.string()).describe("Files to load into buffers")
-  },
-  async ({ files }) => {
-    try {
-      const results = [];
-      for (const file of files) {
-        const loaded = await diagnosticsManager.ensureFileLoaded(file);
-        results.push({ file, loaded });
+  );
+
+  server.tool(
+    "lsp_symbols",
+    "Get document symbols for a file",
+    {
+      file: z.string().describe("File path")
+    },
+    async ({ file }) => {
+      try {
+        const symbols = await diagnosticsManager.getDocumentSymbols(file);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(symbols, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get symbols: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
       }
-      
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify({ 
-              message: "File loading results",
-              results 
-            }, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify({ error: `Failed to load files: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
     }
-  }
-);
-
-server.tool(
-  "buffer_status",
-  "Get status of all buffers currently loaded in Neovim",
-  {},
-  async () => {
-    try {
-      const status = await diagnosticsManager.getBufferStatus();
-      return {
-        content: [
-          {
-            type: "text",
-            text: JSON.stringify(status, null, 2)
-          }
-        ]
-      };
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : String(error);
+  );
+
+  server.tool(
+    "lsp_workspace_symbols",
+    "Get workspace symbols with optional query",
+    {
+      query: z.string().optional().describe("Symbol search query")
+    },
+    async ({ query }) => {
+      try {
+        const symbols = await diagnosticsManager.getWorkspaceSymbols(query);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(symbols, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get workspace symbols: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
+    }
+  );
+
+  server.tool(
+    "lsp_code_action",
+    "Get available code actions for a position or range",
+    {
+      file: z.string().describe("File path"),
+      line: z.number().describe("Line number (0-based)"),
+      column: z.number().describe("Column number (0-based)"),
+      endLine: z.number().optional().describe("End line number (0-based)"),
+      endColumn: z.number().optional().describe("End column number (0-based)")
+    },
+    async ({ file, line, column, endLine, endColumn }) => {
+      try {
+        const actions = await diagnosticsManager.getCodeActions(file, line, column, endLine, endColumn);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(actions, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get code actions: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
+    }
+  );
+
+  server.tool(
+    "lsp_batch",
+    "Run several LSP operations (hover, definitions, references, symbols, code actions) in one call; files are loaded once and results are returned in order",
+    {
+      operations: z.array(z.object({
+        method: z.enum(["hover", "definitions", "references", "document_symbols", "workspace_symbols", "code_actions"]).describe("LSP operation"),
+        file: z.string().optional().describe("File path (not needed for workspace_symbols)"),
+        line: z.number().optional().describe("Line number (0-based)"),
+        column: z.number().optional().describe("Column number (0-based)"),
+        end_line: z.number().optional().describe("End line for code_actions (0-based)"),
+        end_column: z.number().optional().describe("End column for code_actions (0-based)"),
+        query: z.string().optional().describe("Search query for workspace_symbols")
+      })).describe("Operations to run concurrently")
+    },
+    async ({ operations }) => {
+      try {
+        const results = await diagnosticsManager.lspBatch(operations);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(results, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to run LSP batch: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
+    }
+  );
+
+  // Buffer management tools
+  server.tool(
+    "ensure_files_loaded",
+    "Ensure specified files are loaded into Neovim buffers for LSP operations",
+    {
+      files: z.array(z.string()).describe("Files to load into buffers")
+    },
+    async ({ files }) => {
+      try {
+        const results = [];
+        for (const file of files) {
+          const loaded = await diagnosticsManager.ensureFileLoaded(file);
+          results.push({ file, loaded });
+        }
+        
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ 
+                message: "File loading results",
+                results 
+              }, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to load files: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
+    }
+  );
+
+  server.tool(
+    "buffer_status",
+    "Get status of all buffers currently loaded in Neovim",
+    {},
+    async () => {
+      try {
+        const status = await diagnosticsManager.getBufferStatus();
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify(status, null, 2)
+            }
+          ]
+        };
+      } catch (error) {
+        const errorMessage = error instanceof Error ? error.message : String(error);
+        return {
+          content: [
+            {
+              type: "text",
+              text: JSON.stringify({ error: `Failed to get buffer status: ${errorMessage}` }, null, 2)
+            }
+          ],
+          isError: true
+        };
+      }
+    }
+  );
+
+  // Intelligent prompts for diagnostic workflows
+  server.prompt(
+    "diagnostic_investigation",
+    "Guide through systematic diagnostic investigation and error fixing",
+    {
+      focus_file: z.string().optional().describe("Specific file to focus investigation on"),
+      severity_priority: z.enum(["error", "warn", "info", "all"]).optional().describe("Which severity to prioritize")
+    },
+    async ({ focus_file, severity_priority }) => {
+      const summary = await diagnosticsManager.getDiagnosticSummary();
+      const diagnostics = await diagnosticsManager.getDiagnostics(
+        focus_file ? [focus_file] : undefined,
+        severity_priority === "all" ? undefined : severity_priority
+      );
+      
+      const bufferStatus = await diagnosticsManager.getBufferStatus();
+      const loadedFiles = Object.keys(bufferStatus.buffers);
+      
       return {
-        content: [
+        messages: [
           {
-            type: "text",
-            text: JSON.stringify({ error: `Failed to get buffer status: ${errorMessage}` }, null, 2)
-          }
-        ],
-        isError: true
-      };
-    }
-  }
-);
-
-// Intelligent prompts for diagnostic workflows
-server.prompt(
-  "diagnostic_investigation",
-  "Guide through systematic diagnostic investigation and error fixing",
-  {
-    focus_file: z.string().optional().describe("Specific file to focus investigation on"),
-    severity_priority: z.enum(["error", "warn", "info", "all"]).optional().describe("Which severity to prioritize")
-  },
-  async ({ focus_file, severity_priority }) => {
-    const summary = await diagnosticsManager.getDiagnosticSummary();
-    const diagnostics = await diagnosticsManager.getDiagnostics(
-      focus_file ? [focus_file] : undefined,
-      severity_priority === "all" ? undefined : severity_priority
-    );
-    
-    const bufferStatus = await diagnosticsManager.getBufferStatus();
-    const loadedFiles = Object.keys(bufferStatus);
-    
-    return {
-      messages: [
-        {
-          role: "user",
-          content: {
-            type: "text",
-            text: `I need help investigating and fixing code issues in my Neovim workspace. Here's the current diagnostic situation:
+            role: "user",
+            content: {
+              type: "text",
+              text: `I need help investigating and fixing code issues in my Neovim workspace. Here's the current diagnostic situation:
 
 ## Diagnostic Summary
 ${JSON.stringify(summary, null, 2)}
@@ -581,48 +717,48 @@ For each significant error, guide me through:
 Remember: Files need to be loaded in Neovim buffers for LSP tools to work. Use \`ensure_files_loaded\` if needed.
 
 Start with the most critical issues and guide me step by step.`
+            }
           }
-        }
-      ]
-    };
-  }
-);
-
-server.prompt(
-  "lsp_code_exploration", 
-  "Guide through LSP-powered code exploration and understanding",
-  {
-    entry_point: z.string().describe("File path to start exploration from"),
-    exploration_goal: z.enum(["understand_structure", "trace_execution", "find_usage", "analyze_dependencies"]).describe("What you want to explore")
-  },
-  async ({ entry_point, exploration_goal }) => {
-    // Ensure the entry point is loaded
-    await diagnosticsManager.ensureFileLoaded(entry_point);
-    
-    const symbols = await diagnosticsManager.getDocumentSymbols(entry_point);
-    const bufferStatus = await diagnosticsManager.getBufferStatus();
-    
-    const explorationGuides = {
-      understand_structure: "exploring the overall code structure and relationships",
-      trace_execution: "tracing code execution paths and flow",
-      find_usage: "finding where symbols and functions are used",
-      analyze_dependencies: "analyzing dependencies and imports"
-    };
-    
-    return {
-      messages: [
-        {
-          role: "user", 
-          content: {
-            type: "text",
-            text: `I want to explore and understand code starting from \`${entry_point}\`. My goal is ${explorationGuides[exploration_goal]}.
+        ]
+      };
+    }
+  );
+
+  server.prompt(
+    "lsp_code_exploration", 
+    "Guide through LSP-powered code exploration and understanding",
+    {
+      entry_point: z.string().describe("File path to start exploration from"),
+      exploration_goal: z.enum(["understand_structure", "trace_execution", "find_usage", "analyze_dependencies"]).describe("What you want to explore")
+    },
+    async ({ entry_point, exploration_goal }) => {
+      // Ensure the entry point is loaded
+      await diagnosticsManager.ensureFileLoaded(entry_point);
+      
+      const symbols = await diagnosticsManager.getDocumentSymbols(entry_point);
+      const bufferStatus = await diagnosticsManager.getBufferStatus();
+      
+      const explorationGuides = {
+        understand_structure: "exploring the overall code structure and relationships",
+        trace_execution: "tracing code execution paths and flow",
+        find_usage: "finding where symbols and functions are used",
+        analyze_dependencies: "analyzing dependencies and imports"
+      };
+      
+      return {
+        messages: [
+          {
+            role: "user", 
+            content: {
+              type: "text",
+              text: `I want to explore and understand code starting from \`${entry_point}\`. My goal is ${explorationGuides[exploration_goal]}.
 
 ## Starting Point: ${entry_point}
 Document symbols found:
 ${JSON.stringify(symbols.slice(0, 15), null, 2)}${symbols.length > 15 ? `\n... and ${symbols.length - 15} more symbols` : ''}
 
 ## Currently Loaded Files
-${JSON.stringify(Object.keys(bufferStatus), null, 2)}
+${JSON.stringify(Object.keys(bufferStatus.buffers), null, 2)}
 
 Please guide me through an systematic exploration using LSP tools:
 
@@ -651,44 +787,44 @@ Please guide me through an systematic exploration using LSP tools:
 **Important**: Before exploring any file, ensure it's loaded with \`ensure_files_loaded\`. 
 
 Guide me step by step through this exploration, suggesting specific LSP tool invocations and explaining what to look for in the results.`
+            }
           }
-        }
-      ]
-    };
-  }
-);
-
-server.prompt(
-  "error_fixing_workflow",
-  "Step-by-step workflow for fixing specific errors using diagnostic and LSP information", 
-  {
-    error_file: z.string().describe("File containing the error"),
-    error_line: z.string().describe("Line number of the error (0-based)"),
-    error_message: z.string().optional().describe("The error message if known")
-  },
-  async ({ error_file, error_line, error_message }) => {
-    if (!error_file || !error_line) {
-      throw new Error("error_file and error_line are required");
-    }
-    
-    const lineNum = parseInt(error_line, 10);
-    if (isNaN(lineNum)) {
-      throw new Error("error_line must be a valid number");
+        ]
+      };
     }
-    
-    await diagnosticsManager.ensureFileLoaded(error_file);
-    
-    const fileDiagnostics = await diagnosticsManager.getDiagnostics([error_file]);
-    const hoverInfo = await diagnosticsManager.getHoverInfo(error_file, lineNum, 0);
-    const codeActions = await diagnosticsManager.getCodeActions(error_file, lineNum, 0);
-    
-    return {
-      messages: [
-        {
-          role: "user",
-          content: {
-            type: "text", 
-            text: `I need to fix an error in \`${error_file}\` at line ${lineNum + 1}${error_message ? `: "${error_message}"` : ''}.
+  );
+
+  server.prompt(
+    "error_fixing_workflow",
+    "Step-by-step workflow for fixing specific errors using diagnostic and LSP information", 
+    {
+      error_file: z.string().describe("File containing the error"),
+      error_line: z.string().describe("Line number of the error (0-based)"),
+      error_message: z.string().optional().describe("The error message if known")
+    },
+    async ({ error_file, error_line, error_message }) => {
+      if (!error_file || !error_line) {
+        throw new Error("error_file and error_line are required");
+      }
+      
+      const lineNum = parseInt(error_line, 10);
+      if (isNaN(lineNum)) {
+        throw new Error("error_line must be a valid number");
+      }
+      
+      await diagnosticsManager.ensureFileLoaded(error_file);
+      
+      const fileDiagnostics = await diagnosticsManager.getDiagnostics([error_file]);
+      const hoverInfo = await diagnosticsManager.getHoverInfo(error_file, lineNum, 0);
+      const codeActions = await diagnosticsManager.getCodeActions(error_file, lineNum, 0);
+      
+      return {
+        messages: [
+          {
+            role: "user",
+            content: {
+              type: "text", 
+              text: `I need to fix an error in \`${error_file}\` at line ${lineNum + 1}${error_message ? `: "${error_message}"` : ''}.
 
 ## Current Diagnostics for ${error_file}
 ${JSON.stringify(fileDiagnostics, null, 2)}
@@ -728,51 +864,51 @@ Please guide me through a systematic error-fixing approach:
 - How to ensure no new issues were introduced
 
 Start by helping me understand exactly what this error means and what might be causing it.`
+            }
           }
-        }
-      ]
-    };
-  }
-);
-
-server.prompt(
-  "workspace_health_check",
-  "Comprehensive analysis of workspace code health using diagnostics and LSP",
-  {},
-  async () => {
-    const summary = await diagnosticsManager.getDiagnosticSummary();
-    const allDiagnostics = await diagnosticsManager.getAllDiagnostics();
-    const bufferStatus = await diagnosticsManager.getBufferStatus();
-    
-    // Group diagnostics by type and pattern
-    const errorPatterns: {[key: string]: number} = {};
-    const sourceAnalysis: {[key: string]: {errors: number, warnings: number, total: number}} = {};
-    
-    for (const diag of allDiagnostics) {
-      // Count error patterns
-      const pattern = diag.code || diag.message.split(' ').slice(0, 3).join(' ');
-      const patternKey = String(pattern);
-      errorPatterns[patternKey] = (errorPatterns[patternKey] || 0) + 1;
+        ]
+      };
+    }
+  );
+
+  server.prompt(
+    "workspace_health_check",
+    "Comprehensive analysis of workspace code health using diagnostics and LSP",
+    {},
+    async () => {
+      const summary = await diagnosticsManager.getDiagnosticSummary();
+      const allDiagnostics = await diagnosticsManager.getAllDiagnostics();
+      const bufferStatus = await diagnosticsManager.getBufferStatus();
       
-      // Analyze by source
-      if (diag.source) {
-        const sourceKey = diag.source;
-        if (!sourceAnalysis[sourceKey]) {
-          sourceAnalysis[sourceKey] = { errors: 0, warnings: 0, total: 0 };
+      // Group diagnostics by type and pattern
+      const errorPatterns: {[key: string]: number} = {};
+      const sourceAnalysis: {[key: string]: {errors: number, warnings: number, total: number}} = {};
+      
+      for (const diag of allDiagnostics) {
+        // Count error patterns
+        const pattern = diag.code || diag.message.split(' ').slice(0, 3).join(' ');
+        const patternKey = String(pattern);
+        errorPatterns[patternKey] = (errorPatterns[patternKey] || 0) + 1;
+        
+        // Analyze by source
+        if (diag.source) {
+          const sourceKey = diag.source;
+          if (!sourceAnalysis[sourceKey]) {
+            sourceAnalysis[sourceKey] = { errors: 0, warnings: 0, total: 0 };
+          }
+          sourceAnalysis[sourceKey].total++;
+          if (diag.severity === 1) sourceAnalysis[sourceKey].errors++;
+          if (diag.severity === 2) sourceAnalysis[sourceKey].warnings++;
         }
-        sourceAnalysis[sourceKey].total++;
-        if (diag.severity === 1) sourceAnalysis[sourceKey].errors++;
-        if (diag.severity === 2) sourceAnalysis[sourceKey].warnings++;
       }
-    }
-    
-    return {
-      messages: [
-        {
-          role: "user",
-          content: {
-            type: "text",
-            text: `Please analyze the health of my codebase using this comprehensive diagnostic information:
+      
+      return {
+        messages: [
+          {
+            role: "user",
+            content: {
+              type: "text",
+              text: `Please analyze the health of my codebase using this comprehensive diagnostic information:
 
 ## Overall Health Summary
 ${JSON.stringify(summary, null, 2)}
@@ -784,7 +920,7 @@ ${JSON.stringify(errorPatterns, null, 2)}
 ${JSON.stringify(sourceAnalysis, null, 2)}
 
 ## Buffer Status
-Currently loaded files: ${Object.keys(bufferStatus).length}
+Currently loaded files: ${Object.keys(bufferStatus.buffers).length}
 ${JSON.stringify(bufferStatus, null, 2)}
 
 Please provide insights on:
@@ -813,12 +949,15 @@ Please provide insights on:
 3. Preventive measures for common error types
 
 Use the available diagnostic and LSP tools to guide a systematic improvement of the codebase health.`
+            }
           }
-        }
-      ]
-    };
-  }
-);
+        ]
+      };
+    }
+  );
+
+  return server;
+}
 
 // Start the server
 async function main() {
@@ -855,6 +994,8 @@ Options:
 Environment Variables:
   MCP_TCP_PORT            Default TCP port if --tcp-port not specified
   MCP_TCP_HOST            Default TCP host if --tcp-host not specified
+  MCP_TCP_MAX_CONNECTIONS Concurrent TCP clients, each its own session (default: 16)
+  MCP_LSP_RESPONSE_TIMEOUT_MS Max wait in ms for an LSP operation's response from Neovim (default: 30000)
   NVIM_SERVER_ADDRESS     Neovim server address (socket path or host:port)
   NVIM_SOCKET_PATH        Legacy Neovim socket path
   NVIM_CONFIG_PATH        Default Neovim config file path
@@ -908,8 +1049,6 @@ Environment Variables:
       process.exit(1);
     }
   }
-  let transport;
-  
   if (tcpPortIndex !== -1 || process.env.MCP_TCP_PORT) {
     // TCP Transport mode
     const port = tcpPortIndex !== -1 
@@ -925,29 +1064,30 @@ Environment Variables:
       process.exit(1);
     }
 
-    transport = new TCPServerTransport({
-      port,
-      host,
-      allowMultipleConnections: false // MCP typically expects single connection
-    });
+    const maxConnections = process.env.MCP_TCP_MAX_CONNECTIONS
+      ? parseInt(process.env.MCP_TCP_MAX_CONNECTIONS)
+      : undefined;
+
+    // One MCP session per connection, all sharing diagnosticsManager
+    const tcpServer = new TCPSessionServer({ port, host, maxConnections });
+    tcpServer.onconnection = async (transport) => {
+      await createServer().connect(transport);
+      console.error(`MCP session ${transport.sessionId} started for ${transport.getRemoteAddress()}`);
+    };
 
     console.error(`Starting MCP server in TCP mode on ${host}:${port}`);
-    
-  } else {
-    // Stdio Transport mode (default)
-    transport = new StdioServerTransport();
-    console.error("Starting MCP server in stdio mode");
-  }
+    await tcpServer.start();
+    console.error("MCP Neovim Diagnostics Server started successfully");
 
-  await server.connect(transport);
-  console.error("MCP Neovim Diagnostics Server started successfully");
-  
-  // For TCP mode, show connection info
-  if (transport instanceof TCPServerTransport) {
-    const addr = transport.getServerAddress();
+    const addr = tcpServer.getServerAddress();
     console.error(`TCP server listening on ${addr.host}:${addr.port}`);
     console.error(`Connect with: nc ${addr.host} ${addr.port}`);
     console.error(`Or use in Claude Desktop config: "command": ["nc", "${addr.host}", "${addr.port}"]`);
+  } else {
+    // Stdio Transport mode (default)
+    console.error("Starting MCP server in stdio mode");
+    await createServer().connect(new StdioServerTransport());
+    console.error("MCP Neovim Diagnostics Server started successfully");
   }
   
   // Show Neovim server info if launched
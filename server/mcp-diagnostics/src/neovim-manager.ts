@@ -25,6 +25,64 @@ export interface DiagnosticSummary {
   files: number;
   byFile: { [filename: string]: { errors: number; warnings: number; info: number; hints: number } };
   bySource: { [source: string]: number };
+  generation?: number;
+}
+
+export interface DiagnosticFilters {
+  severities?: string[];
+  min_severity?: string;
+  sources?: string[];
+  codes?: string[];
+}
+
+export interface DiagnosticOutputOptions {
+  group_by?: 'file';
+  format?: 'objects' | 'columnar';
+}
+
+export interface DiagnosticFileGroup {
+  filename: string;
+  bufnr: number;
+  diagnostics: Omit<Diagnostic, 'filename' | 'bufnr'>[];
+}
+
+// Parallel arrays; file/source/code columns index into files/sources/codes (0-based)
+export interface DiagnosticColumns {
+  format: 'columnar';
+  count: number;
+  files: string[];
+  bufnrs: number[];
+  sources: string[];
+  codes: (string | number)[];
+  columns: {
+    file: number[];
+    lnum: number[];
+    col: number[];
+    end_lnum: number[];
+    end_col: number[];
+    severity: number[];
+    source: number[];
+    code: number[];
+    message: string[];
+  };
+}
+
+export type DiagnosticOutput = Diagnostic[] | DiagnosticFileGroup[] | DiagnosticColumns;
+
+export interface DiagnosticPage {
+  diagnostics: DiagnosticOutput;
+  total: number;
+  cursor: string;
+  next_cursor?: string;
+}
+
+export interface DiagnosticDelta {
+  since: number;
+  generation: number;
+  reset: boolean;
+  added: Diagnostic[];
+  removed: Diagnostic[];
+  changed: Diagnostic[];
 }
 
 export interface LSPLocation {
@@ -66,6 +124,52 @@ export interface CodeAction {
   };
 }
 
+export type LSPBatchMethod = 'hover' | 'definitions' | 'references' | 'document_symbols' | 'workspace_symbols' | 'code_actions';
+
+export interface LSPBatchOperation {
+  method: LSPBatchMethod;
+  file?: string;
+  line?: number;
+  column?: number;
+  end_line?: number;
+  end_column?: number;
+  query?: string;
+}
+
+export interface LSPBatchResult {
+  method: LSPBatchMethod;
+  file?: string;
+  result?: any;
+  error?: string;
+}
+
+export interface BufferInfo {
+  bufnr: number;
+  name: string;
+  loaded: boolean;
+  modified?: boolean;
+  filetype?: string;
+  line_count?: number;
+  lsp_clients?: string[];
+  has_lsp?: boolean;
+  file_size?: number;
+  hidden_pool?: boolean;
+}
+
+export interface HiddenBufferPoolStats {
+  buffers: number;
+  bytes: number;
+  max_buffers: number;
+  max_bytes: number;
+  evictions: number;
+  evicted_bytes: number;
+}
+
+export interface BufferStatus {
+  buffers: { [filename: string]: BufferInfo };
+  hidden_buffer_pool?: HiddenBufferPoolStats;
+}
+
 export class NeovimConnectionError extends Error {
   constructor(message: string, cause?: Error) {
     super(message);
@@ -78,6 +182,15 @@ export class NeovimDiagnosticsManager {
   private static instance: NeovimDiagnosticsManager;
   private nvim: NeovimClient | null = null;
   private connectionPromise: Promise<NeovimClient> | null = null;
+  private pendingLspRequests = new Map<number, { resolve: (value: any) => void; reject: (error: Error) => void; timer: ReturnType<typeof setTimeout> }>();
+  private nextLspRequestId = 1;
+  private lspNotificationsAttached = false;
+
+  // Upper bound on waiting for an LSP response notification; Neovim applies its own per-client deadlines first.
+  // Raise MCP_LSP_RESPONSE_TIMEOUT_MS when lsp_client_timeouts gives slow servers longer than this.
+  private static readonly LSP_RESPONSE_TIMEOUT_MS = parseInt(process.env.MCP_LSP_RESPONSE_TIMEOUT_MS || '') || 30000;
+
+  private static readonly RPC_CHUNK = 'return require("mcp-diagnostics.rpc").call(...)';
 
   private constructor() {}
 
@@ -120,6 +233,13 @@ export class NeovimDiagnosticsManager {
     }
   }
 
+  // Call a function of the mcp-diagnostics.rpc Lua module.
+  // Every call runs this same chunk; arguments travel as msgpack values, never as Lua source.
+  private async rpc(name: string, ...args: unknown[]): Promise<any> {
+    const nvim = await this.connect();
+    return nvim.lua(NeovimDiagnosticsManager.RPC_CHUNK, [name, ...args.map(arg => arg ?? null)]);
+  }
+
   private async connect(): Promise<NeovimClient> {
     if (this.nvim) {
       return this.nvim;
@@ -214,32 +334,8 @@ export class NeovimDiagnosticsManager {
   }
 
   async ensureFileLoaded(file: string): Promise<boolean> {
-    const nvim = await this.connect();
-    
     try {
-      const result = await nvim.lua(`
-        local filepath = "${file}"
-        
-        -- Get or create buffer for file
-        local bufnr = vim.fn.bufnr(filepath, true)
-        if bufnr == -1 then
-          return { success = false, error = "Failed to create buffer for " .. filepath }
-        end
-        
-        -- Load the file content
-        vim.fn.bufload(bufnr)
-        
-        -- Check if file exists and is readable
-        local readable = vim.fn.filereadable(filepath) == 1
-        
-        return {
-          success = true,
-          bufnr = bufnr,
-          readable = readable,
-          loaded = vim.api.nvim_buf_is_loaded(bufnr)
-        }
-      `);
-      
+      const result = await this.rpc('ensure_file_loaded', file);
       return (result as any).success;
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
@@ -248,71 +344,23 @@ export class NeovimDiagnosticsManager {
     }
   }
 
-  async getBufferStatus(): Promise<{[filename: string]: {bufnr: number, loaded: boolean, modified: boolean}}> {
-    const nvim = await this.connect();
-    
+  async getBufferStatus(): Promise<BufferStatus> {
     try {
-      const result = await nvim.lua(`
-        local buffers = {}
-        
-        for _, bufnr in ipairs(vim.api.nvim_list_bufs()) do
-          local filename = vim.api.nvim_buf_get_name(bufnr)
-          if filename ~= "" then
-            buffers[filename] = {
-              bufnr = bufnr,
-              loaded = vim.api.nvim_buf_is_loaded(bufnr),
-              modified = vim.api.nvim_buf_get_option(bufnr, 'modified')
-            }
-          end
-        end
-        
-        return buffers
-      `);
-      
-      return result as any;
+      return await this.rpc('get_buffer_status');
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting buffer status:', errorMessage);
-      return {};
+      return { buffers: {} };
     }
   }
 
   async getAllDiagnostics(): Promise<Diagnostic[]> {
     // First ensure we have diagnostics from all loaded buffers
     await this.refreshDiagnostics();
-    
-    const nvim = await this.connect();
-    
+
     try {
-      const diagnostics = await nvim.lua(`
-        local diagnostics = vim.diagnostic.get()
-        local result = {}
-        
-        for _, diag in ipairs(diagnostics) do
-          local bufnr = diag.bufnr
-          local filename = vim.api.nvim_buf_get_name(bufnr)
-          
-          table.insert(result, {
-            bufnr = bufnr,
-            filename = filename,
-            lnum = diag.lnum,
-            col = diag.col,
-            end_lnum = diag.end_lnum,
-            end_col = diag.end_col,
-            severity = diag.severity,
-            message = diag.message,
-            source = diag.source or "",
-            code = diag.code or ""
-          })
-        end
-        
-        return result
-      `);
-      
-      return (diagnostics as any[]).map(d => ({
-        ...d,
-        severityText: this.severityToText(d.severity)
-      }));
+      const diagnostics = await this.queryDiagnostics({});
+      return Array.isArray(diagnostics) ? diagnostics : [];
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting diagnostics:', errorMessage);
@@ -320,97 +368,10 @@ export class NeovimDiagnosticsManager {
     }
   }
 
-  async getDiagnostics(files?: string[], severity?: string, source?: string): Promise<Diagnostic[]> {
-    const nvim = await this.connect();
-    
+  async getDiagnostics(files?: string[], severity?: string, source?: string, filters?: DiagnosticFilters): Promise<Diagnostic[]> {
     try {
-      let severityLevel: number | undefined;
-      if (severity) {
-        const severityMap = { 'error': 1, 'warn': 2, 'info': 3, 'hint': 4 };
-        severityLevel = severityMap[severity as keyof typeof severityMap];
-      }
-
-      const result = await nvim.lua(`
-        local files = ...
-        local severity_filter = ${severityLevel || 'nil'}
-        local source_filter = ${source ? `"${source}"` : 'nil'}
-        local result = {}
-        
-        if files and #files > 0 then
-          -- Get diagnostics for specific files
-          for _, filepath in ipairs(files) do
-            local bufnr = vim.fn.bufnr(filepath, true)
-            if bufnr ~= -1 then
-              vim.fn.bufload(bufnr)
-              
-              local diagnostics = vim.diagnostic.get(bufnr)
-              
-              for _, diag in ipairs(diagnostics) do
-                local include = true
-                if severity_filter and diag.severity ~= severity_filter then
-                  include = false
-                end
-                if source_filter and (not diag.source or diag.source ~= source_filter) then
-                  include = false
-                end
-                
-                if include then
-                  table.insert(result, {
-                    bufnr = bufnr,
-                    filename = filepath,
-                    lnum = diag.lnum,
-                    col = diag.col,
-                    end_lnum = diag.end_lnum,
-                    end_col = diag.end_col,
-                    severity = diag.severity,
-                    message = diag.message,
-                    source = diag.source or "",
-                    code = diag.code or ""
-                  })
-                end
-              end
-            end
-          end
-        else
-          -- Get all diagnostics
-          local diagnostics = vim.diagnostic.get()
-          
-          for _, diag in ipairs(diagnostics) do
-            local include = true
-            if severity_filter and diag.severity ~= severity_filter then
-              include = false
-            end
-            if source_filter and (not diag.source or diag.source ~= source_filter) then
-              include = false
-            end
-            
-            if include then
-              local bufnr = diag.bufnr
-              local filename = vim.api.nvim_buf_get_name(bufnr)
-              
-              table.insert(result, {
-                bufnr = bufnr,
-                filename = filename,
-                lnum = diag.lnum,
-                col = diag.col,
-                end_lnum = diag.end_lnum,
-                end_col = diag.end_col,
-                severity = diag.severity,
-                message = diag.message,
-                source = diag.source or "",
-                code = diag.code or ""
-              })
-            end
-          end
-        end
-        
-        return result
-      `, files);
-      
-      return (result as any[]).map(d => ({
-        ...d,
-        severityText: this.severityToText(d.severity)
-      }));
+      const result = await this.queryDiagnostics({ files, severity, source, ...filters });
+      return Array.isArray(result) ? result : [];
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting filtered diagnostics:', errorMessage);
@@ -418,98 +379,246 @@ export class NeovimDiagnosticsManager {
     }
   }
 
-  async getDiagnosticSummary(): Promise<DiagnosticSummary> {
-    const diagnostics = await this.getAllDiagnostics();
-    
-    const summary: DiagnosticSummary = {
-      total: diagnostics.length,
-      errors: 0,
-      warnings: 0,
-      info: 0,
-      hints: 0,
-      files: 0,
-      byFile: {},
-      bySource: {}
-    };
+  // Like getDiagnostics, but grouped by file or in the columnar layout when requested
+  async getDiagnosticsOutput(files?: string[], severity?: string, source?: string, filters?: DiagnosticFilters, output?: DiagnosticOutputOptions): Promise<DiagnosticOutput> {
+    const result = await this.queryDiagnostics({ files, severity, source, ...filters, ...output });
+    if (output?.format === 'columnar') {
+      return result as DiagnosticColumns;
+    }
+    return Array.isArray(result) ? result : [];
+  }
 
-    const uniqueFiles = new Set<string>();
+  private async queryDiagnostics(params: { [key: string]: unknown }): Promise<any> {
+    // Severity and namespace filtering happen inside vim.diagnostic.get
+    return this.rpc('get_diagnostics', this.definedParams(params));
+  }
 
-    for (const diag of diagnostics) {
-      // Count by severity
-      switch (diag.severity) {
-        case 1: summary.errors++; break;
-        case 2: summary.warnings++; break;
-        case 3: summary.info++; break;
-        case 4: summary.hints++; break;
-      }
+  async getDiagnosticsPage(files?: string[], severity?: string, source?: string, limit?: number, cursor?: string, filters?: DiagnosticFilters, output?: DiagnosticOutputOptions): Promise<DiagnosticPage> {
+    // Sorting and slicing happen inside Neovim so only one page crosses the RPC boundary
+    const result = await this.rpc('get_diagnostics_page',
+      this.definedParams({ files, severity, source, ...filters, ...output, limit, cursor }));
 
-      // Count by file
-      uniqueFiles.add(diag.filename);
-      if (!summary.byFile[diag.filename]) {
-        summary.byFile[diag.filename] = { errors: 0, warnings: 0, info: 0, hints: 0 };
-      }
-      switch (diag.severity) {
-        case 1: summary.byFile[diag.filename].errors++; break;
-        case 2: summary.byFile[diag.filename].warnings++; break;
-        case 3: summary.byFile[diag.filename].info++; break;
-        case 4: summary.byFile[diag.filename].hints++; break;
-      }
+    const page = result as any;
+    if (page.error) {
+      throw new Error(page.error);
+    }
+
+    return {
+      diagnostics: output?.format === 'columnar' || Array.isArray(page.diagnostics) ? page.diagnostics : [],
+      total: page.total,
+      cursor: page.cursor,
+      next_cursor: page.next_cursor
+    };
+  }
 
-      // Count by source
-      if (diag.source) {
-        summary.bySource[diag.source] = (summary.bySource[diag.source] || 0) + 1;
+  // Drop unset values so the Lua side sees nil rather than vim.NIL
+  private definedParams(params: { [key: string]: unknown }): { [key: string]: unknown } {
+    const result: { [key: string]: unknown } = {};
+    for (const [key, value] of Object.entries(params)) {
+      if (value !== undefined && value !== null) {
+        result[key] = value;
       }
     }
+    return result;
+  }
+
+  async getDiagnosticsDelta(since: number): Promise<DiagnosticDelta> {
+    const result = await this.rpc('get_diagnostics_delta', since);
 
-    summary.files = uniqueFiles.size;
-    return summary;
+    const delta = result as any;
+    // Empty Lua tables come back as objects rather than arrays
+    const asList = (value: any): Diagnostic[] => Array.isArray(value) ? value : [];
+    return {
+      since: delta.since,
+      generation: delta.generation,
+      reset: delta.reset,
+      added: asList(delta.added),
+      removed: asList(delta.removed),
+      changed: asList(delta.changed)
+    };
   }
 
+  // Counts come from the incremental diagnostic index in Neovim, so only the
+  // aggregate crosses the RPC boundary, whatever the number of diagnostics
+  async getDiagnosticSummary(): Promise<DiagnosticSummary> {
+    try {
+      const summary = await this.rpc('get_diagnostic_summary');
+
+      // Empty Lua tables come back as arrays rather than objects
+      const asMap = (value: any) => value && !Array.isArray(value) ? value : {};
+      return {
+        ...summary,
+        byFile: asMap(summary.byFile),
+        bySource: asMap(summary.bySource)
+      };
+    } catch (error) {
+      const errorMessage = error instanceof Error ? error.message : String(error);
+      console.error('Error getting diagnostic summary:', errorMessage);
+      return { total: 0, errors: 0, warnings: 0, info: 0, hints: 0, files: 0, byFile: {}, bySource: {} };
+    }
+  }
+
+  // Pull diagnostics for buffers changed since their last pull, from servers that
+  // support textDocument/diagnostic; Neovim bounds the wait by the LSP client timeouts
   private async refreshDiagnostics(): Promise<void> {
-    const nvim = await this.connect();
-    
     try {
-      await nvim.lua(`
-        -- Refresh diagnostics for all loaded buffers
-        for _, bufnr in ipairs(vim.api.nvim_list_bufs()) do
-          if vim.api.nvim_buf_is_loaded(bufnr) then
-            -- Trigger LSP diagnostic refresh if clients are attached
-            local clients = vim.lsp.get_clients({bufnr = bufnr})
-            for _, client in ipairs(clients) do
-              if client.server_capabilities.diagnosticProvider then
-                vim.lsp.diagnostic.on_publish_diagnostics(nil, {
-                  uri = vim.uri_from_bufnr(bufnr),
-                  diagnostics = {}
-                }, {client_id = client.id})
-              end
-            end
-          end
-        end
-      `);
+      // null max_wait_ms: Neovim waits up to its longest LSP client timeout
+      await this.callLspAsync('pull_diagnostics', [null]);
     } catch (error) {
-      // Ignore errors in diagnostic refresh
+      // Ignore errors in diagnostic refresh, stored diagnostics are still returned
     }
   }
 
+  // Start an async LSP operation in Neovim and wait for its response notification.
+  // The RPC call returns immediately, so Neovim is not blocked while servers respond.
+  private async callLspAsync(operation: string, args: unknown[]): Promise<any> {
+    const nvim = await this.connect();
+
+    if (!this.lspNotificationsAttached) {
+      nvim.on('notification', (method: string, params: any[]) => this.handleNotification(method, params));
+      this.lspNotificationsAttached = true;
+    }
+
+    const channel = await nvim.channelId;
+    const requestId = this.nextLspRequestId++;
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pendingLspRequests.delete(requestId);
+        reject(new Error(`LSP ${operation} request timed out`));
+      }, NeovimDiagnosticsManager.LSP_RESPONSE_TIMEOUT_MS);
+      this.pendingLspRequests.set(requestId, { resolve, reject, timer });
+
+      const fail = (message: string) => {
+        clearTimeout(timer);
+        this.pendingLspRequests.delete(requestId);
+        reject(new Error(message));
+      };
+
+      this.rpc('lsp_call_async', channel, requestId, operation, args.map(arg => arg ?? null)).then(started => {
+        if (started && started.error) {
+          fail(started.error);
+        }
+      }, error => fail(error instanceof Error ? error.message : String(error)));
+    });
+  }
+
+  private handleNotification(method: string, params: any[]): void {
+    if (method !== 'mcp_diagnostics_response') {
+      return;
+    }
+
+    const [requestId, result, err] = params;
+    const pending = this.pendingLspRequests.get(requestId);
+    if (!pending) {
+      return;
+    }
+
+    clearTimeout(pending.timer);
+    this.pendingLspRequests.delete(requestId);
+    if (err) {
+      pending.reject(new Error(err));
+    } else {
+      pending.resolve(result);
+    }
+  }
+
+  // Lua returns empty tables as maps; normalize list results
+  private asList(value: any): any[] {
+    return Array.isArray(value) ? value : [];
+  }
+
+  private toLocation(file: string, range: any, text: string): LSPLocation {
+    return {
+      filename: file,
+      lnum: range.start.line,
+      col: range.start.character,
+      text
+    };
+  }
+
+  private formatDefinitions(result: any): LSPLocation[] {
+    return this.asList(result).map(def => this.toLocation(def.file, def.range,
+      `Definition at ${def.file}:${def.range.start.line + 1}:${def.range.start.character + 1}`));
+  }
+
+  private formatReferences(result: any): LSPLocation[] {
+    return this.asList(result).map(ref => this.toLocation(ref.file, ref.range,
+      `Reference at ${ref.file}:${ref.range.start.line + 1}:${ref.range.start.character + 1}`));
+  }
+
+  private formatDocumentSymbols(file: string, result: any): DocumentSymbol[] {
+    const parseSymbol = (sym: any): DocumentSymbol => {
+      const parsed: DocumentSymbol = {
+        name: sym.name,
+        kind: sym.kind,
+        kindText: this.symbolKindToText(sym.kind),
+        location: this.toLocation(file, sym.range, sym.name),
+        range: sym.range
+      };
+      const children = this.asList(sym.children);
+      if (children.length > 0) {
+        parsed.children = children.map(parseSymbol);
+      }
+      return parsed;
+    };
+
+    return this.asList(result).filter(sym => sym.range).map(parseSymbol);
+  }
+
+  private formatWorkspaceSymbols(result: any): WorkspaceSymbol[] {
+    return this.asList(result).map(symbol => ({
+      name: symbol.name,
+      kind: symbol.kind,
+      kindText: this.symbolKindToText(symbol.kind),
+      location: this.toLocation(symbol.location.file, symbol.location.range, symbol.name),
+      containerName: symbol.containerName
+    }));
+  }
+
+  private formatCodeActions(result: any): CodeAction[] {
+    return this.asList(result).map(action => ({
+      title: action.title,
+      kind: action.kind ?? "",
+      isPreferred: action.isPreferred,
+      command: action.command,
+      diagnostics: action.diagnostics
+    }));
+  }
+
+  // Run several LSP operations in one RPC. Neovim loads each file once and sends
+  // all requests concurrently; results come back in operation order.
+  async lspBatch(operations: LSPBatchOperation[]): Promise<LSPBatchResult[]> {
+    const results = this.asList(await this.callLspAsync('batch', [
+      operations.map(op => this.definedParams({ ...op }))
+    ]));
+
+    return operations.map((op, i) => {
+      const entry = results[i] ?? {};
+      const batchResult: LSPBatchResult = { method: op.method, file: op.file };
+      if (entry.error) {
+        batchResult.error = entry.error;
+        return batchResult;
+      }
+
+      switch (op.method) {
+        case 'hover': batchResult.result = this.asList(entry.result); break;
+        case 'definitions': batchResult.result = this.formatDefinitions(entry.result); break;
+        case 'references': batchResult.result = this.formatReferences(entry.result); break;
+        case 'document_symbols': batchResult.result = this.formatDocumentSymbols(op.file ?? '', entry.result); break;
+        case 'workspace_symbols': batchResult.result = this.formatWorkspaceSymbols(entry.result); break;
+        case 'code_actions': batchResult.result = this.formatCodeActions(entry.result); break;
+      }
+      return batchResult;
+    });
+  }
+
   async getHoverInfo(file: string, line: number, col: number): Promise<any> {
     // Ensure file is loaded before getting hover info
     await this.ensureFileLoaded(file);
     
-    const nvim = await this.connect();
-    
     try {
-      const result = await nvim.lua(`
-        local lsp = require("mcp-diagnostics.shared.lsp")
-        local hover_info, err = lsp.get_hover_info("${file}", ${line}, ${col})
-        
-        if err then
-          return { error = err }
-        end
-        
-        return hover_info or {}
-      `);
-      
-      return result;
+      return this.asList(await this.callLspAsync('hover', [file, line, col]));
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting hover info:', errorMessage);
@@ -521,33 +630,8 @@ export class NeovimDiagnosticsManager {
     // Ensure file is loaded before getting definitions
     await this.ensureFileLoaded(file);
     
-    const nvim = await this.connect();
-    
     try {
-      const result = await nvim.lua(`
-        local lsp = require("mcp-diagnostics.shared.lsp")
-        local definitions, err = lsp.get_definitions("${file}", ${line}, ${col})
-        
-        if err then
-          return { error = err }
-        end
-        
-        -- Convert to expected format
-        local results = {}
-        for _, def in ipairs(definitions or {}) do
-          table.insert(results, {
-            filename = def.file,
-            lnum = def.range.start.line,
-            col = def.range.start.character,
-            text = string.format("Definition at %s:%d:%d", 
-              def.file, def.range.start.line + 1, def.range.start.character + 1)
-          })
-        end
-        
-        return results
-      `);
-      
-      return result as LSPLocation[];
+      return this.formatDefinitions(await this.callLspAsync('definitions', [file, line, col]));
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting definitions:', errorMessage);
@@ -559,33 +643,8 @@ export class NeovimDiagnosticsManager {
     // Ensure file is loaded before getting references
     await this.ensureFileLoaded(file);
     
-    const nvim = await this.connect();
-    
     try {
-      const result = await nvim.lua(`
-        local lsp = require("mcp-diagnostics.shared.lsp")
-        local references, err = lsp.get_references("${file}", ${line}, ${col})
-        
-        if err then
-          return { error = err }
-        end
-        
-        -- Convert to expected format
-        local results = {}
-        for _, ref in ipairs(references or {}) do
-          table.insert(results, {
-            filename = ref.file,
-            lnum = ref.range.start.line,
-            col = ref.range.start.character,
-            text = string.format("Reference at %s:%d:%d", 
-              ref.file, ref.range.start.line + 1, ref.range.start.character + 1)
-          })
-        end
-        
-        return results
-      `);
-      
-      return result as LSPLocation[];
+      return this.formatReferences(await this.callLspAsync('references', [file, line, col]));
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting references:', errorMessage);
@@ -597,74 +656,8 @@ export class NeovimDiagnosticsManager {
     // Ensure file is loaded before getting symbols
     await this.ensureFileLoaded(file);
     
-    const nvim = await this.connect();
-    
     try {
-      const result = await nvim.lua(`
-        local filepath = "${file}"
-        
-        local bufnr = vim.fn.bufnr(filepath, true)
-        if bufnr == -1 then
-          return { error = "File not found: " .. filepath }
-        end
-        
-        vim.fn.bufload(bufnr)
-        vim.api.nvim_set_current_buf(bufnr)
-        
-        local clients = vim.lsp.get_clients({bufnr = bufnr})
-        if #clients == 0 then
-          return { error = "No LSP client attached to buffer" }
-        end
-        
-        local params = { textDocument = vim.lsp.util.make_text_document_params() }
-        local results = {}
-        
-        for _, client in ipairs(clients) do
-          if client.server_capabilities.documentSymbolProvider then
-            local success, result = pcall(function()
-              return client.request_sync('textDocument/documentSymbol', params, 5000, bufnr)
-            end)
-            
-            if success and result and result.result then
-              for _, symbol in ipairs(result.result) do
-                local function parse_symbol(sym)
-                  local location = {
-                    filename = filepath,
-                    lnum = sym.range.start.line,
-                    col = sym.range.start.character,
-                    text = sym.name
-                  }
-                  
-                  local parsed = {
-                    name = sym.name,
-                    kind = sym.kind,
-                    location = location,
-                    range = sym.range
-                  }
-                  
-                  if sym.children then
-                    parsed.children = {}
-                    for _, child in ipairs(sym.children) do
-                      table.insert(parsed.children, parse_symbol(child))
-                    end
-                  end
-                  
-                  return parsed
-                end
-                
-                table.insert(results, parse_symbol(symbol))
-              end
-            end
-          end
-        end
-        
-        return results
-      `);
-      
-      return (result as any[]).map(s => ({
-        ...s,
-        kindText: this.symbolKindToText(s.kind)
-      }));
+      return this.formatDocumentSymbols(file, await this.callLspAsync('document_symbols', [file]));
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting document symbols:', errorMessage);
@@ -673,53 +666,8 @@ export class NeovimDiagnosticsManager {
   }
 
   async getWorkspaceSymbols(query?: string): Promise<WorkspaceSymbol[]> {
-    const nvim = await this.connect();
-    
     try {
-      const result = await nvim.lua(`
-        local query = ${query ? `"${query}"` : '""'}
-        
-        local clients = vim.lsp.get_clients()
-        if #clients == 0 then
-          return { error = "No LSP clients active" }
-        end
-        
-        local params = { query = query }
-        local results = {}
-        
-        for _, client in ipairs(clients) do
-          if client.server_capabilities.workspaceSymbolProvider then
-            local success, result = pcall(function()
-              return client.request_sync('workspace/symbol', params, 5000)
-            end)
-            
-            if success and result and result.result then
-              for _, symbol in ipairs(result.result) do
-                local location = {
-                  filename = vim.uri_to_fname(symbol.location.uri),
-                  lnum = symbol.location.range.start.line,
-                  col = symbol.location.range.start.character,
-                  text = symbol.name
-                }
-                
-                table.insert(results, {
-                  name = symbol.name,
-                  kind = symbol.kind,
-                  location = location,
-                  containerName = symbol.containerName
-                })
-              end
-            end
-          end
-        end
-        
-        return results
-      `);
-      
-      return (result as any[]).map(s => ({
-        ...s,
-        kindText: this.symbolKindToText(s.kind)
-      }));
+      return this.formatWorkspaceSymbols(await this.callLspAsync('workspace_symbols', [query ?? '']));
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting workspace symbols:', errorMessage);
@@ -731,70 +679,8 @@ export class NeovimDiagnosticsManager {
     // Ensure file is loaded before getting code actions
     await this.ensureFileLoaded(file);
     
-    const nvim = await this.connect();
-    
     try {
-      const result = await nvim.lua(`
-        local filepath = "${file}"
-        local line = ${line}
-        local col = ${col}
-        local end_line = ${endLine || line}
-        local end_col = ${endColumn || col}
-        
-        local bufnr = vim.fn.bufnr(filepath, true)
-        if bufnr == -1 then
-          return { error = "File not found: " .. filepath }
-        end
-        
-        vim.fn.bufload(bufnr)
-        vim.api.nvim_set_current_buf(bufnr)
-        
-        local clients = vim.lsp.get_clients({bufnr = bufnr})
-        if #clients == 0 then
-          return { error = "No LSP client attached to buffer" }
-        end
-        
-        local range = {
-          start = { line = line, character = col },
-          ["end"] = { line = end_line, character = end_col }
-        }
-        
-        local context = {
-          diagnostics = vim.diagnostic.get(bufnr, { lnum = line })
-        }
-        
-        local params = {
-          textDocument = vim.lsp.util.make_text_document_params(),
-          range = range,
-          context = context
-        }
-        
-        local results = {}
-        
-        for _, client in ipairs(clients) do
-          if client.server_capabilities.codeActionProvider then
-            local success, result = pcall(function()
-              return client.request_sync('textDocument/codeAction', params, 5000, bufnr)
-            end)
-            
-            if success and result and result.result then
-              for _, action in ipairs(result.result) do
-                table.insert(results, {
-                  title = action.title,
-                  kind = action.kind or "",
-                  isPreferred = action.isPreferred,
-                  command = action.command,
-                  diagnostics = action.diagnostics
-                })
-              end
-            end
-          end
-        end
-        
-        return results
-      `);
-      
-      return result as CodeAction[];
+      return this.formatCodeActions(await this.callLspAsync('code_actions', [file, line, col, endLine, endColumn]));
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error('Error getting code actions:', errorMessage);
@@ -2,23 +2,189 @@ import * as net from 'net';
 import { Transport, TransportSendOptions } from '@modelcontextprotocol/sdk/shared/transport.js';
 import { JSONRPCMessage, RequestId, MessageExtraInfo } from '@modelcontextprotocol/sdk/types.js';
 
-export interface TCPServerTransportOptions {
+export interface TCPConnectionOptions {
+  /** Largest inbound message in bytes; a connection exceeding it is dropped */
+  maxMessageBytes?: number;
+  /** Bytes a connection may queue behind a full socket before sends to it fail */
+  maxQueuedBytes?: number;
+}
+
+export interface TCPSessionServerOptions extends TCPConnectionOptions {
   port: number;
   host?: string;
-  allowMultipleConnections?: boolean;
+  /** Concurrent connections accepted; further ones are closed immediately */
+  maxConnections?: number;
 }
 
+const DEFAULT_MAX_MESSAGE_BYTES = 64 * 1024 * 1024;
+const DEFAULT_MAX_QUEUED_BYTES = 16 * 1024 * 1024;
+const DEFAULT_MAX_CONNECTIONS = 16;
+const NEWLINE = 0x0a;
+
 /**
- * TCP Server Transport for MCP
- * Allows MCP servers to accept connections over TCP sockets
+ * Streaming newline-delimited message framer
+ * Incoming chunks are kept as a Buffer list and only the bytes of each new
+ * chunk are scanned for the delimiter, so a message arriving in many chunks
+ * is copied once. Lines are decoded only when complete; '\n' never occurs
+ * inside a multi-byte UTF-8 sequence, so characters split across chunks
+ * decode intact.
  */
-export class TCPServerTransport implements Transport {
-  private server: net.Server;
-  private connections: Set<net.Socket> = new Set();
+export class LineFramer {
+  private chunks: Buffer[] = [];
+  private pendingBytes = 0;
+  private maxLineBytes: number;
+
+  constructor(maxLineBytes: number = DEFAULT_MAX_MESSAGE_BYTES) {
+    this.maxLineBytes = maxLineBytes;
+  }
+
+  /**
+   * Add a chunk and return the lines it completed (without the delimiter)
+   * Throws if the pending line grows beyond maxLineBytes
+   */
+  push(data: Buffer): string[] {
+    const lines: string[] = [];
+    let start = 0;
+    let index = data.indexOf(NEWLINE);
+
+    while (index !== -1) {
+      lines.push(this.takeLine(data.subarray(start, index)));
+      start = index + 1;
+      index = data.indexOf(NEWLINE, start);
+    }
+
+    if (start < data.length) {
+      this.pendingBytes += data.length - start;
+      if (this.pendingBytes > this.maxLineBytes) {
+        const size = this.pendingBytes;
+        this.reset();
+        throw new Error(`Message exceeds ${this.maxLineBytes} bytes (${size} bytes buffered)`);
+      }
+      this.chunks.push(data.subarray(start));
+    }
+
+    return lines;
+  }
+
+  /** Bytes of the incomplete line currently buffered */
+  getPendingBytes(): number {
+    return this.pendingBytes;
+  }
+
+  reset(): void {
+    this.chunks = [];
+    this.pendingBytes = 0;
+  }
+
+  private takeLine(tail: Buffer): string {
+    if (this.chunks.length === 0) {
+      return tail.toString('utf8');
+    }
+
+    this.chunks.push(tail);
+    const line = Buffer.concat(this.chunks, this.pendingBytes + tail.length);
+    this.reset();
+    return line.toString('utf8');
+  }
+}
+
+interface QueuedWrite {
+  data: Buffer;
+  resolve: () => void;
+  reject: (error: Error) => void;
+}
+
+/**
+ * Drain-aware writer for one socket
+ * Writes go straight to the socket until it reports a full buffer; after
+ * that they wait in a bounded queue and are flushed on 'drain'.
+ */
+class SocketWriter {
+  private queue: QueuedWrite[] = [];
+  private queuedBytes = 0;
+  private waitingForDrain = false;
+
+  constructor(private socket: net.Socket, private maxQueuedBytes: number) {
+    socket.on('drain', () => {
+      this.waitingForDrain = false;
+      this.flush();
+    });
+    socket.on('close', () => this.rejectQueued(new Error('TCP connection closed')));
+  }
+
+  write(data: Buffer): Promise<void> {
+    if (this.socket.destroyed) {
+      return Promise.reject(new Error('TCP connection closed'));
+    }
+
+    if (!this.waitingForDrain && this.queue.length === 0) {
+      return new Promise((resolve, reject) => this.writeToSocket({ data, resolve, reject }));
+    }
+
+    // Always accept one message so a single large response can still go out.
+    // A client that falls further behind is dropped rather than left with
+    // responses silently missing.
+    if (this.queue.length > 0 && this.queuedBytes + data.length > this.maxQueuedBytes) {
+      const error = new Error(
+        `Outbound queue full (${this.queuedBytes} bytes waiting, limit ${this.maxQueuedBytes})`
+      );
+      this.socket.destroy(error);
+      return Promise.reject(error);
+    }
+
+    return new Promise((resolve, reject) => {
+      this.queue.push({ data, resolve, reject });
+      this.queuedBytes += data.length;
+    });
+  }
+
+  getQueuedBytes(): number {
+    return this.queuedBytes;
+  }
+
+  private writeToSocket(entry: QueuedWrite): void {
+    const flushed = this.socket.write(entry.data, (error) => {
+      if (error) {
+        entry.reject(error);
+      } else {
+        entry.resolve();
+      }
+    });
+    this.waitingForDrain = !flushed;
+  }
+
+  private flush(): void {
+    while (!this.waitingForDrain && this.queue.length > 0) {
+      const entry = this.queue.shift()!;
+      this.queuedBytes -= entry.data.length;
+      this.writeToSocket(entry);
+    }
+  }
+
+  private rejectQueued(error: Error): void {
+    const queue = this.queue;
+    this.queue = [];
+    this.queuedBytes = 0;
+    for (const entry of queue) {
+      entry.reject(error);
+    }
+  }
+}
+
+/**
+ * MCP transport for one TCP connection
+ * Each connection is its own MCP session: responses go back only to the
+ * socket that sent the request, so request IDs from different clients
+ * never collide.
+ */
+export class TCPConnectionTransport implements Transport {
+  private static nextSessionId = 1;
+
+  private socket: net.Socket;
+  private writer: SocketWriter;
+  private framer: LineFramer;
   private started = false;
-  private port: number;
-  private host: string;
-  private allowMultipleConnections: boolean;
+  private closed = false;
 
   onclose?: () => void;
   onerror?: (error: Error) => void;
@@ -26,54 +192,45 @@ export class TCPServerTransport implements Transport {
   sessionId?: string;
   setProtocolVersion?: (version: string) => void;
 
-  constructor(options: TCPServerTransportOptions) {
-    this.port = options.port;
-    this.host = options.host || '127.0.0.1';
-    this.allowMultipleConnections = options.allowMultipleConnections || false;
-    
-    this.server = net.createServer();
-    this.setupServerHandlers();
-  }
+  constructor(socket: net.Socket, options: TCPConnectionOptions = {}) {
+    this.socket = socket;
+    this.sessionId = `tcp-${TCPConnectionTransport.nextSessionId++}`;
+    this.writer = new SocketWriter(socket, options.maxQueuedBytes || DEFAULT_MAX_QUEUED_BYTES);
+    this.framer = new LineFramer(options.maxMessageBytes || DEFAULT_MAX_MESSAGE_BYTES);
 
-  private setupServerHandlers(): void {
-    this.server.on('connection', (socket: net.Socket) => {
-      console.error(`New TCP connection from ${socket.remoteAddress}:${socket.remotePort}`);
-      
-      if (!this.allowMultipleConnections && this.connections.size > 0) {
-        console.error('Multiple connections not allowed, rejecting new connection');
-        socket.end();
-        return;
+    socket.on('close', () => {
+      this.closed = true;
+      if (this.onclose) {
+        this.onclose();
       }
-
-      this.connections.add(socket);
-      this.setupSocketHandlers(socket);
     });
 
-    this.server.on('error', (error: Error) => {
-      console.error('TCP server error:', error);
+    socket.on('error', (error: Error) => {
+      console.error(`TCP socket error (${this.getRemoteAddress()}):`, error);
       if (this.onerror) {
         this.onerror(error);
       }
     });
-
-    this.server.on('close', () => {
-      console.error('TCP server closed');
-      if (this.onclose) {
-        this.onclose();
-      }
-    });
   }
 
-  private setupSocketHandlers(socket: net.Socket): void {
-    let buffer = '';
+  async start(): Promise<void> {
+    if (this.started) {
+      return;
+    }
+    this.started = true;
+
+    // Reading starts here, so nothing arrives before a server is connected
+    this.socket.on('data', (data: Buffer) => {
+      let lines: string[];
+      try {
+        lines = this.framer.push(data);
+      } catch (error) {
+        console.error(`Dropping TCP connection ${this.getRemoteAddress()}:`, error);
+        this.socket.destroy();
+        return;
+      }
 
-    socket.on('data', (data: Buffer) => {
-      buffer += data.toString();
-      
       // Process complete JSON-RPC messages
-      let lines = buffer.split('\n');
-      buffer = lines.pop() || ''; // Keep incomplete line in buffer
-      
       for (const line of lines) {
         if (line.trim()) {
           try {
@@ -88,20 +245,92 @@ export class TCPServerTransport implements Transport {
         }
       }
     });
+  }
 
-    socket.on('close', () => {
-      console.error(`TCP connection closed: ${socket.remoteAddress}:${socket.remotePort}`);
-      this.connections.delete(socket);
-      
-      if (this.connections.size === 0 && this.onclose) {
-        this.onclose();
+  async send(message: JSONRPCMessage, options?: TransportSendOptions): Promise<void> {
+    if (this.closed || this.socket.destroyed) {
+      throw new Error(`TCP connection ${this.getRemoteAddress()} is closed`);
+    }
+    await this.writer.write(Buffer.from(JSON.stringify(message) + '\n', 'utf8'));
+  }
+
+  async close(): Promise<void> {
+    if (this.closed) {
+      return;
+    }
+
+    // Flush pending writes, then close even if the peer keeps its side open
+    return new Promise((resolve) => {
+      this.socket.once('close', () => resolve());
+      this.socket.end(() => this.socket.destroy());
+    });
+  }
+
+  getRemoteAddress(): string {
+    return `${this.socket.remoteAddress}:${this.socket.remotePort}`;
+  }
+}
+
+/**
+ * TCP listener for MCP
+ * Accepts several clients at once and hands each connection to onconnection
+ * as its own TCPConnectionTransport, to be connected to its own McpServer.
+ */
+export class TCPSessionServer {
+  private server: net.Server;
+  private sessions: Set<TCPConnectionTransport> = new Set();
+  private started = false;
+  private port: number;
+  private host: string;
+  private maxConnections: number;
+  private connectionOptions: TCPConnectionOptions;
+
+  onconnection?: (transport: TCPConnectionTransport) => void | Promise<void>;
+  onerror?: (error: Error) => void;
+
+  constructor(options: TCPSessionServerOptions) {
+    this.port = options.port;
+    this.host = options.host || '127.0.0.1';
+    this.maxConnections = options.maxConnections || DEFAULT_MAX_CONNECTIONS;
+    this.connectionOptions = {
+      maxMessageBytes: options.maxMessageBytes,
+      maxQueuedBytes: options.maxQueuedBytes
+    };
+
+    this.server = net.createServer();
+    this.setupServerHandlers();
+  }
+
+  private setupServerHandlers(): void {
+    this.server.on('connection', (socket: net.Socket) => {
+      console.error(`New TCP connection from ${socket.remoteAddress}:${socket.remotePort}`);
+
+      if (this.sessions.size >= this.maxConnections) {
+        console.error(`Connection limit (${this.maxConnections}) reached, rejecting new connection`);
+        socket.destroy();
+        return;
       }
+
+      const transport = new TCPConnectionTransport(socket, this.connectionOptions);
+      this.sessions.add(transport);
+      socket.on('close', () => {
+        console.error(`TCP connection closed: ${transport.getRemoteAddress()} (${transport.sessionId})`);
+        this.sessions.delete(transport);
+      });
+
+      if (!this.onconnection) {
+        return;
+      }
+      Promise.resolve()
+        .then(() => this.onconnection!(transport))
+        .catch((error) => {
+          console.error(`Failed to start session for ${transport.getRemoteAddress()}:`, error);
+          socket.destroy();
+        });
     });
 
-    socket.on('error', (error: Error) => {
-      console.error('TCP socket error:', error);
-      this.connections.delete(socket);
-      
+    this.server.on('error', (error: Error) => {
+      console.error('TCP server error:', error);
       if (this.onerror) {
         this.onerror(error);
       }
@@ -114,68 +343,38 @@ export class TCPServerTransport implements Transport {
     }
 
     return new Promise((resolve, reject) => {
+      this.server.once('error', reject);
       this.server.listen(this.port, this.host, () => {
+        this.server.off('error', reject);
         this.started = true;
         console.error(`TCP MCP server listening on ${this.host}:${this.port}`);
         resolve();
       });
-
-      this.server.on('error', reject);
     });
   }
 
-  async send(message: JSONRPCMessage, options?: TransportSendOptions): Promise<void> {
-    const messageStr = JSON.stringify(message) + '\n';
-    const promises: Promise<void>[] = [];
-
-    for (const socket of this.connections) {
-      if (!socket.destroyed) {
-        promises.push(
-          new Promise((resolve, reject) => {
-            socket.write(messageStr, (error) => {
-              if (error) {
-                reject(error);
-              } else {
-                resolve();
-              }
-            });
-          })
-        );
-      }
-    }
-
-    if (promises.length === 0) {
-      throw new Error('No active TCP connections to send message');
-    }
-
-    // Wait for all writes to complete
-    await Promise.all(promises);
-  }
-
   async close(): Promise<void> {
     if (!this.started) {
       return;
     }
 
-    // Close all connections
-    for (const socket of this.connections) {
-      socket.end();
-    }
-    this.connections.clear();
-
-    return new Promise((resolve) => {
+    // Stop accepting, then end every session
+    const closed = new Promise<void>((resolve) => {
       this.server.close(() => {
         this.started = false;
         resolve();
       });
     });
+    await Promise.all([...this.sessions].map(session => session.close()));
+    this.sessions.clear();
+    await closed;
   }
 
   getConnectionCount(): number {
-    return this.connections.size;
+    return this.sessions.size;
   }
 
   getServerAddress(): { host: string; port: number } {
     return { host: this.host, port: this.port };
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,148 @@
+-- Document Sync Test
+-- Checks the didOpen/didChange/didClose the plugin sends to a running LSP client
+-- that serves a file without being attached to its buffer through vim.lsp.
+--
+-- Run from the repository root:
+--   nvim --headless -u NONE -l testing/document_sync_test.lua
+
+vim.opt.rtp:prepend(vim.fn.getcwd())
+
+local lsp_interact = require("mcp-diagnostics.shared.lsp_interact")
+
+local M = {}
+
+--- Notifications received by the fake server
+M.received = {}
+
+--- In-process server that records notifications and supports incremental sync
+---@param dispatchers table
+---@return table rpc client
+local function fake_server(dispatchers)
+    local closing = false
+    local request_id = 0
+    return {
+        request = function(method, _, callback)
+            request_id = request_id + 1
+            local result = nil
+            if method == "initialize" then
+                result = { capabilities = { textDocumentSync = { openClose = true, change = 2 } } }
+            end
+            vim.schedule(function() callback(nil, result) end)
+            return true, request_id
+        end,
+        notify = function(method, params)
+            table.insert(M.received, { method = method, params = params })
+            return true
+        end,
+        is_closing = function() return closing end,
+        terminate = function()
+            closing = true
+            dispatchers.on_exit(0, 0)
+        end,
+    }
+end
+
+--- Starts the fake server without attaching it to any buffer
+---@param root_dir string
+---@return table client
+local function start_client(root_dir)
+    local client_config = {
+        name = "document-sync-test",
+        cmd = fake_server,
+        root_dir = root_dir,
+        filetypes = { "lua" },
+    }
+    local client_id
+    if vim.fn.has("nvim-0.11") == 1 then
+        client_id = vim.lsp.start(client_config, { attach = false })
+    else
+        client_id = vim.lsp.start_client(client_config)
+    end
+    local client = vim.lsp.get_client_by_id(client_id)
+    assert(vim.wait(1000, function() return client.initialized end), "fake server did not initialize")
+    return client
+end
+
+--- Applies LSP contentChanges to text, the way a server would
+---@param text string
+---@param changes table
+---@return string
+local function apply_changes(text, changes)
+    for _, change in ipairs(changes) do
+        if not change.range then
+            text = change.text
+        else
+            local lines = vim.split(text, "\n", { plain = true })
+            local function offset(position)
+                local result = position.character
+                for i = 1, position.line do
+                    result = result + #lines[i] + 1
+                end
+                return result
+            end
+            text = text:sub(1, offset(change.range.start)) .. change.text .. text:sub(offset(change.range["end"]) + 1)
+        end
+    end
+    return text
+end
+
+local function last_received()
+    return M.received[#M.received]
+end
+
+function M.run()
+    local dir = vim.fn.tempname()
+    vim.fn.mkdir(dir, "p")
+    local filepath = dir .. "/sync.lua"
+    vim.fn.writefile({ "local a = 1", "local b = 2", "return a + b" }, filepath)
+
+    local client = start_client(dir)
+    vim.cmd.edit(filepath)
+    local bufnr = vim.api.nvim_get_current_buf()
+    vim.bo[bufnr].filetype = "lua"
+    assert(not vim.lsp.buf_is_attached(bufnr, client.id), "client must not be attached")
+
+    lsp_interact.notify_lsp_file_changed(filepath, bufnr)
+    local opened = last_received()
+    assert(opened and opened.method == "textDocument/didOpen", "expected didOpen")
+    assert(opened.params.textDocument.text == "local a = 1\nlocal b = 2\nreturn a + b")
+    local server_text = opened.params.textDocument.text
+
+    -- Edit one line: a single range-based change replacing just that line
+    vim.api.nvim_buf_set_lines(bufnr, 1, 2, false, { "local b = 3" })
+    lsp_interact.notify_lsp_file_changed(filepath, bufnr)
+    local changed = last_received()
+    assert(changed.method == "textDocument/didChange", "expected didChange")
+    assert(changed.params.textDocument.version == vim.api.nvim_buf_get_changedtick(bufnr))
+    local change = changed.params.contentChanges[1]
+    assert(#changed.params.contentChanges == 1 and change.range, "expected one ranged change")
+    assert(change.range.start.line == 1 and change.range.start.character == 0)
+    assert(change.range["end"].line == 2 and change.range["end"].character == 0)
+    assert(change.text == "local b = 3\n")
+    print("didChange: " .. vim.inspect(changed.params.contentChanges))
+
+    -- Append and delete lines: the changes must rebuild the buffer's text
+    server_text = apply_changes(server_text, changed.params.contentChanges)
+    vim.api.nvim_buf_set_lines(bufnr, 0, 1, false, {})
+    vim.api.nvim_buf_set_lines(bufnr, -1, -1, false, { "-- tail", "-- end" })
+    lsp_interact.notify_lsp_file_changed(filepath, bufnr)
+    server_text = apply_changes(server_text, last_received().params.contentChanges)
+    assert(server_text == table.concat(vim.api.nvim_buf_get_lines(bufnr, 0, -1, false), "\n"),
+        "server text diverged: " .. server_text)
+
+    -- Unchanged text sends nothing
+    local count = #M.received
+    lsp_interact.notify_lsp_file_changed(filepath, bufnr)
+    assert(#M.received == count, "unchanged text sent a notification")
+
+    vim.api.nvim_buf_delete(bufnr, { force = true })
+    assert(last_received().method == "textDocument/didClose", "expected didClose on wipe")
+
+    vim.lsp.stop_client(client.id, true)
+    vim.fn.delete(dir, "rf")
+    print("Document sync test passed")
+end
+
+M.run()
+
+return M